@@ -4,34 +4,140 @@ Main entry point
 """
 
 import argparse
+import glob
 import sys
 import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
 from pathlib import Path
 
 # Thêm src vào path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from src.preprocessing import ImagePreprocessor
-from src.detection import PlateDetector
+from src.preprocessing import (
+    ImagePreprocessor, RegionOfInterest, load_roi_config, FrameDeduplicator, load_dedup_config
+)
+from src.detection import PlateDetector, CoarseToFineDetector
 from src.recognition import CharacterSegmenter, CharacterRecognizer
-from src.utils import load_image, save_results, get_image_files, Config
+from src.pipeline import RecognitionPipeline
+from src.utils import (
+    save_results, append_result, iter_image_files, is_manifest_file, read_image_bytes, decode_image,
+    image_source_root,
+    Config, FrameBufferArena, ImagePrefetcher,
+    parse_shard, filter_shard, merge_results,
+    FolderWatcher, ProcessedCheckpoint, SharedFramePool,
+    Deadline, DeadlineExceeded, ImageTooLarge
+)
+
+# Kết quả ghi ra cho ảnh vượt giới hạn thời gian / kích thước
+TIMEOUT = "TIMEOUT"
+OVERSIZE = "OVERSIZE"
+# Kết quả ghi ra cho ảnh gây lỗi khi xử lý (watch mode)
+ERROR = "ERROR"
 
 
 class LicensePlateRecognizer:
     """Class chính để nhận dạng biển số"""
     
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, roi_config=None, coarse_to_fine=None,
+                 use_buffer_arena=None, plate_workers=None, plate_executor=None,
+                 glyph_cache_size=None, model_type=None, features=None,
+                 cascade=None, cascade_min_agreement=None,
+                 time_budget=None, max_pixels=None,
+                 frame_dedup=None, dedup_threshold=None, dedup_config=None):
         """
         Khởi tạo hệ thống nhận dạng biển số
         
         Args:
             model_path: Đường dẫn đến thư mục chứa model (mặc định: models/)
+            roi_config: File JSON hoặc dictionary {camera_id: RegionOfInterest}
+                        (mặc định: Config.ROI_CONFIG_FILE)
+            coarse_to_fine: Tìm ứng viên trên ảnh thu nhỏ rồi mới xử lý
+                            ở độ phân giải đầy đủ (mặc định: Config.COARSE_TO_FINE)
+            use_buffer_arena: Dùng lại các buffer kích thước khung hình giữa các ảnh
+                              (mặc định: Config.USE_BUFFER_ARENA). Khi bật, không
+                              gọi đồng thời từ nhiều thread
+            plate_workers: Số thread xử lý đồng thời các biển số trong cùng một ảnh,
+                           0 = tuần tự (mặc định: Config.PLATE_WORKERS)
+            plate_executor: Thread pool dùng chung có sẵn (bỏ qua plate_workers)
+            glyph_cache_size: Kích thước cache LRU theo ký tự, 0 = tắt
+                              (mặc định: Config.GLYPH_CACHE_SIZE)
+            model_type: 'float' hoặc 'binary' (mặc định: Config.MODEL_TYPE)
+            features: Đặc trưng cho KNN float (mặc định: Config.FEATURES)
+            cascade: Chạy cấu hình nhanh trước, chỉ chạy cấu hình đầy đủ khi không
+                     thấy biển số hoặc KNN không chắc chắn (mặc định: Config.CASCADE_ENABLED)
+            cascade_min_agreement: Tỷ lệ phiếu KNN tối thiểu của mọi ký tự để chấp
+                                   nhận kết quả nhanh (mặc định: Config.CASCADE_MIN_AGREEMENT)
+            time_budget: Thời gian nhận dạng tối đa một ảnh (giây), quá hạn thì
+                         dừng giữa các bước, 0 = tắt (mặc định: Config.IMAGE_TIME_BUDGET)
+            max_pixels: Số pixel tối đa khi giải mã; ảnh JPEG lớn hơn được giải mã
+                        thu nhỏ, ảnh không thu nhỏ được bị bỏ qua, 0 = không giới
+                        hạn (None: dùng Config.MAX_IMAGE_PIXELS)
+            frame_dedup: Bỏ qua khung hình gần như trùng với khung hình vừa xử lý
+                         của cùng camera, dùng lại kết quả (mặc định:
+                         Config.FRAME_DEDUP_ENABLED)
+            dedup_threshold: Khoảng cách Hamming tối đa giữa hai dHash để coi là
+                             trùng (mặc định: Config.FRAME_DEDUP_THRESHOLD)
+            dedup_config: File JSON hoặc dictionary {camera_id: ngưỡng} ghi đè
+                          ngưỡng theo camera (mặc định: Config.FRAME_DEDUP_CONFIG_FILE)
         """
         Config.ensure_directories()
         
         if model_path is None:
             model_path = str(Config.MODEL_DIR)
         
+        if roi_config is None:
+            roi_config = Config.ROI_CONFIG_FILE
+        
+        if coarse_to_fine is None:
+            coarse_to_fine = Config.COARSE_TO_FINE
+        
+        if use_buffer_arena is None:
+            use_buffer_arena = Config.USE_BUFFER_ARENA
+        
+        if glyph_cache_size is None:
+            glyph_cache_size = Config.GLYPH_CACHE_SIZE
+        
+        if model_type is None:
+            model_type = Config.MODEL_TYPE
+        
+        if features is None:
+            features = Config.FEATURES
+        
+        if cascade is None:
+            cascade = Config.CASCADE_ENABLED
+        
+        if cascade_min_agreement is None:
+            cascade_min_agreement = Config.CASCADE_MIN_AGREEMENT
+        
+        if time_budget is None:
+            time_budget = Config.IMAGE_TIME_BUDGET
+        
+        if max_pixels is None:
+            max_pixels = Config.MAX_IMAGE_PIXELS
+        
+        if frame_dedup is None:
+            frame_dedup = Config.FRAME_DEDUP_ENABLED
+        
+        if dedup_threshold is None:
+            dedup_threshold = Config.FRAME_DEDUP_THRESHOLD
+        
+        if dedup_config is None:
+            dedup_config = Config.FRAME_DEDUP_CONFIG_FILE
+        
+        # Tham số để tạo recognizer giống hệt trong tiến trình worker
+        self.worker_options = {
+            'model_path': model_path, 'roi_config': roi_config,
+            'coarse_to_fine': coarse_to_fine, 'use_buffer_arena': use_buffer_arena,
+            'plate_workers': 0, 'glyph_cache_size': glyph_cache_size,
+            'model_type': model_type, 'features': features,
+            'cascade': cascade, 'cascade_min_agreement': cascade_min_agreement,
+            'time_budget': time_budget, 'max_pixels': max_pixels,
+            # Bỏ qua khung hình trùng ở tiến trình chính (worker không thấy thứ tự khung hình)
+            'frame_dedup': False
+        }
+        
         # Khởi tạo các module
         self.preprocessor = ImagePreprocessor()
         self.detector = PlateDetector()
@@ -39,82 +145,622 @@ class LicensePlateRecognizer:
         self.recognizer = CharacterRecognizer(
             model_path=model_path,
             classifications_file=Config.CLASSIFICATIONS_FILE,
-            flattened_images_file=Config.FLATTENED_IMAGES_FILE
+            flattened_images_file=Config.FLATTENED_IMAGES_FILE,
+            k_neighbors=Config.K_NEIGHBORS,
+            cache_size=glyph_cache_size,
+            model_type=model_type,
+            features=features,
+            features_file=Config.FEATURES_FILE,
+            glyph_store=Config.GLYPH_STORE_DIR
         )
+        
+        if coarse_to_fine:
+            self.pyramid_detector = CoarseToFineDetector(
+                self.preprocessor,
+                self.detector,
+                pyramid_levels=Config.PYRAMID_LEVELS,
+                window_padding=Config.PYRAMID_WINDOW_PADDING
+            )
+        else:
+            self.pyramid_detector = None
+        
+        # Thread pool dùng chung cho các biển số trong cùng một ảnh
+        if plate_workers is None:
+            plate_workers = Config.PLATE_WORKERS
+        if plate_executor is None and plate_workers > 0:
+            plate_executor = ThreadPoolExecutor(
+                max_workers=plate_workers, thread_name_prefix='plate'
+            )
+        self.plate_executor = plate_executor
+        
+        # Buffer dùng lại giữa các khung hình (chỉ cấp phát lại khi kích thước đổi)
+        self.arena = FrameBufferArena() if use_buffer_arena else None
+        
+        # Các bước nhận dạng dưới dạng stage graph, chỉ tính các bước cần cho kết quả
+        self.pipeline = RecognitionPipeline(
+            self.preprocessor, self.detector, self.segmenter, self.recognizer,
+            executor=self.plate_executor, pyramid_detector=self.pyramid_detector
+        )
+        
+        # Thống kê thời gian (giây): giải mã và nhận dạng được tính riêng
+        self.timings = {'images': 0, 'decode': 0.0, 'recognize': 0.0}
+        
+        # Giới hạn cho từng ảnh: ảnh vượt giới hạn được ghi TIMEOUT / OVERSIZE
+        self.time_budget = time_budget
+        self.max_pixels = max_pixels
+        self.budget_stats = {'timeout': 0, 'oversize': 0}
+        
+        # Khung hình trùng theo camera: dùng lại kết quả của khung hình xử lý gần nhất
+        if frame_dedup:
+            if isinstance(dedup_config, dict) or dedup_config is None:
+                thresholds = dedup_config
+            else:
+                thresholds = load_dedup_config(str(dedup_config))
+            self.deduplicator = FrameDeduplicator(
+                threshold=dedup_threshold, thresholds=thresholds,
+                hash_size=Config.FRAME_DEDUP_HASH_SIZE
+            )
+        else:
+            self.deduplicator = None
+        
+        # Vùng quan tâm theo camera
+        if roi_config is None:
+            self.rois = {}
+        elif isinstance(roi_config, dict):
+            self.rois = roi_config
+        else:
+            self.rois = load_roi_config(str(roi_config))
+        
+        # Cascade: ảnh nhỏ hơn, ít phép toán hình thái học hơn
+        self.cascade = cascade
+        self.cascade_min_agreement = cascade_min_agreement
+        self.cascade_max_distance = Config.CASCADE_MAX_DISTANCE
+        self.cascade_stats = {'images': 0, 'escalated': 0, 'no_plate': 0, 'low_confidence': 0,
+                              'missed_plates': 0}
+        if cascade:
+            fast_width, fast_height = Config.CASCADE_FAST_SIZE
+            scale_x = fast_width / self.detector.TARGET_SIZE[0]
+            scale_y = fast_height / self.detector.TARGET_SIZE[1]
+            self.fast_preprocessor = ImagePreprocessor(
+                morphology_iterations=Config.CASCADE_FAST_MORPHOLOGY_ITERATIONS
+            )
+            self.fast_detector = PlateDetector(target_size=Config.CASCADE_FAST_SIZE)
+            # Vùng biển số được phóng to thêm để ký tự có kích thước như ở mức đầy đủ
+            self.fast_detector.PLATE_SCALE_FACTOR = self.detector.PLATE_SCALE_FACTOR / scale_x
+            self.fast_rois = {
+                camera: roi.scaled(scale_x, scale_y) for camera, roi in self.rois.items()
+            }
+            self.fast_arena = FrameBufferArena() if use_buffer_arena else None
+            self.fast_pipeline = RecognitionPipeline(
+                self.fast_preprocessor, self.fast_detector, self.segmenter, self.recognizer,
+                executor=self.plate_executor
+            )
     
-    def recognize(self, image_path):
+    def recognize(self, image_path, camera_id=None):
         """
         Nhận dạng biển số trong ảnh
         
         Args:
             image_path: Đường dẫn đến file ảnh
+            camera_id: Mã camera để áp dụng vùng quan tâm (tùy chọn)
             
         Returns:
             results: Danh sách biển số được nhận dạng [plate_text, ...]
+            
+        Raises:
+            ImageTooLarge: Ảnh vượt max_pixels kể cả khi giải mã thu nhỏ
+            DeadlineExceeded: Nhận dạng vượt time_budget
         """
         # Load ảnh
-        img = load_image(image_path)
+        img = self.load_image(image_path)
         if img is None:
             print(f"Error: Cannot load image {image_path}")
             return []
         
-        # Resize ảnh về kích thước chuẩn (1920x1080)
+        return self.recognize_image(img, camera_id=camera_id)
+    
+    def load_image(self, image_path):
+        """
+        Đọc và giải mã ảnh; ảnh JPEG lớn được giải mã thẳng ở độ phân giải
+        gần kích thước làm việc, ảnh 1 kênh được giải mã thành grayscale
+        
+        Args:
+            image_path: Đường dẫn đến file ảnh
+            
+        Returns:
+            img: Ảnh hoặc None nếu lỗi
+        """
+        img, decode_time = self.read_image(image_path)
+        self.timings['decode'] += decode_time
+        return img
+    
+    def read_image(self, image_path):
+        """
+        Đọc và giải mã ảnh, không cập nhật thống kê (an toàn khi gọi từ nhiều thread)
+        
+        Args:
+            image_path: Đường dẫn đến file ảnh
+            
+        Returns:
+            img: Ảnh hoặc None nếu lỗi
+            decode_time: Thời gian giải mã (giây)
+            
+        Raises:
+            ImageTooLarge: Ảnh vượt max_pixels kể cả khi giải mã thu nhỏ
+        """
+        data = read_image_bytes(image_path)
+        if data is None or data.size == 0:
+            return None, 0.0
+        
+        target_size = self.detector.TARGET_SIZE if Config.REDUCED_DECODE else None
+        return decode_image(data, target_size, max_pixels=self.max_pixels)
+    
+    def recognize_image(self, img, camera_id=None):
+        """
+        Nhận dạng biển số từ mảng ảnh
+        
+        Args:
+            img: Ảnh (BGR) với kích thước bất kỳ
+            camera_id: Mã camera để áp dụng vùng quan tâm (tùy chọn)
+            
+        Returns:
+            results: Danh sách biển số được nhận dạng [plate_text, ...]
+            
+        Raises:
+            DeadlineExceeded: Nhận dạng vượt time_budget (kiểm tra giữa các bước
+                              của pipeline và trước mỗi biển số)
+        """
+        start = time.perf_counter()
+        deadline = Deadline(self.time_budget)
+        
+        try:
+            # Khung hình gần như trùng khung hình vừa xử lý của camera: dùng lại kết quả
+            if self.deduplicator is not None:
+                region = self.dedup_region(img, camera_id)
+                frame_signature, previous = self.deduplicator.check(camera_id, region)
+                if previous is not None:
+                    return list(previous)
+            
+            if self.cascade:
+                results = self.recognize_cascade(img, camera_id=camera_id, deadline=deadline)
+            else:
+                # Resize ảnh về kích thước chuẩn (1920x1080)
+                img = self.detector.resize_image(img)
+                
+                # Chỉ lấy kết quả nhận dạng, các bước trung gian được tính theo nhu cầu
+                frame, _ = self.build_frame(img, camera_id=camera_id, deadline=deadline)
+                results = [plate_text for plate_text, _, _ in self.read_frame(frame)]
+            
+            if self.deduplicator is not None:
+                self.deduplicator.update(camera_id, frame_signature, results)
+        finally:
+            self.timings['images'] += 1
+            self.timings['recognize'] += time.perf_counter() - start
+        return results
+    
+    def recognize_cascade(self, img, camera_id=None, deadline=None):
+        """
+        Nhận dạng theo cascade: chạy cấu hình nhanh trước, chỉ chạy cấu hình
+        đầy đủ khi không thấy biển số, có ký tự KNN không chắc chắn (tỷ lệ
+        phiếu < cascade_min_agreement hoặc khoảng cách > Config.CASCADE_MAX_DISTANCE)
+        hoặc lượt nhanh có thể đã bỏ sót biển số: số ứng viên (contour tứ giác)
+        hoặc số biển số đọc được ít hơn số ứng viên ở độ phân giải đầy đủ. Bước
+        kiểm tra này chỉ chạy tới stage 'contours' (không trích vùng biển số,
+        phân đoạn hay KNN), và khung hình đó được dùng tiếp khi phải chạy lại.
+        
+        Args:
+            img: Ảnh (BGR) với kích thước bất kỳ
+            camera_id: Mã camera để áp dụng vùng quan tâm (tùy chọn)
+            deadline: Deadline chung cho cả hai lượt (tùy chọn)
+            
+        Returns:
+            results: Danh sách biển số được nhận dạng [plate_text, ...]
+        """
+        self.cascade_stats['images'] += 1
+        
+        img_fast = self.fast_detector.resize_image(img)
+        frame, _ = self.build_frame(img_fast, camera_id=camera_id, fast=True, deadline=deadline)
         img = self.detector.resize_image(img)
+        full_frame, _ = self.build_frame(img, camera_id=camera_id, deadline=deadline)
+        candidates = self.count_candidates(full_frame)
         
-        # Preprocessing (ảnh đã được resize)
-        img_grayscale, img_thresh = self.preprocessor.preprocess(img)
+        # Lượt nhanh có ít ứng viên hơn: chạy lại ngay, không cần đọc biển số nhanh
+        readings = self.read_frame(frame) if self.count_candidates(frame) >= candidates else None
         
-        # Detection
-        plates, contours = self.detector.detect_plates(img, img_grayscale, img_thresh)
+        if readings is None:
+            self.cascade_stats['missed_plates'] += 1
+        elif len(readings) == 0:
+            self.cascade_stats['no_plate'] += 1
+        elif not all(self._is_confident(agreement, distance)
+                     for _, agreement, distance in readings):
+            self.cascade_stats['low_confidence'] += 1
+        elif len(readings) < candidates:
+            self.cascade_stats['missed_plates'] += 1
+        else:
+            return [plate_text for plate_text, _, _ in readings]
+        
+        # Chạy tiếp khung hình đầy đủ (các stage đã tính không chạy lại)
+        self.cascade_stats['escalated'] += 1
+        return [plate_text for plate_text, _, _ in self.read_frame(full_frame)]
+    
+    @staticmethod
+    def count_candidates(frame):
+        """Số contour ứng viên biển số của khung hình (0 nếu không có khung hình)"""
+        if frame is None:
+            return 0
+        return len(frame['contours'])
+    
+    def _is_confident(self, agreement, distance):
+        """Kết quả KNN của biển số có đủ tin cậy để bỏ qua cấu hình đầy đủ không"""
+        if agreement < self.cascade_min_agreement:
+            return False
+        return self.cascade_max_distance is None or distance <= self.cascade_max_distance
+    
+    @property
+    def escalation_rate(self):
+        """Tỷ lệ ảnh phải chạy cấu hình đầy đủ trong cascade"""
+        images = self.cascade_stats['images']
+        return self.cascade_stats['escalated'] / images if images else 0.0
+    
+    def dedup_region(self, img, camera_id=None):
+        """
+        Vùng ảnh được so sánh khi bỏ qua khung hình trùng: vùng quan tâm của
+        camera (nếu có), để biển số chiếm nhiều ô của hash hơn
+        
+        Args:
+            img: Khung hình gốc (chưa resize)
+            camera_id: Mã camera (tùy chọn)
+            
+        Returns:
+            region: Vùng cắt theo hình chữ nhật bao của ROI (view), hoặc toàn ảnh
+        """
+        roi = self.rois.get(str(camera_id)) if camera_id is not None else None
+        if roi is None:
+            return img
         
-        if len(plates) == 0:
+        # ROI theo tọa độ kích thước chuẩn, khung hình gốc có thể lớn hơn
+        target_width, target_height = self.detector.TARGET_SIZE
+        height, width = img.shape[:2]
+        region, _ = roi.scaled(width / target_width, height / target_height).crop(img)
+        return region if region.size else img
+    
+    def build_frame(self, img, camera_id=None, fast=False, deadline=None):
+        """
+        Tạo khung hình của pipeline, chỉ xử lý vùng quan tâm của camera nếu có
+        
+        Args:
+            img: Ảnh đã resize về kích thước chuẩn (hoặc kích thước nhanh của cascade)
+            camera_id: Mã camera (tùy chọn)
+            fast: Dùng cấu hình nhanh của cascade
+            deadline: Deadline của ảnh (tùy chọn)
+            
+        Returns:
+            frame: StageFrame hoặc None nếu vùng quan tâm nằm ngoài ảnh
+            offset: Tọa độ (x, y) của vùng cắt ROI, None nếu xử lý toàn ảnh
+        """
+        pipeline = self.fast_pipeline if fast else self.pipeline
+        arena = self.fast_arena if fast else self.arena
+        rois = self.fast_rois if fast else self.rois
+        roi = rois.get(str(camera_id)) if camera_id is not None else None
+        
+        if roi is None:
+            return pipeline.frame(img, arena=arena, deadline=deadline), None
+        
+        # Cắt theo hình chữ nhật bao của ROI trước khi xử lý
+        img_crop, offset = roi.crop(img)
+        if img_crop.size == 0:
+            return None, offset
+        
+        mask = roi.get_mask(img_crop.shape, offset)
+        return pipeline.frame(img_crop, mask=mask, arena=arena, deadline=deadline), offset
+    
+    def read_frame(self, frame):
+        """
+        Kết quả nhận dạng của khung hình
+        
+        Args:
+            frame: StageFrame (hoặc None)
+            
+        Returns:
+            readings: Danh sách (plate_text, agreement, distance)
+        """
+        if frame is None:
             return []
+        return RecognitionPipeline.readings(frame)
+    
+    def detect(self, img, camera_id=None, fast=False):
+        """
+        Phát hiện biển số, chỉ xử lý vùng quan tâm của camera nếu có
         
-        # Recognition
-        results = []
-        for roi, roi_thresh in plates:
-            try:
-                # Segment characters
-                characters, _ = self.segmenter.segment_characters(roi_thresh)
-                
-                if len(characters) == 0:
-                    continue
-                
-                # Classify lines
-                height, width = roi_thresh.shape[:2]
-                first_line_chars, second_line_chars = self.segmenter.classify_lines(
-                    characters, height
-                )
-                
-                # Recognize
-                plate_text = self.recognizer.recognize_plate(
-                    first_line_chars, second_line_chars
-                )
-                
-                if plate_text:
-                    results.append(plate_text)
+        Args:
+            img: Ảnh đã resize về kích thước chuẩn (hoặc kích thước nhanh của cascade)
+            camera_id: Mã camera (tùy chọn)
+            fast: Dùng cấu hình nhanh của cascade
             
-            except Exception as e:
-                print(f"Error processing plate: {e}")
-                continue
+        Returns:
+            plates: Danh sách vùng biển số [(roi, roi_thresh), ...]
+            contours: Danh sách contour trong tọa độ ảnh đầu vào
+        """
+        frame, offset = self.build_frame(img, camera_id=camera_id, fast=fast)
+        if frame is None:
+            return [], []
         
-        return results
+        plates, contours = frame['plates']
+        if offset is None:
+            return plates, contours
+        
+        # Đưa contour về tọa độ ảnh đầy đủ
+        return plates, RegionOfInterest.to_frame_coordinates(contours, offset)
+    
+    def recognize_plates(self, plates):
+        """
+        Nhận dạng ký tự trên các vùng biển số
+        
+        Nếu có thread pool (plate_workers > 0) và nhiều hơn một biển số, các biển
+        số được phân đoạn đồng thời (OpenCV nhả GIL); ký tự của mọi biển số được
+        nhận dạng bằng một lần gọi KNN. Kết quả giữ đúng thứ tự ban đầu.
+        
+        Args:
+            plates: Danh sách vùng biển số [(roi, roi_thresh), ...]
+            
+        Returns:
+            results: Danh sách biển số được nhận dạng [plate_text, ...]
+        """
+        return [plate_text for plate_text, _, _ in self.recognize_plates_with_confidence(plates)]
     
-    def recognize_batch(self, image_paths):
+    def recognize_plates_with_confidence(self, plates):
+        """
+        Nhận dạng ký tự trên các vùng biển số kèm độ tin cậy của KNN
+        
+        Args:
+            plates: Danh sách vùng biển số [(roi, roi_thresh), ...]
+            
+        Returns:
+            readings: Danh sách (plate_text, agreement, distance)
+        """
+        return self.read_frame(self.pipeline.plates_frame(plates))
+    
+    def read_single_plate(self, plate):
+        """
+        Phân đoạn và nhận dạng ký tự trên một vùng biển số, kèm độ tin cậy
+        
+        Args:
+            plate: Vùng biển số (roi, roi_thresh)
+            
+        Returns:
+            (plate_text, agreement, distance) hoặc None nếu không nhận dạng được
+        """
+        return self.pipeline.plates_frame([plate])['recognition'][0]
+    
+    def recognize_single_plate(self, plate):
+        """
+        Phân đoạn và nhận dạng ký tự trên một vùng biển số
+        
+        Args:
+            plate: Vùng biển số (roi, roi_thresh)
+            
+        Returns:
+            plate_text: Text biển số hoặc None nếu không nhận dạng được
+        """
+        reading = self.read_single_plate(plate)
+        return reading[0] if reading is not None else None
+    
+    def recognize_batch(self, image_paths, camera_id=None, prefetch_depth=None):
         """
         Nhận dạng biển số từ nhiều ảnh
         
         Args:
             image_paths: Danh sách đường dẫn ảnh
+            camera_id: Mã camera của các ảnh (tùy chọn)
+            prefetch_depth: Số ảnh đọc trước (mặc định: Config.PREFETCH_DEPTH)
             
         Returns:
-            results: Danh sách kết quả [(image_path, [plate_texts]), ...]
+            results: Danh sách kết quả [(image_path, plate_texts), ...], plate_texts
+                     là TIMEOUT / OVERSIZE với ảnh vượt giới hạn
+        """
+        return list(self.iter_recognize(
+            image_paths, camera_id=camera_id, prefetch_depth=prefetch_depth
+        ))
+    
+    def iter_recognize(self, image_paths, camera_id=None, prefetch_depth=None,
+                       prefetch_max_bytes=None):
+        """
+        Nhận dạng lần lượt từng ảnh, có thể đọc và giải mã trước các ảnh kế tiếp
+        trên thread pool trong khi ảnh hiện tại đang được nhận dạng
+        
+        Ảnh vượt giới hạn (time_budget, max_pixels) không chặn các ảnh sau: kết
+        quả của ảnh là TIMEOUT hoặc OVERSIZE thay vì danh sách biển số.
+        
+        Args:
+            image_paths: Danh sách (hoặc iterator) đường dẫn ảnh
+            camera_id: Mã camera của các ảnh (tùy chọn)
+            prefetch_depth: Số ảnh đọc trước, 0 = tắt (mặc định: Config.PREFETCH_DEPTH)
+            prefetch_max_bytes: Giới hạn bộ nhớ cho ảnh đọc trước
+                                (mặc định: Config.PREFETCH_MAX_BYTES)
+            
+        Yields:
+            (image_path, plate_texts)
+        """
+        for image_path, img, status in self._iter_frames(
+                image_paths, prefetch_depth, prefetch_max_bytes):
+            if status is not None:
+                yield image_path, status
+            elif img is None:
+                print(f"Error: Cannot load image {image_path}")
+                yield image_path, []
+            else:
+                yield image_path, self._recognize_within_budget(img, camera_id)
+    
+    def _iter_frames(self, image_paths, prefetch_depth=None, prefetch_max_bytes=None):
+        """
+        Đọc và giải mã lần lượt các ảnh (đọc trước trên thread pool nếu prefetch_depth > 0)
+        
+        Yields:
+            (image_path, img, status): img là None nếu không đọc được; status là
+            OVERSIZE nếu ảnh vượt max_pixels, None nếu không
         """
-        results = []
+        if prefetch_depth is None:
+            prefetch_depth = Config.PREFETCH_DEPTH
+        if prefetch_max_bytes is None:
+            prefetch_max_bytes = Config.PREFETCH_MAX_BYTES
+        
+        if prefetch_depth > 0:
+            frames = ImagePrefetcher(
+                image_paths,
+                self.read_image,
+                depth=prefetch_depth,
+                max_bytes=prefetch_max_bytes,
+                workers=Config.PREFETCH_WORKERS
+            )
+            for image_path, img, decode_time in frames:
+                self.timings['decode'] += decode_time
+                yield image_path, img, self._load_status(frames.error)
+            return
+        
         for image_path in image_paths:
-            plate_texts = self.recognize(image_path)
-            results.append((image_path, plate_texts))
-        return results
+            try:
+                img, decode_time = self.read_image(image_path)
+            except ImageTooLarge as e:
+                print(f"Error loading image {image_path}: {e}")
+                yield image_path, None, self._load_status(e)
+                continue
+            self.timings['decode'] += decode_time
+            yield image_path, img, None
+    
+    def _load_status(self, error):
+        """Kết quả ghi ra cho ảnh đọc lỗi: OVERSIZE nếu ảnh vượt max_pixels"""
+        if isinstance(error, ImageTooLarge):
+            self.budget_stats['oversize'] += 1
+            return OVERSIZE
+        return None
+    
+    def _recognize_within_budget(self, img, camera_id=None):
+        """Nhận dạng một ảnh đã giải mã, TIMEOUT nếu vượt time_budget"""
+        try:
+            return self.recognize_image(img, camera_id=camera_id)
+        except DeadlineExceeded:
+            self.budget_stats['timeout'] += 1
+            return TIMEOUT
+    
+    def iter_recognize_workers(self, image_paths, workers, camera_id=None,
+                               prefetch_depth=None, prefetch_max_bytes=None):
+        """
+        Nhận dạng trên nhiều tiến trình worker: tiến trình hiện tại đọc, giải mã
+        và resize ảnh thẳng vào shared memory (SharedFramePool), worker đọc khung
+        hình tại chỗ và chỉ trả về text biển số
+        
+        Khung hình được gửi ở kích thước chuẩn (detector.TARGET_SIZE). Giới hạn
+        thời gian được áp dụng trong worker, giới hạn kích thước khi giải mã.
+        Khung hình trùng (frame_dedup) được phát hiện ở tiến trình hiện tại và
+        không được gửi đi; khung hình tham chiếu là khung hình được gửi gần nhất
+        của camera, nên nếu khung hình đó vượt time_budget thì các khung hình
+        trùng với nó cũng là TIMEOUT.
+        
+        Args:
+            image_paths: Danh sách (hoặc iterator) đường dẫn ảnh
+            workers: Số tiến trình nhận dạng
+            camera_id: Mã camera của các ảnh (tùy chọn)
+            prefetch_depth: Số ảnh đọc trước, 0 = tắt (mặc định: Config.PREFETCH_DEPTH)
+            prefetch_max_bytes: Giới hạn bộ nhớ cho ảnh đọc trước
+                                (mặc định: Config.PREFETCH_MAX_BYTES)
+            
+        Yields:
+            (image_path, plate_texts) theo đúng thứ tự đầu vào (plate_texts là
+            TIMEOUT / OVERSIZE với ảnh vượt giới hạn)
+        """
+        frames = self._iter_frames(image_paths, prefetch_depth, prefetch_max_bytes)
+        
+        target_size = self.detector.TARGET_SIZE
+        frame_shape = (target_size[1], target_size[0], 3)
+        pool = SharedFramePool(
+            workers, frame_shape,
+            initializer=_init_recognition_worker, initargs=(self.worker_options,)
+        )
+        pending = deque()
+        
+        def collect(image_path, future, result):
+            if isinstance(result, Future):
+                # Khung hình trùng: kết quả của khung hình tham chiếu
+                self.timings['images'] += 1
+                plate_texts = result.result()[0]
+                return image_path, plate_texts if plate_texts == TIMEOUT else list(plate_texts)
+            if future is None:
+                return image_path, result
+            plate_texts, recognize_time, cascade_stats = future.result()
+            self.timings['images'] += 1
+            self.timings['recognize'] += recognize_time
+            for key, count in cascade_stats.items():
+                self.cascade_stats[key] += count
+            if plate_texts == TIMEOUT:
+                self.budget_stats['timeout'] += 1
+            return image_path, plate_texts
+        
+        try:
+            for image_path, img, status in frames:
+                if status is not None:
+                    pending.append((image_path, None, status))
+                elif img is None:
+                    print(f"Error: Cannot load image {image_path}")
+                    pending.append((image_path, None, []))
+                else:
+                    previous = None
+                    if self.deduplicator is not None:
+                        region = self.dedup_region(img, camera_id)
+                        frame_signature, previous = self.deduplicator.check(camera_id, region)
+                    
+                    if previous is not None:
+                        pending.append((image_path, None, previous))
+                    else:
+                        # Chờ khi mọi ô shared memory đều bận
+                        future = pool.submit(
+                            _recognize_shared_frame, img, camera_id, size=target_size
+                        )
+                        if self.deduplicator is not None:
+                            self.deduplicator.update(camera_id, frame_signature, future)
+                        pending.append((image_path, future, None))
+                
+                while pending and (pending[0][1] is None or pending[0][1].done()
+                                   or len(pending) > pool.ring.slots):
+                    yield collect(*pending.popleft())
+            
+            while pending:
+                yield collect(*pending.popleft())
+        finally:
+            pool.close()
+
+
+# Recognizer của tiến trình worker (iter_recognize_workers)
+_worker_recognizer = None
+
+
+def _init_recognition_worker(options):
+    """Tạo recognizer trong tiến trình worker"""
+    global _worker_recognizer
+    _worker_recognizer = LicensePlateRecognizer(**options)
+
+
+def _recognize_shared_frame(img, camera_id):
+    """
+    Nhận dạng một khung hình trong tiến trình worker
+    
+    Args:
+        img: Khung hình (view vào shared memory, không giữ lại sau khi trả về)
+        camera_id: Mã camera (tùy chọn)
+        
+    Returns:
+        plate_texts: Danh sách biển số (TIMEOUT nếu vượt giới hạn thời gian)
+        recognize_time: Thời gian nhận dạng (giây)
+        cascade_stats: Thống kê cascade của khung hình này
+    """
+    recognizer = _worker_recognizer
+    stats_before = dict(recognizer.cascade_stats)
+    start = time.perf_counter()
+    plate_texts = recognizer._recognize_within_budget(img, camera_id=camera_id)
+    recognize_time = time.perf_counter() - start
+    cascade_stats = {
+        key: count - stats_before[key] for key, count in recognizer.cascade_stats.items()
+    }
+    return plate_texts, recognize_time, cascade_stats
 
 
 def main():
@@ -124,7 +770,9 @@ def main():
     )
     parser.add_argument(
         'input',
-        help='Đường dẫn đến file ảnh hoặc thư mục chứa ảnh'
+        nargs='?',
+        help='File ảnh, thư mục, glob pattern (ví dụ "archive/**/*.jpg") '
+             'hoặc file danh sách ảnh (.txt, .lst, .jsonl)'
     )
     parser.add_argument(
         '-o', '--output',
@@ -142,41 +790,248 @@ def main():
         default='txt',
         help='Định dạng output (mặc định: txt)'
     )
+    parser.add_argument(
+        '--roi-config',
+        default=None,
+        help='File JSON cấu hình vùng quan tâm theo camera'
+    )
+    parser.add_argument(
+        '--camera-id',
+        default=None,
+        help='Mã camera của ảnh đầu vào (dùng với --roi-config)'
+    )
+    parser.add_argument(
+        '--coarse-to-fine',
+        action='store_true',
+        help='Tìm ứng viên biển số trên ảnh thu nhỏ trước (nhanh hơn)'
+    )
+    parser.add_argument(
+        '--buffer-arena',
+        action='store_true',
+        help='Dùng lại buffer kích thước khung hình giữa các ảnh'
+    )
+    parser.add_argument(
+        '--plate-workers',
+        type=int,
+        default=Config.PLATE_WORKERS,
+        help='Số thread xử lý đồng thời các biển số trong một ảnh (mặc định: 0 = tuần tự)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=Config.RECOGNITION_WORKERS,
+        help='Số tiến trình nhận dạng; ảnh được giải mã ở tiến trình chính và '
+             'chuyển qua shared memory (mặc định: 0 = nhận dạng trong tiến trình chính)'
+    )
+    parser.add_argument(
+        '--glyph-cache',
+        type=int,
+        default=Config.GLYPH_CACHE_SIZE,
+        help='Số ký tự tối đa trong cache kết quả nhận dạng (mặc định: 0 = tắt)'
+    )
+    parser.add_argument(
+        '--model-type',
+        choices=['float', 'binary'],
+        default=Config.MODEL_TYPE,
+        help='Loại model KNN: float (Euclid) hoặc binary (Hamming, nén bit)'
+    )
+    parser.add_argument(
+        '--features',
+        choices=['pixels', 'zoning', 'hog', 'pca'],
+        default=Config.FEATURES,
+        help='Đặc trưng ký tự cho KNN float (mặc định: pixels)'
+    )
+    parser.add_argument(
+        '--cascade',
+        action='store_true',
+        help='Chạy cấu hình nhanh trước, chỉ chạy cấu hình đầy đủ khi cần'
+    )
+    parser.add_argument(
+        '--cascade-min-agreement',
+        type=float,
+        default=Config.CASCADE_MIN_AGREEMENT,
+        help='Tỷ lệ phiếu KNN tối thiểu để chấp nhận kết quả nhanh (mặc định: 1.0)'
+    )
+    parser.add_argument(
+        '--prefetch',
+        type=int,
+        default=Config.PREFETCH_DEPTH,
+        help='Số ảnh đọc và giải mã trước trong khi nhận dạng (mặc định: 0 = tắt)'
+    )
+    parser.add_argument(
+        '--prefetch-mb',
+        type=int,
+        default=Config.PREFETCH_MAX_BYTES // (1024 * 1024),
+        help='Giới hạn bộ nhớ cho ảnh đọc trước, tính bằng MB (mặc định: 512)'
+    )
+    parser.add_argument(
+        '--time-budget',
+        type=float,
+        default=Config.IMAGE_TIME_BUDGET,
+        help='Thời gian nhận dạng tối đa một ảnh, quá hạn ghi TIMEOUT '
+             '(giây, 0 = không giới hạn, mặc định: Config.IMAGE_TIME_BUDGET)'
+    )
+    parser.add_argument(
+        '--max-pixels',
+        type=int,
+        default=Config.MAX_IMAGE_PIXELS,
+        help='Số pixel tối đa khi giải mã: ảnh JPEG lớn hơn được giải mã thu nhỏ, '
+             'ảnh không thu nhỏ được ghi OVERSIZE '
+             '(0 = không giới hạn, mặc định: Config.MAX_IMAGE_PIXELS)'
+    )
+    parser.add_argument(
+        '--dedup',
+        action='store_true',
+        help='Bỏ qua khung hình gần như trùng với khung hình vừa xử lý của cùng '
+             'camera (dHash), dùng lại kết quả của khung hình đó'
+    )
+    parser.add_argument(
+        '--dedup-threshold',
+        type=int,
+        default=Config.FRAME_DEDUP_THRESHOLD,
+        help='Số bit dHash khác nhau tối đa để coi là trùng (mặc định: 1 trên 64x64)'
+    )
+    parser.add_argument(
+        '--dedup-config',
+        default=None,
+        help='File JSON ngưỡng trùng theo camera {camera_id: ngưỡng}, null = tắt'
+    )
+    parser.add_argument(
+        '-r', '--recursive',
+        action='store_true',
+        help='Duyệt cả thư mục con'
+    )
+    parser.add_argument(
+        '--sorted',
+        action='store_true',
+        help='Xử lý theo thứ tự cố định (sắp xếp theo tên)'
+    )
+    parser.add_argument(
+        '--shard',
+        default=None,
+        metavar='INDEX/COUNT',
+        help='Chỉ xử lý phần ảnh của shard này (ví dụ 0/4), chia theo hash đường dẫn'
+    )
+    parser.add_argument(
+        '--merge',
+        nargs='+',
+        default=None,
+        metavar='RESULT_FILE',
+        help='Gộp các file kết quả của từng shard vào --output rồi thoát'
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Chạy liên tục: theo dõi thư mục input và xử lý ảnh mới, '
+             'ghi kết quả nối tiếp vào --output (JSON Lines nếu --format json)'
+    )
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=Config.WATCH_POLL_INTERVAL,
+        help='Khoảng thời gian quét thư mục trong watch mode (giây, mặc định: 2)'
+    )
+    parser.add_argument(
+        '--checkpoint',
+        default=None,
+        help='File lưu danh sách ảnh đã xử lý trong watch mode '
+             '(mặc định: <output>.checkpoint)'
+    )
     
     args = parser.parse_args()
     
+    # Gộp kết quả các shard (không cần khởi tạo hệ thống)
+    if args.merge:
+        try:
+            count = merge_results(args.merge, args.output, format=args.format)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error merging results: {e}")
+            sys.exit(1)
+        print(f"Merged {count} result(s) from {len(args.merge)} file(s) into: {args.output}")
+        return
+    
+    if args.input is None:
+        parser.error('the following arguments are required: input')
+    
+    shard = None
+    if args.shard is not None:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    
     # Khởi tạo hệ thống
     print("Initializing License Plate Recognition System...")
     try:
-        recognizer = LicensePlateRecognizer(model_path=args.model)
+        recognizer = LicensePlateRecognizer(
+            model_path=args.model,
+            roi_config=args.roi_config,
+            coarse_to_fine=args.coarse_to_fine or None,
+            use_buffer_arena=args.buffer_arena or None,
+            plate_workers=args.plate_workers,
+            glyph_cache_size=args.glyph_cache,
+            model_type=args.model_type,
+            features=args.features,
+            cascade=args.cascade or None,
+            cascade_min_agreement=args.cascade_min_agreement,
+            time_budget=args.time_budget,
+            max_pixels=args.max_pixels,
+            frame_dedup=args.dedup or None,
+            dedup_threshold=args.dedup_threshold,
+            dedup_config=args.dedup_config
+        )
         print("System initialized successfully!")
     except Exception as e:
         print(f"Error initializing system: {e}")
         sys.exit(1)
     
-    # Lấy danh sách ảnh
+    if args.watch:
+        if not os.path.isdir(args.input):
+            print(f"Error: {args.input} is not a directory")
+            sys.exit(1)
+        run_watch(recognizer, args)
+        return
+    
+    # Duyệt ảnh đầu vào (lười, bắt đầu xử lý ngay khi tìm thấy ảnh đầu tiên)
     input_path = Path(args.input)
-    if input_path.is_file():
+    if input_path.is_file() and not is_manifest_file(input_path):
         image_paths = [str(input_path)]
-    elif input_path.is_dir():
-        image_paths = get_image_files(str(input_path))
+    elif input_path.exists() or glob.has_magic(args.input):
+        image_paths = iter_image_files(
+            args.input, recursive=args.recursive, ordered=args.sorted
+        )
     else:
-        print(f"Error: {args.input} is not a valid file or directory")
+        print(f"Error: {args.input} is not a valid file, directory or pattern")
         sys.exit(1)
     
-    if len(image_paths) == 0:
-        print(f"Error: No images found in {args.input}")
-        sys.exit(1)
-    
-    print(f"Found {len(image_paths)} image(s) to process")
+    if shard is not None:
+        image_paths = filter_shard(image_paths, *shard, root=image_source_root(args.input))
+        print(f"Processing shard {shard[0]}/{shard[1]}")
     
     # Nhận dạng
     results = []
-    for i, image_path in enumerate(image_paths, 1):
-        print(f"\n[{i}/{len(image_paths)}] Processing: {os.path.basename(image_path)}")
-        plate_texts = recognizer.recognize(image_path)
+    if args.workers > 0:
+        recognized = recognizer.iter_recognize_workers(
+            image_paths,
+            args.workers,
+            camera_id=args.camera_id,
+            prefetch_depth=args.prefetch,
+            prefetch_max_bytes=args.prefetch_mb * 1024 * 1024
+        )
+    else:
+        recognized = recognizer.iter_recognize(
+            image_paths,
+            camera_id=args.camera_id,
+            prefetch_depth=args.prefetch,
+            prefetch_max_bytes=args.prefetch_mb * 1024 * 1024
+        )
+    for i, (image_path, plate_texts) in enumerate(recognized, 1):
+        print(f"\n[{i}] Processed: {image_path}")
         
-        if plate_texts:
+        if plate_texts in (TIMEOUT, OVERSIZE):
+            plate_text = plate_texts
+            print(f"  Result: {plate_text}")
+        elif plate_texts:
             plate_text = " | ".join(plate_texts)
             print(f"  Result: {plate_text}")
         else:
@@ -185,10 +1040,125 @@ def main():
         
         results.append((image_path, plate_text))
     
+    # Shard rỗng vẫn ghi file kết quả rỗng để bước gộp không bị thiếu file
+    if len(results) == 0 and shard is None:
+        print(f"Error: No images found in {args.input}")
+        sys.exit(1)
+    
     # Lưu kết quả
     output_path = args.output
-    save_results(results, output_path, format=args.format)
+    # Tên ảnh là đường dẫn tương đối theo thư mục đầu vào (ảnh trùng tên trong
+    # các thư mục con khác nhau không bị lẫn khi gộp shard)
+    save_results(results, output_path, format=args.format, root=image_source_root(args.input))
     print(f"\nResults saved to: {output_path}")
+    
+    timings = recognizer.timings
+    if timings['images'] > 0:
+        print(
+            f"Average time per image: decode {timings['decode'] / timings['images'] * 1000:.1f} ms, "
+            f"recognition {timings['recognize'] / timings['images'] * 1000:.1f} ms"
+        )
+    
+    cache_info = recognizer.recognizer.cache_info
+    if cache_info['max_size'] > 0 and args.workers == 0:
+        print(
+            f"Glyph cache: {cache_info['hits']} hit(s), {cache_info['misses']} miss(es), "
+            f"hit rate {cache_info['hit_rate']:.1%}"
+        )
+    
+    budget_stats = recognizer.budget_stats
+    if budget_stats['timeout'] or budget_stats['oversize']:
+        print(
+            f"Skipped: {budget_stats['timeout']} image(s) over the time budget (TIMEOUT), "
+            f"{budget_stats['oversize']} over the pixel limit (OVERSIZE)"
+        )
+    
+    stats = recognizer.cascade_stats
+    if stats['images'] > 0:
+        print(
+            f"Cascade: {stats['escalated']}/{stats['images']} image(s) escalated "
+            f"({recognizer.escalation_rate:.1%}): {stats['no_plate']} without plate, "
+            f"{stats['low_confidence']} low confidence, "
+            f"{stats['missed_plates']} with possibly missed plates"
+        )
+    
+    print_dedup_stats(recognizer)
+
+
+def print_dedup_stats(recognizer):
+    """In tỷ lệ khung hình trùng bị bỏ qua theo camera (nếu bật frame_dedup)"""
+    if recognizer.deduplicator is None:
+        return
+    for camera, entry in recognizer.deduplicator.stats().items():
+        label = "" if camera == "None" else f" ({camera})"
+        threshold = "off" if entry['threshold'] is None else entry['threshold']
+        print(
+            f"Duplicate frames{label}: {entry['skipped']}/{entry['frames']} skipped "
+            f"({entry['skip_rate']:.1%}), threshold {threshold}"
+        )
+
+
+def run_watch(recognizer, args):
+    """
+    Watch mode: xử lý ảnh mới trong thư mục bằng một recognizer đã khởi tạo sẵn
+    
+    Kết quả được ghi ngay sau mỗi ảnh (ERROR nếu xử lý ảnh bị lỗi), sau đó ảnh
+    mới được ghi vào checkpoint, nên khi khởi động lại các ảnh đã xử lý sẽ được
+    bỏ qua. Model KNN được
+    tải lại khi file model thay đổi (mỗi Config.MODEL_RELOAD_INTERVAL giây).
+    
+    Args:
+        recognizer: LicensePlateRecognizer
+        args: Tham số dòng lệnh
+    """
+    checkpoint = ProcessedCheckpoint(args.checkpoint or args.output + '.checkpoint')
+    watcher = FolderWatcher(
+        args.input,
+        poll_interval=args.poll_interval,
+        recursive=args.recursive,
+        processed=checkpoint
+    )
+    
+    mode = "inotify" if watcher.uses_inotify else f"polling every {args.poll_interval}s"
+    print(f"Watching {args.input} ({mode}), {len(checkpoint)} image(s) already processed")
+    print("Press Ctrl+C to stop")
+    
+    count = 0
+    last_reload_check = time.monotonic()
+    try:
+        for image_path in watcher.watch():
+            if (Config.MODEL_RELOAD_INTERVAL > 0 and
+                    time.monotonic() - last_reload_check >= Config.MODEL_RELOAD_INTERVAL):
+                last_reload_check = time.monotonic()
+                if recognizer.recognizer.reload_if_changed():
+                    print("Model changed on disk, reloaded")
+            
+            try:
+                plate_texts = recognizer.recognize(image_path, camera_id=args.camera_id)
+                plate_text = " | ".join(plate_texts) if plate_texts else "NO_PLATE"
+            except DeadlineExceeded:
+                plate_text = TIMEOUT
+            except ImageTooLarge as e:
+                print(f"Error loading image {image_path}: {e}")
+                plate_text = OVERSIZE
+            except Exception as e:
+                # Một file hỏng không được làm dừng daemon; vẫn ghi checkpoint
+                # để không xử lý lại file đó sau khi khởi động lại
+                print(f"Error processing {image_path}: {e}")
+                plate_text = ERROR
+            
+            append_result(args.output, image_path, plate_text, format=args.format,
+                          root=args.input)
+            checkpoint.add(image_path)
+            
+            count += 1
+            print(f"[{count}] {os.path.basename(image_path)}: {plate_text}")
+    except KeyboardInterrupt:
+        print(f"\nStopped. Processed {count} new image(s), results in: {args.output}")
+        print_dedup_stats(recognizer)
+    finally:
+        watcher.close()
+        checkpoint.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,80 @@
+"""
+Tạo / bổ sung tập ký tự huấn luyện từ các thư mục ảnh ký tự đã gán nhãn
+
+Cấu trúc thư mục đầu vào: <thư mục>/<ký tự>/*.png (ký tự trắng trên nền đen,
+giống ký tự do CharacterSegmenter tách ra). Mẫu mới được ghi nối tiếp vào
+GlyphStore (không ghi lại các hàng cũ). Recognizer dùng store thay cho model
+text khi store đã có version.json (Config.GLYPH_STORE_DIR); web UI và watch
+mode đang chạy sẽ tự tải lại.
+
+Sử dụng:
+    # Tạo store từ model text hiện có, sau đó thêm ký tự mới
+    python scripts/build_dataset.py data/chars/ --init-from-text
+    python scripts/build_dataset.py data/new_chars/
+    # Xuất ra định dạng text (classifications.txt / flattened_images.txt)
+    python scripts/build_dataset.py --export-text models/
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Thêm thư mục gốc vào path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.recognition import GlyphStore, build_glyph_dataset, save_model
+from src.utils import Config
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or extend the glyph training set')
+    parser.add_argument('inputs', nargs='*',
+                        help='Thư mục ký tự đã gán nhãn (<thư mục>/<ký tự>/*.png)')
+    parser.add_argument('-m', '--model', type=str, default=str(Config.MODEL_DIR),
+                        help='Thư mục model')
+    parser.add_argument('--store', type=str, default=Config.GLYPH_STORE_DIR,
+                        help='Tên thư mục GlyphStore trong thư mục model')
+    parser.add_argument('--init-from-text', action='store_true',
+                        help='Nếu store còn rỗng, nạp model text hiện có trước')
+    parser.add_argument('--export-text', type=str, default=None, metavar='DIR',
+                        help='Ghi toàn bộ store ra model text trong DIR')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 4,
+                        help='Số thread đọc ảnh')
+    args = parser.parse_args()
+
+    store = GlyphStore(os.path.join(args.model, args.store))
+
+    if args.init_from_text and len(store) == 0:
+        labels = np.loadtxt(os.path.join(args.model, Config.CLASSIFICATIONS_FILE), np.float32)
+        samples = np.loadtxt(os.path.join(args.model, Config.FLATTENED_IMAGES_FILE), np.float32)
+        version = store.append(samples, labels.reshape(-1))
+        print(f"Imported {len(samples)} glyph(s) from text model (version {version})")
+
+    if args.inputs:
+        start = time.perf_counter()
+        samples, labels, skipped = build_glyph_dataset(
+            args.inputs, store.width, store.height, workers=args.workers
+        )
+        elapsed = time.perf_counter() - start
+        for path in skipped:
+            print(f"Error loading glyph: {path}")
+        if len(samples) > 0:
+            version = store.append(samples, labels)
+            print(f"Appended {len(samples)} glyph(s) in {elapsed:.2f}s "
+                  f"-> {len(store)} row(s), version {version}")
+        else:
+            print("No glyphs found")
+
+    if args.export_text:
+        samples, labels = store.read()
+        save_model(args.export_text, samples, labels,
+                   Config.CLASSIFICATIONS_FILE, Config.FLATTENED_IMAGES_FILE)
+        print(f"Exported {len(samples)} glyph(s) to {args.export_text}")
+
+
+if __name__ == "__main__":
+    main()
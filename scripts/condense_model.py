@@ -0,0 +1,107 @@
+"""
+Thu gọn tập huấn luyện KNN và ghi ra model nhỏ hơn
+
+Đánh giá trên tập ký tự tách riêng (held-out): độ chính xác và thời gian
+nhận dạng mỗi ký tự của model đầy đủ so với model đã thu gọn, sau đó thu
+gọn toàn bộ tập và ghi ra thư mục đầu ra theo định dạng model hiện có.
+
+Sử dụng:
+    python scripts/condense_model.py -o models_condensed/
+    python scripts/condense_model.py --method kmeans --per-class 2 -o models_small/
+    python scripts/condense_model.py --max-per-class 50 -o models_capped/
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Thêm thư mục gốc vào path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.recognition import (
+    condense_training_set, save_model, load_model_samples, split_held_out
+)
+from src.recognition.condensation import CONDENSATION_METHODS
+from src.utils import Config
+
+
+def knn_accuracy(train, train_labels, test, test_labels, k):
+    """Độ chính xác và thời gian (giây) nhận dạng tập test bằng cv2.ml.KNearest"""
+    knn = cv2.ml.KNearest_create()
+    knn.train(train, cv2.ml.ROW_SAMPLE, train_labels.reshape(-1, 1))
+    start = time.perf_counter()
+    _, results, _, _ = knn.findNearest(test, min(k, len(train)))
+    elapsed = time.perf_counter() - start
+    return int(np.sum(results[:, 0] == test_labels)), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Condense the KNN training set')
+    parser.add_argument('-m', '--model', type=str, default=str(Config.MODEL_DIR),
+                        help='Thư mục model đầu vào')
+    parser.add_argument('-o', '--output', type=str, required=True,
+                        help='Thư mục ghi model đã thu gọn')
+    parser.add_argument('--method', choices=CONDENSATION_METHODS, default='kmeans',
+                        help='Phương pháp thu gọn (mặc định: kmeans)')
+    parser.add_argument('-k', type=int, default=Config.K_NEIGHBORS,
+                        help='Số láng giềng (ENN và đánh giá)')
+    parser.add_argument('--per-class', type=int, default=3,
+                        help='Số prototype mỗi nhãn cho kmeans')
+    parser.add_argument('--max-per-class', type=int, default=None,
+                        help='Giới hạn số mẫu mỗi nhãn sau khi thu gọn')
+    parser.add_argument('--test-fraction', type=float, default=0.2,
+                        help='Tỷ lệ mẫu mỗi nhãn dùng để đánh giá')
+    parser.add_argument('--repeats', type=int, default=5,
+                        help='Số lần chia ngẫu nhiên khi đánh giá')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    samples, labels = load_model_samples(
+        args.model, Config.CLASSIFICATIONS_FILE, Config.FLATTENED_IMAGES_FILE
+    )
+    # Cùng seed thì cùng cách chia, bất kể phương pháp thu gọn
+    split_rng = np.random.default_rng(args.seed)
+    condense_rng = np.random.default_rng(args.seed + 1)
+
+    def condense(train, train_labels):
+        return condense_training_set(
+            train, train_labels, method=args.method, k=args.k,
+            per_class=args.per_class, max_per_class=args.max_per_class, rng=condense_rng
+        )
+
+    # Đánh giá trên tập tách riêng
+    stats = {'full': [0, 0.0, 0], 'condensed': [0, 0.0, 0]}
+    total = 0
+    for _ in range(args.repeats):
+        train_idx, test_idx = split_held_out(labels, args.test_fraction, split_rng)
+        test, test_labels = samples[test_idx], labels[test_idx]
+        variants = {
+            'full': (samples[train_idx], labels[train_idx]),
+            'condensed': condense(samples[train_idx], labels[train_idx]),
+        }
+        for name, (train, train_labels) in variants.items():
+            correct, elapsed = knn_accuracy(train, train_labels, test, test_labels, args.k)
+            stats[name][0] += correct
+            stats[name][1] += elapsed
+            stats[name][2] += len(train)
+        total += len(test_idx)
+
+    print(f"Method: {args.method}, held-out {total} glyph(s) over {args.repeats} split(s)")
+    print(f"{'model':<10} {'rows':>7} {'accuracy':>9} {'us/glyph':>9}")
+    for name, (correct, elapsed, rows) in stats.items():
+        print(f"{name:<10} {rows / args.repeats:>7.0f} {correct / total:>9.1%} "
+              f"{elapsed / total * 1e6:>9.1f}")
+
+    # Thu gọn toàn bộ tập và ghi model
+    condensed, condensed_labels = condense(samples, labels)
+    save_model(args.output, condensed, condensed_labels,
+               Config.CLASSIFICATIONS_FILE, Config.FLATTENED_IMAGES_FILE)
+    print(f"Wrote {len(condensed)}/{len(samples)} row(s) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Đánh giá các biến thể KNN trên tập ký tự tách riêng (held-out)
+
+So sánh KNN float (cv2.ml.KNearest, khoảng cách Euclid) trên pixel và trên
+các đặc trưng ít chiều (zoning, HOG, PCA) với KNN nhị phân (BinaryKNearest,
+khoảng cách Hamming): độ chính xác, số chiều, bộ nhớ model và thời gian nhận
+dạng mỗi ký tự (gồm cả thời gian tính đặc trưng).
+
+Sử dụng:
+    python scripts/evaluate_knn.py
+    python scripts/evaluate_knn.py --test-fraction 0.2 --repeats 10
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Thêm thư mục gốc vào path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.recognition import (
+    BinaryKNearest, create_feature_extractor, load_model_samples, split_held_out
+)
+from src.utils import Config
+
+
+def evaluate_float(train, train_labels, test, k, features='pixels'):
+    """
+    KNN float (cv2.ml.KNearest) trên đặc trưng cho trước
+
+    Returns:
+        (dự đoán, thời gian, bộ nhớ, số chiều)
+    """
+    extractor = create_feature_extractor(features).fit(train)
+    train_features = extractor.transform(train)
+    knn = cv2.ml.KNearest_create()
+    knn.train(train_features, cv2.ml.ROW_SAMPLE, train_labels.reshape(-1, 1))
+    start = time.perf_counter()
+    _, results, _, _ = knn.findNearest(extractor.transform(test), k)
+    elapsed = time.perf_counter() - start
+    return (results[:, 0], elapsed, train_features.nbytes + train_labels.nbytes,
+            train_features.shape[1])
+
+
+def evaluate_binary(train, train_labels, test, k):
+    """
+    KNN nhị phân (BinaryKNearest)
+
+    Returns:
+        (dự đoán, thời gian, bộ nhớ, số chiều)
+    """
+    knn = BinaryKNearest()
+    knn.train(train, train_labels)
+    start = time.perf_counter()
+    results, _, _ = knn.find_nearest(test, k)
+    elapsed = time.perf_counter() - start
+    return results[:, 0], elapsed, knn.nbytes, train.shape[1]
+
+
+METHODS = {
+    'float': evaluate_float,
+    'binary': evaluate_binary,
+    'zoning': lambda *args: evaluate_float(*args, features='zoning'),
+    'hog': lambda *args: evaluate_float(*args, features='hog'),
+    'pca': lambda *args: evaluate_float(*args, features='pca'),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate KNN variants on held-out glyphs')
+    parser.add_argument('-m', '--model', type=str, default=str(Config.MODEL_DIR),
+                        help='Thư mục chứa tập ký tự (định dạng model)')
+    parser.add_argument('-k', type=int, default=Config.K_NEIGHBORS,
+                        help='Số láng giềng')
+    parser.add_argument('--test-fraction', type=float, default=0.2,
+                        help='Tỷ lệ mẫu mỗi nhãn dùng để test')
+    parser.add_argument('--repeats', type=int, default=5,
+                        help='Số lần chia ngẫu nhiên')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    samples, labels = load_model_samples(
+        args.model, Config.CLASSIFICATIONS_FILE, Config.FLATTENED_IMAGES_FILE
+    )
+    print(f"Dataset: {len(samples)} glyph(s), {len(np.unique(labels))} label(s)")
+
+    rng = np.random.default_rng(args.seed)
+    correct = {name: 0 for name in METHODS}
+    elapsed = {name: 0.0 for name in METHODS}
+    nbytes = {}
+    dims = {}
+    agree = 0
+    total = 0
+
+    for _ in range(args.repeats):
+        train_idx, test_idx = split_held_out(labels, args.test_fraction, rng)
+        train, train_labels = samples[train_idx], labels[train_idx]
+        test, test_labels = samples[test_idx], labels[test_idx]
+
+        predictions = {}
+        for name, evaluate in METHODS.items():
+            predicted, seconds, size, dim = evaluate(train, train_labels, test, args.k)
+            predictions[name] = predicted
+            dims[name] = dim
+            correct[name] += int(np.sum(predicted == test_labels))
+            elapsed[name] += seconds
+            nbytes[name] = size
+
+        agree += int(np.sum(predictions['float'] == predictions['binary']))
+        total += len(test_idx)
+
+    print(f"Held-out: {total} glyph(s) over {args.repeats} split(s), k={args.k}")
+    print(f"{'model':<8} {'dims':>5} {'accuracy':>9} {'memory':>10} {'us/glyph':>9}")
+    for name in METHODS:
+        print(
+            f"{name:<8} {dims[name]:>5} {correct[name] / total:>9.1%} "
+            f"{nbytes[name] / 1024:>7.1f} KB {elapsed[name] / total * 1e6:>9.1f}"
+        )
+    print(f"Agreement float/binary: {agree / total:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Fit đặc trưng PCA offline trên tập ký tự của model và lưu cùng model
+
+Sử dụng:
+    python scripts/fit_features.py
+    python scripts/fit_features.py --components 32 -m models/
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Thêm thư mục gốc vào path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.recognition import PCAFeatures
+from src.utils import Config
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fit PCA glyph features offline')
+    parser.add_argument('-m', '--model', type=str, default=str(Config.MODEL_DIR),
+                        help='Thư mục chứa model')
+    parser.add_argument('--components', type=int, default=40,
+                        help='Số thành phần chính')
+    parser.add_argument('-o', '--output', type=str, default=Config.FEATURES_FILE,
+                        help='Tên file lưu trong thư mục model')
+    args = parser.parse_args()
+
+    samples = np.loadtxt(Path(args.model) / Config.FLATTENED_IMAGES_FILE, np.float32)
+    extractor = PCAFeatures(components=args.components).fit(samples)
+
+    # Tỷ lệ phương sai được giữ lại
+    centered = samples - extractor.mean
+    total = np.sum(centered.astype(np.float64) ** 2)
+    kept = np.sum(extractor.transform(samples).astype(np.float64) ** 2)
+
+    output_path = Path(args.model) / args.output
+    extractor.save(output_path)
+    print(f"Saved {extractor.dimension}-dim PCA to {output_path} "
+          f"({kept / total:.1%} of variance)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+Quét tham số (parameter sweep) trên tập ảnh có nhãn
+
+Mỗi ảnh được xử lý bởi một tiến trình; tiến trình chạy lần lượt mọi cấu hình
+trên ảnh đó và giữ kết quả từng stage của pipeline theo chữ ký tham số, nên
+mỗi cấu hình chỉ tính lại các stage phía sau tham số thay đổi (ví dụ đổi
+MIN_CHAR_AREA_RATIO chỉ chạy lại phân đoạn và nhận dạng, không chạy lại tiền
+xử lý và phát hiện).
+
+File nhãn có cùng định dạng với kết quả của main.py (đường dẫn ảnh tính theo
+thư mục chứa file nhãn):
+    .txt    <tên ảnh>\\t<biển số 1> | <biển số 2>   (NO_PLATE nếu không có)
+    .json   [{"image": ..., "plate": ...}, ...]
+    .jsonl  mỗi dòng {"image" hoặc "path": ..., "plate": ...}
+
+Với mỗi cấu hình: tỷ lệ ảnh đúng hoàn toàn, tỷ lệ biển số tìm đúng, và thời
+gian xử lý một ảnh nếu chạy riêng cấu hình đó (tổng thời gian các stage cần
+cho kết quả, không gồm giải mã).
+
+Sử dụng:
+    python scripts/sweep.py data/labels.txt \\
+        --param ADAPTIVE_BLOCK_SIZE 15 19 23 --param MIN_CHAR_AREA_RATIO 0.008 0.01
+    python scripts/sweep.py data/labels.txt --param K_NEIGHBORS 1 3 5 --workers 4
+"""
+
+import argparse
+import ast
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+
+# Thêm thư mục gốc vào path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.preprocessing import ImagePreprocessor
+from src.detection import PlateDetector
+from src.recognition import CharacterSegmenter, CharacterRecognizer
+from src.pipeline import RecognitionPipeline
+from src.utils import Config, read_image_bytes, decode_image
+
+
+# Tên tham số trong Config -> (thành phần của pipeline, thuộc tính)
+SWEEP_PARAMETERS = {
+    'GAUSSIAN_KERNEL_SIZE': ('preprocessor', 'GAUSSIAN_SMOOTH_FILTER_SIZE'),
+    'ADAPTIVE_BLOCK_SIZE': ('preprocessor', 'ADAPTIVE_THRESH_BLOCK_SIZE'),
+    'ADAPTIVE_WEIGHT': ('preprocessor', 'ADAPTIVE_THRESH_WEIGHT'),
+    'MORPHOLOGY_ITERATIONS': ('preprocessor', 'MORPHOLOGY_ITERATIONS'),
+    'CANNY_LOW': ('detector', 'CANNY_THRESHOLD_LOW'),
+    'CANNY_HIGH': ('detector', 'CANNY_THRESHOLD_HIGH'),
+    'DILATION_ITERATIONS': ('detector', 'DILATION_ITERATIONS'),
+    'APPROX_EPSILON_FACTOR': ('detector', 'APPROX_POLY_EPSILON_FACTOR'),
+    'MAX_CONTOURS': ('detector', 'MAX_CONTOURS'),
+    'MIN_CHAR_AREA_RATIO': ('segmenter', 'MIN_CHAR_AREA_RATIO'),
+    'MAX_CHAR_AREA_RATIO': ('segmenter', 'MAX_CHAR_AREA_RATIO'),
+    'MIN_CHAR_RATIO': ('segmenter', 'MIN_CHAR_RATIO'),
+    'MAX_CHAR_RATIO': ('segmenter', 'MAX_CHAR_RATIO'),
+    'K_NEIGHBORS': ('recognizer', 'K_NEIGHBORS'),
+}
+
+NO_PLATE = "NO_PLATE"
+
+
+def parse_plates(text):
+    """Chuỗi kết quả ('A | B' hoặc NO_PLATE) -> danh sách biển số"""
+    text = (text or "").strip()
+    if not text or text == NO_PLATE:
+        return []
+    return [plate.strip() for plate in text.split(" | ")]
+
+
+def normalize_plate(plate_text):
+    """Bỏ dấu cách, gạch ngang, dấu chấm để so sánh biển số"""
+    return re.sub(r'[^0-9A-Z]', '', plate_text.upper())
+
+
+def load_labels(label_file):
+    """
+    Đọc file nhãn
+
+    Returns:
+        labels: Danh sách (image_path, [plate_text, ...])
+    """
+    base_dir = os.path.dirname(os.path.abspath(label_file))
+    records = []
+
+    with open(label_file, 'r', encoding='utf-8') as f:
+        if label_file.lower().endswith('.json'):
+            records = [(item.get('image') or item.get('path'), item.get('plate'))
+                       for item in json.load(f)]
+        else:
+            is_jsonl = label_file.lower().endswith('.jsonl')
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if is_jsonl:
+                    item = json.loads(line)
+                    records.append((item.get('image') or item.get('path'), item.get('plate')))
+                else:
+                    image, _, plate = line.partition('\t')
+                    records.append((image, plate))
+
+    return [(os.path.join(base_dir, image), parse_plates(plate)) for image, plate in records]
+
+
+def parse_value(text):
+    """Giá trị tham số trên dòng lệnh: số, tuple '(5, 5)' hoặc chuỗi"""
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def build_grid(params):
+    """
+    Tích Descartes các giá trị tham số
+
+    Args:
+        params: Danh sách (tên, [giá trị, ...])
+
+    Returns:
+        configs: Danh sách dict {tên: giá trị}
+    """
+    names = [name for name, _ in params]
+    return [dict(zip(names, values))
+            for values in itertools.product(*(values for _, values in params))]
+
+
+def score(predicted, expected):
+    """
+    So sánh kết quả với nhãn
+
+    Returns:
+        image_correct: Tập biển số đọc được trùng khớp nhãn
+        plates_found: Số biển số trong nhãn được đọc đúng
+    """
+    predicted = sorted(normalize_plate(plate) for plate in predicted)
+    expected = sorted(normalize_plate(plate) for plate in expected)
+    remaining = list(predicted)
+    found = 0
+    for plate in expected:
+        if plate in remaining:
+            remaining.remove(plate)
+            found += 1
+    return predicted == expected, found
+
+
+# Pipeline của tiến trình worker (tạo một lần trong initializer)
+_pipeline = None
+
+
+def init_worker(model_path, model_type, features):
+    """Tạo pipeline cho tiến trình worker"""
+    global _pipeline
+    # Mỗi tiến trình xử lý một ảnh, tránh tranh chấp thread của OpenCV
+    cv2.setNumThreads(1)
+    recognizer = CharacterRecognizer(
+        model_path=model_path,
+        classifications_file=Config.CLASSIFICATIONS_FILE,
+        flattened_images_file=Config.FLATTENED_IMAGES_FILE,
+        k_neighbors=Config.K_NEIGHBORS,
+        model_type=model_type,
+        features=features,
+        features_file=Config.FEATURES_FILE,
+        glyph_store=Config.GLYPH_STORE_DIR
+    )
+    _pipeline = RecognitionPipeline(
+        ImagePreprocessor(), PlateDetector(), CharacterSegmenter(), recognizer
+    )
+
+
+def apply_config(pipeline, config):
+    """Gán giá trị tham số lên các thành phần của pipeline"""
+    for name, value in config.items():
+        component, attribute = SWEEP_PARAMETERS[name]
+        setattr(getattr(pipeline, component), attribute, value)
+
+
+def evaluate_image(task):
+    """
+    Chạy mọi cấu hình trên một ảnh, dùng lại kết quả stage giữa các cấu hình
+
+    Args:
+        task: (image_path, configs)
+
+    Returns:
+        image_path
+        outcomes: Mỗi cấu hình một (plate_texts, seconds, cost), None nếu không đọc
+                  được ảnh. seconds là thời gian thực tế (đã dùng lại stage),
+                  cost là thời gian nếu chạy riêng cấu hình đó
+    """
+    image_path, configs = task
+    data = read_image_bytes(image_path)
+    if data is None or data.size == 0:
+        return image_path, None
+    img, _ = decode_image(data, Config.TARGET_IMAGE_SIZE if Config.REDUCED_DECODE else None)
+    if img is None:
+        return image_path, None
+    img = _pipeline.detector.resize_image(img)
+
+    graph = _pipeline.graph
+    cache = {}
+    outcomes = []
+    for config in configs:
+        apply_config(_pipeline, config)
+        start = time.perf_counter()
+        frame = _pipeline.frame(img, cache=cache)
+        plate_texts = [plate_text for plate_text, _, _ in RecognitionPipeline.readings(frame)]
+        seconds = time.perf_counter() - start
+        cost = sum(cache[graph.signature(stage)][1] for stage in graph.upstream('recognition'))
+        outcomes.append((plate_texts, seconds, cost))
+    return image_path, outcomes
+
+
+def iter_outcomes(tasks, workers, init_args):
+    """Chạy evaluate_image trên các tiến trình worker (0 = trong tiến trình hiện tại)"""
+    if workers <= 0:
+        init_worker(*init_args)
+        yield from map(evaluate_image, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=init_args) as executor:
+        yield from executor.map(evaluate_image, tasks)
+
+
+def format_config(config):
+    return ", ".join(f"{name}={value}" for name, value in config.items()) or "(mặc định)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parameter sweep over a labelled image set')
+    parser.add_argument('labels', help='File nhãn (.txt, .json, .jsonl)')
+    parser.add_argument('--param', nargs='+', action='append', default=[],
+                        metavar=('NAME', 'VALUE'),
+                        help=f'Tham số và các giá trị cần thử, lặp lại cho nhiều tham số. '
+                             f'Hỗ trợ: {", ".join(SWEEP_PARAMETERS)}')
+    parser.add_argument('-m', '--model', type=str, default=str(Config.MODEL_DIR),
+                        help='Thư mục model')
+    parser.add_argument('--model-type', choices=['float', 'binary'], default=Config.MODEL_TYPE)
+    parser.add_argument('--features', choices=['pixels', 'zoning', 'hog', 'pca'],
+                        default=Config.FEATURES)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Số tiến trình, 0 = chạy trong tiến trình hiện tại '
+                             '(mặc định: số lõi CPU)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Ghi kết quả từng cấu hình ra file JSON (tùy chọn)')
+    args = parser.parse_args()
+
+    params = []
+    for param in args.param:
+        name, values = param[0], param[1:]
+        if name not in SWEEP_PARAMETERS:
+            parser.error(f"unknown parameter '{name}', expected one of {list(SWEEP_PARAMETERS)}")
+        if not values:
+            parser.error(f"no values given for '{name}'")
+        params.append((name, [parse_value(value) for value in values]))
+
+    labels = load_labels(args.labels)
+    if not labels:
+        print(f"Error: No labelled images in {args.labels}")
+        sys.exit(1)
+    configs = build_grid(params)
+    print(f"Sweeping {len(configs)} configuration(s) over {len(labels)} image(s)")
+
+    expected = dict(labels)
+    image_correct = [0] * len(configs)
+    plates_found = [0] * len(configs)
+    cost = [0.0] * len(configs)
+    elapsed = 0.0
+    evaluated = 0
+    total_plates = 0
+
+    start = time.perf_counter()
+    tasks = [(image_path, configs) for image_path, _ in labels]
+    init_args = (args.model, args.model_type, args.features)
+    for image_path, outcomes in iter_outcomes(tasks, args.workers, init_args):
+        if outcomes is None:
+            print(f"Error: Cannot load image {image_path}")
+            continue
+        evaluated += 1
+        total_plates += len(expected[image_path])
+        for i, (plate_texts, seconds, config_cost) in enumerate(outcomes):
+            correct, found = score(plate_texts, expected[image_path])
+            image_correct[i] += int(correct)
+            plates_found[i] += found
+            cost[i] += config_cost
+            elapsed += seconds
+    wall_time = time.perf_counter() - start
+
+    if evaluated == 0:
+        print("Error: No image could be loaded")
+        sys.exit(1)
+
+    summary = []
+    for i, config in enumerate(configs):
+        summary.append({
+            'config': config,
+            'image_accuracy': image_correct[i] / evaluated,
+            'plate_recall': plates_found[i] / total_plates if total_plates else None,
+            'ms_per_image': cost[i] / evaluated * 1000,
+        })
+
+    print(f"{'#':>3} {'images':>7} {'plates':>7} {'ms/img':>7} {'img/s':>6}  config")
+    for i, row in enumerate(summary):
+        recall = f"{row['plate_recall']:.1%}" if row['plate_recall'] is not None else "-"
+        print(f"{i:>3} {row['image_accuracy']:>7.1%} {recall:>7} {row['ms_per_image']:>7.1f} "
+              f"{1000 / max(row['ms_per_image'], 1e-9):>6.1f}  {format_config(row['config'])}")
+
+    best = max(range(len(summary)),
+               key=lambda i: (summary[i]['image_accuracy'], -summary[i]['ms_per_image']))
+    print(f"Best: #{best} {format_config(summary[best]['config'])}")
+
+    # So với chạy lại toàn bộ pipeline cho từng cấu hình
+    print(f"Sweep time: {wall_time:.1f} s wall, {elapsed:.1f} s compute "
+          f"(full re-runs would need {sum(cost):.1f} s compute)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ Module phát hiện biển số trong ảnh
 """
 
 from .plate_detector import PlateDetector
+from .pyramid_detector import CoarseToFineDetector
 
-__all__ = ['PlateDetector']
+__all__ = ['PlateDetector', 'CoarseToFineDetector']
 
@@ -7,6 +7,8 @@ import cv2
 import numpy as np
 import math
 
+from ..utils.buffer_arena import arena_buffer
+
 
 class PlateDetector:
     """Class phát hiện biển số trong ảnh"""
@@ -50,12 +52,13 @@ class PlateDetector:
         """Resize ảnh về kích thước chuẩn"""
         return cv2.resize(img, self.TARGET_SIZE)
     
-    def detect_edges(self, img_thresh):
+    def detect_edges(self, img_thresh, arena=None):
         """
         Phát hiện cạnh bằng Canny edge detection
         
         Args:
             img_thresh: Ảnh nhị phân
+            arena: FrameBufferArena để dùng lại buffer (tùy chọn)
             
         Returns:
             canny_image: Ảnh cạnh
@@ -63,21 +66,27 @@ class PlateDetector:
         return cv2.Canny(
             img_thresh,
             self.CANNY_THRESHOLD_LOW,
-            self.CANNY_THRESHOLD_HIGH
+            self.CANNY_THRESHOLD_HIGH,
+            edges=arena_buffer(arena, 'canny', img_thresh)
         )
     
-    def dilate_edges(self, canny_image):
+    def dilate_edges(self, canny_image, arena=None):
         """
         Dilation để nối các cạnh bị đứt đoạn
         
         Args:
             canny_image: Ảnh cạnh
+            arena: FrameBufferArena để dùng lại buffer (tùy chọn)
             
         Returns:
             dilated_image: Ảnh đã dilation
         """
         kernel = np.ones(self.DILATION_KERNEL_SIZE, np.uint8)
-        return cv2.dilate(canny_image, kernel, iterations=self.DILATION_ITERATIONS)
+        return cv2.dilate(
+            canny_image, kernel,
+            dst=arena_buffer(arena, 'dilated', canny_image),
+            iterations=self.DILATION_ITERATIONS
+        )
     
     def find_plate_contours(self, dilated_image):
         """
@@ -150,7 +159,7 @@ class PlateDetector:
         angle = math.atan(doi / ke) * (180.0 / math.pi)
         return angle
     
-    def extract_plate_region(self, img, img_grayscale, img_thresh, contour):
+    def extract_plate_region(self, img, img_grayscale, img_thresh, contour, arena=None):
         """
         Trích xuất vùng biển số từ ảnh
         
@@ -159,6 +168,7 @@ class PlateDetector:
             img_grayscale: Ảnh grayscale
             img_thresh: Ảnh nhị phân
             contour: Contour của biển số
+            arena: FrameBufferArena để dùng lại buffer mask (tùy chọn)
             
         Returns:
             roi: Vùng biển số (ảnh màu)
@@ -166,7 +176,11 @@ class PlateDetector:
             angle: Góc xoay
         """
         # Tạo mask từ img_grayscale để tìm vùng
-        mask = np.zeros(img_grayscale.shape, np.uint8)
+        if arena is None:
+            mask = np.zeros(img_grayscale.shape, np.uint8)
+        else:
+            mask = arena.get('plate_mask', img_grayscale.shape[:2])
+            mask.fill(0)
         cv2.drawContours(mask, [contour], 0, 255, -1)
         
         # Tìm vùng
@@ -219,7 +233,7 @@ class PlateDetector:
         
         return roi, roi_thresh, angle
     
-    def detect_plates(self, img, img_grayscale, img_thresh):
+    def detect_plates(self, img, img_grayscale, img_thresh, mask=None, arena=None):
         """
         Phát hiện tất cả biển số trong ảnh
         
@@ -227,16 +241,22 @@ class PlateDetector:
             img: Ảnh gốc (đã resize về target size)
             img_grayscale: Ảnh grayscale (đã resize về target size)
             img_thresh: Ảnh nhị phân (đã resize về target size)
+            mask: Mask vùng quan tâm (tùy chọn), cạnh nằm ngoài mask bị bỏ qua
+            arena: FrameBufferArena để dùng lại buffer (tùy chọn)
             
         Returns:
             plates: Danh sách vùng biển số [(roi, roi_thresh), ...]
             contours: Danh sách contour tương ứng
         """
         # Phát hiện cạnh
-        canny_image = self.detect_edges(img_thresh)
+        canny_image = self.detect_edges(img_thresh, arena)
+        
+        # Bỏ cạnh nằm ngoài vùng quan tâm
+        if mask is not None:
+            cv2.bitwise_and(canny_image, mask, dst=canny_image)
         
         # Dilation
-        dilated_image = self.dilate_edges(canny_image)
+        dilated_image = self.dilate_edges(canny_image, arena)
         
         # Tìm contour
         plate_contours = self.find_plate_contours(dilated_image)
@@ -245,12 +265,11 @@ class PlateDetector:
         plates = []
         valid_contours = []
         
-        # Lưu ảnh gốc để crop (tránh bị vẽ contour lên)
-        img_original = img.copy()
-        
+        # Không cần copy ảnh gốc: vùng biển số luôn được tạo mới bởi
+        # warpAffine/resize nên không tham chiếu tới ảnh đầu vào
         for contour in plate_contours:
             roi, roi_thresh, angle = self.extract_plate_region(
-                img_original, img_grayscale, img_thresh, contour
+                img, img_grayscale, img_thresh, contour, arena
             )
             if roi is not None and roi_thresh is not None:
                 plates.append((roi, roi_thresh))
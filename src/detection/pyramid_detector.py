@@ -0,0 +1,151 @@
+"""
+Coarse-to-fine Plate Detection Module
+Tìm ứng viên biển số trên ảnh thu nhỏ, sau đó xử lý lại ở độ phân giải
+đầy đủ chỉ trong các cửa sổ quanh ứng viên
+"""
+
+import cv2
+import numpy as np
+
+
+class CoarseToFineDetector:
+    """Class phát hiện biển số theo kim tự tháp ảnh (coarse-to-fine)"""
+
+    # Tham số mặc định
+    PYRAMID_LEVELS = 1
+    WINDOW_PADDING = 0.5
+    MIN_WINDOW_PADDING = 16
+
+    def __init__(self, preprocessor, detector,
+                 pyramid_levels=1,
+                 window_padding=0.5,
+                 min_window_padding=16):
+        """
+        Khởi tạo CoarseToFineDetector
+
+        Args:
+            preprocessor: ImagePreprocessor dùng cho cả hai mức
+            detector: PlateDetector dùng cho cả hai mức
+            pyramid_levels: Số lần pyrDown (mỗi lần giảm một nửa kích thước)
+            window_padding: Phần nới rộng cửa sổ so với kích thước ứng viên
+            min_window_padding: Số pixel nới rộng tối thiểu (ở độ phân giải đầy đủ)
+        """
+        self.preprocessor = preprocessor
+        self.detector = detector
+        self.PYRAMID_LEVELS = pyramid_levels
+        self.WINDOW_PADDING = window_padding
+        self.MIN_WINDOW_PADDING = min_window_padding
+
+    def find_candidate_windows(self, img, mask=None, arena=None):
+        """
+        Tìm các cửa sổ có thể chứa biển số trên ảnh thu nhỏ
+
+        Args:
+            img: Ảnh độ phân giải đầy đủ
+            mask: Mask vùng quan tâm ở độ phân giải đầy đủ (tùy chọn)
+            arena: FrameBufferArena cho các buffer ở mức thô (tùy chọn)
+
+        Returns:
+            windows: Danh sách cửa sổ (x, y, w, h) ở độ phân giải đầy đủ
+        """
+        img_coarse = img
+        for level in range(self.PYRAMID_LEVELS):
+            dst = None
+            if arena is not None:
+                height, width = img_coarse.shape[:2]
+                shape = ((height + 1) // 2, (width + 1) // 2) + img_coarse.shape[2:]
+                dst = arena.get(f'pyramid_{level}', shape, img_coarse.dtype)
+            img_coarse = cv2.pyrDown(img_coarse, dst=dst)
+        scale_x = img.shape[1] / img_coarse.shape[1]
+        scale_y = img.shape[0] / img_coarse.shape[0]
+
+        _, img_thresh = self.preprocessor.preprocess(img_coarse, arena)
+        canny_image = self.detector.detect_edges(img_thresh, arena)
+        if mask is not None:
+            mask_coarse = cv2.resize(
+                mask, (img_coarse.shape[1], img_coarse.shape[0]),
+                interpolation=cv2.INTER_NEAREST
+            )
+            cv2.bitwise_and(canny_image, mask_coarse, dst=canny_image)
+        dilated_image = self.detector.dilate_edges(canny_image, arena)
+        candidates = self.detector.find_plate_contours(dilated_image)
+
+        height, width = img.shape[:2]
+        windows = []
+        for contour in candidates:
+            x, y, w, h = cv2.boundingRect(contour)
+            x, y = x * scale_x, y * scale_y
+            w, h = w * scale_x, h * scale_y
+
+            pad_x = max(w * self.WINDOW_PADDING, self.MIN_WINDOW_PADDING)
+            pad_y = max(h * self.WINDOW_PADDING, self.MIN_WINDOW_PADDING)
+            x0 = max(int(x - pad_x), 0)
+            y0 = max(int(y - pad_y), 0)
+            x1 = min(int(np.ceil(x + w + pad_x)), width)
+            y1 = min(int(np.ceil(y + h + pad_y)), height)
+            if x1 > x0 and y1 > y0:
+                windows.append((x0, y0, x1 - x0, y1 - y0))
+
+        return self.merge_windows(windows)
+
+    @staticmethod
+    def merge_windows(windows):
+        """
+        Gộp các cửa sổ chồng lên nhau để mỗi vùng chỉ được xử lý một lần
+
+        Args:
+            windows: Danh sách cửa sổ (x, y, w, h)
+
+        Returns:
+            merged: Danh sách cửa sổ không chồng lên nhau
+        """
+        merged = list(windows)
+        changed = True
+        while changed:
+            changed = False
+            result = []
+            for (x, y, w, h) in merged:
+                for i, (mx, my, mw, mh) in enumerate(result):
+                    if x < mx + mw and mx < x + w and y < my + mh and my < y + h:
+                        x0, y0 = min(x, mx), min(y, my)
+                        x1, y1 = max(x + w, mx + mw), max(y + h, my + mh)
+                        result[i] = (x0, y0, x1 - x0, y1 - y0)
+                        changed = True
+                        break
+                else:
+                    result.append((x, y, w, h))
+            merged = result
+        return merged
+
+    def detect_plates(self, img, mask=None, arena=None):
+        """
+        Phát hiện biển số: tìm ứng viên ở mức thô, trích xuất ở mức đầy đủ
+
+        Các cửa sổ có kích thước thay đổi nên chỉ mức thô dùng arena.
+
+        Args:
+            img: Ảnh (đã resize về target size)
+            mask: Mask vùng quan tâm (tùy chọn)
+            arena: FrameBufferArena cho các buffer ở mức thô (tùy chọn)
+
+        Returns:
+            plates: Danh sách vùng biển số [(roi, roi_thresh), ...]
+            contours: Danh sách contour tương ứng (tọa độ ảnh đầy đủ)
+        """
+        plates = []
+        contours = []
+
+        for (x, y, w, h) in self.find_candidate_windows(img, mask, arena):
+            window = img[y:y + h, x:x + w]
+            window_mask = mask[y:y + h, x:x + w] if mask is not None else None
+
+            img_grayscale, img_thresh = self.preprocessor.preprocess(window)
+            window_plates, window_contours = self.detector.detect_plates(
+                window, img_grayscale, img_thresh, mask=window_mask
+            )
+
+            shift = np.array([x, y], dtype=np.int32).reshape(1, 1, 2)
+            plates.extend(window_plates)
+            contours.extend(contour + shift for contour in window_contours)
+
+        return plates, contours
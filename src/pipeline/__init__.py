@@ -0,0 +1,8 @@
+"""
+Module pipeline: các bước nhận dạng dưới dạng stage graph tính lười
+"""
+
+from .stage_graph import StageGraph, StageFrame
+from .recognition_pipeline import RecognitionPipeline
+
+__all__ = ['StageGraph', 'StageFrame', 'RecognitionPipeline']
@@ -0,0 +1,299 @@
+"""
+Recognition Pipeline Module
+Các bước nhận dạng biển số dưới dạng stage graph: mỗi bước (value, contrast,
+blur, threshold, canny, dilate, contours, plates, segmentation, recognition)
+là một stage có tên, chỉ được tính khi có người cần kết quả của nó.
+
+CLI chỉ lấy 'recognition' (các bước trung gian được tính nhưng không giữ lại
+bản sao), giao diện web lấy thêm các bước trung gian để hiển thị.
+"""
+
+import cv2
+
+from .stage_graph import StageGraph
+
+
+class RecognitionPipeline:
+    """Stage graph nhận dạng biển số, dùng chung bởi CLI và web UI"""
+
+    STAGES = ('value', 'contrast', 'blur', 'threshold', 'canny', 'dilate',
+              'contours', 'plates', 'segmentation', 'recognition')
+
+    def __init__(self, preprocessor, detector, segmenter, classifier,
+                 executor=None, pyramid_detector=None):
+        """
+        Khởi tạo RecognitionPipeline
+
+        Args:
+            preprocessor: ImagePreprocessor
+            detector: PlateDetector
+            segmenter: CharacterSegmenter
+            classifier: CharacterRecognizer hoặc MicroBatchClassifier
+            executor: Thread pool để phân đoạn đồng thời các biển số (tùy chọn)
+            pyramid_detector: CoarseToFineDetector; khi có, stage 'plates' tìm biển
+                              số theo kiểu coarse-to-fine thay vì từ 'contours'
+        """
+        self.preprocessor = preprocessor
+        self.detector = detector
+        self.segmenter = segmenter
+        self.classifier = classifier
+        self.recognizer = getattr(classifier, 'recognizer', classifier)
+        self.executor = executor
+        self.pyramid_detector = pyramid_detector
+        self.graph = self._build_graph()
+
+    def _build_graph(self):
+        """Khai báo các stage và tham số của chúng"""
+        preprocessor = self.preprocessor
+        detector = self.detector
+        segmenter = self.segmenter
+
+        graph = StageGraph()
+        graph.add_source('image')
+        graph.add_source('mask')
+
+        graph.add_stage('value', self._value, ('image',))
+        graph.add_stage('contrast', self._contrast, ('value',), lambda: (
+            preprocessor.MORPHOLOGY_KERNEL_SIZE, preprocessor.MORPHOLOGY_ITERATIONS
+        ))
+        graph.add_stage('blur', self._blur, ('contrast',), lambda: (
+            preprocessor.GAUSSIAN_SMOOTH_FILTER_SIZE,
+        ))
+        graph.add_stage('threshold', self._threshold, ('blur',), lambda: (
+            preprocessor.ADAPTIVE_THRESH_BLOCK_SIZE, preprocessor.ADAPTIVE_THRESH_WEIGHT
+        ))
+        graph.add_stage('canny', self._canny, ('threshold', 'mask'), lambda: (
+            detector.CANNY_THRESHOLD_LOW, detector.CANNY_THRESHOLD_HIGH
+        ))
+        graph.add_stage('dilate', self._dilate, ('canny',), lambda: (
+            detector.DILATION_KERNEL_SIZE, detector.DILATION_ITERATIONS
+        ))
+        graph.add_stage('contours', self._contours, ('dilate',), lambda: (
+            detector.MAX_CONTOURS, detector.APPROX_POLY_EPSILON_FACTOR
+        ))
+
+        if self.pyramid_detector is None:
+            graph.add_stage('plates', self._plates, ('image', 'value', 'threshold', 'contours'),
+                            lambda: (detector.PLATE_SCALE_FACTOR,))
+        else:
+            pyramid = self.pyramid_detector
+            graph.add_stage('plates', self._pyramid_plates, ('image', 'mask'), lambda: (
+                pyramid.PYRAMID_LEVELS, pyramid.WINDOW_PADDING, pyramid.MIN_WINDOW_PADDING,
+                self.graph.signature('contours'), detector.PLATE_SCALE_FACTOR
+            ))
+
+        graph.add_stage('segmentation', self._segmentation, ('plates',), lambda: (
+            segmenter.MIN_CHAR_AREA_RATIO, segmenter.MAX_CHAR_AREA_RATIO,
+            segmenter.MIN_CHAR_RATIO, segmenter.MAX_CHAR_RATIO,
+            segmenter.MORPHOLOGY_KERNEL_SIZE, segmenter.LINE_DIVISION_FACTOR
+        ))
+        graph.add_stage('recognition', self._recognition, ('segmentation',), lambda: (
+            self.recognizer.K_NEIGHBORS, self.recognizer.model_type,
+            self.recognizer.features, self.recognizer.signature
+        ))
+        return graph
+
+    def frame(self, img, mask=None, arena=None, cache=None, deadline=None):
+        """
+        Tạo khung hình mới cho một ảnh
+
+        Args:
+            img: Ảnh (BGR) đã resize về kích thước làm việc (hoặc vùng cắt ROI)
+            mask: Mask vùng quan tâm (tùy chọn)
+            arena: FrameBufferArena để dùng lại buffer (tùy chọn). Khi dùng arena,
+                   ảnh trung gian bị ghi đè bởi khung hình kế tiếp
+            cache: Cache stage theo chữ ký tham số của ảnh này (xem
+                   StageGraph.frame), không dùng cùng arena
+            deadline: Deadline (tùy chọn); kiểm tra trước mỗi stage và trước mỗi
+                      biển số, hết hạn thì raise DeadlineExceeded
+
+        Returns:
+            frame: StageFrame
+        """
+        if arena is not None and cache is not None:
+            raise ValueError("A stage cache cannot be used with a buffer arena")
+        return self.graph.frame(context={'arena': arena, 'deadline': deadline},
+                                cache=cache, image=img, mask=mask)
+
+    def plates_frame(self, plates):
+        """
+        Tạo khung hình từ các vùng biển số có sẵn (bỏ qua các bước phát hiện)
+
+        Args:
+            plates: Danh sách vùng biển số [(roi, roi_thresh), ...]
+
+        Returns:
+            frame: StageFrame
+        """
+        frame = self.graph.frame(image=None, mask=None)
+        frame.preset('plates', (list(plates), []))
+        return frame
+
+    def signature(self, stage):
+        """Chữ ký tham số của stage (xem StageGraph.signature)"""
+        return self.graph.signature(stage)
+
+    @staticmethod
+    def readings(frame):
+        """
+        Kết quả nhận dạng của khung hình, bỏ các biển số không đọc được
+
+        Returns:
+            readings: Danh sách (plate_text, agreement, distance)
+        """
+        return [reading for reading in frame['recognition'] if reading is not None]
+
+    # === Stages ===
+
+    def _value(self, frame, img):
+        return self.preprocessor.extract_value(img, frame.context.get('arena'))
+
+    def _contrast(self, frame, img_value):
+        return self.preprocessor.maximize_contrast(img_value, frame.context.get('arena'))
+
+    def _blur(self, frame, img_contrast):
+        return self.preprocessor.blur(img_contrast, frame.context.get('arena'))
+
+    def _threshold(self, frame, img_blurred):
+        return self.preprocessor.threshold(img_blurred, frame.context.get('arena'))
+
+    def _canny(self, frame, img_thresh, mask):
+        canny_image = self.detector.detect_edges(img_thresh, frame.context.get('arena'))
+        # Bỏ cạnh nằm ngoài vùng quan tâm
+        if mask is not None:
+            cv2.bitwise_and(canny_image, mask, dst=canny_image)
+        return canny_image
+
+    def _dilate(self, frame, canny_image):
+        return self.detector.dilate_edges(canny_image, frame.context.get('arena'))
+
+    def _contours(self, frame, dilated_image):
+        return self.detector.find_plate_contours(dilated_image)
+
+    def _plates(self, frame, img, img_value, img_thresh, plate_contours):
+        """
+        Returns:
+            plates: Danh sách vùng biển số [(roi, roi_thresh), ...]
+            contours: Danh sách contour tương ứng
+        """
+        plates = []
+        valid_contours = []
+        deadline = frame.context.get('deadline')
+        for contour in plate_contours:
+            if deadline is not None:
+                deadline.check('plates')
+            roi, roi_thresh, _ = self.detector.extract_plate_region(
+                img, img_value, img_thresh, contour, frame.context.get('arena')
+            )
+            if roi is not None and roi_thresh is not None:
+                plates.append((roi, roi_thresh))
+                valid_contours.append(contour)
+        return plates, valid_contours
+
+    def _pyramid_plates(self, frame, img, mask):
+        return self.pyramid_detector.detect_plates(
+            img, mask=mask, arena=frame.context.get('arena')
+        )
+
+    def _segment_plate(self, plate, deadline=None):
+        """
+        Returns:
+            (characters, first_line_chars, second_line_chars) hoặc None nếu không
+            có ký tự
+        """
+        if deadline is not None:
+            deadline.check('segmentation')
+        roi, roi_thresh = plate
+        try:
+            characters, _ = self.segmenter.segment_characters(roi_thresh)
+            if len(characters) == 0:
+                return None
+            first_line_chars, second_line_chars = self.segmenter.classify_lines(
+                characters, roi_thresh.shape[0]
+            )
+            return characters, first_line_chars, second_line_chars
+        except Exception as e:
+            print(f"Error processing plate: {e}")
+            return None
+
+    def _segmentation(self, frame, detection):
+        """Phân đoạn ký tự từng biển số (đồng thời nếu có thread pool, giữ thứ tự)"""
+        plates, _ = detection
+        deadline = frame.context.get('deadline')
+        if self.executor is not None and len(plates) > 1:
+            return list(self.executor.map(self._segment_plate, plates,
+                                          [deadline] * len(plates)))
+        return [self._segment_plate(plate, deadline) for plate in plates]
+
+    def _recognition(self, frame, segmentation):
+        """
+        Nhận dạng ký tự của mọi biển số trong khung hình bằng một lần gọi KNN
+
+        Returns:
+            readings: Mỗi biển số một phần tử (plate_text, agreement, distance),
+                      None nếu không đọc được
+        """
+        char_imgs = []
+        for segmented in segmentation:
+            if segmented is not None:
+                _, first_line_chars, second_line_chars = segmented
+                char_imgs += [char[4] for char in first_line_chars + second_line_chars]
+        if len(char_imgs) == 0:
+            return [None] * len(segmentation)
+
+        try:
+            samples = self.recognizer.flatten_characters(char_imgs)
+            results = self.classifier.classify_with_confidence(samples)
+        except Exception as e:
+            # Một ký tự lỗi không được làm mất kết quả của các biển số khác
+            print(f"Error processing plates, retrying one plate at a time: {e}")
+            return [self._recognize_plate(segmented) for segmented in segmentation]
+
+        readings = []
+        start = 0
+        for segmented in segmentation:
+            if segmented is None:
+                readings.append(None)
+                continue
+            _, first_line_chars, second_line_chars = segmented
+            end = start + len(first_line_chars) + len(second_line_chars)
+            readings.append(self._reading(segmented, results[start:end]))
+            start = end
+        return readings
+
+    def _recognize_plate(self, segmented):
+        """Nhận dạng ký tự của một biển số (khi nhận dạng cả khung hình bị lỗi)"""
+        if segmented is None:
+            return None
+        _, first_line_chars, second_line_chars = segmented
+        char_imgs = [char[4] for char in first_line_chars + second_line_chars]
+        if len(char_imgs) == 0:
+            return None
+        try:
+            samples = self.recognizer.flatten_characters(char_imgs)
+            results = self.classifier.classify_with_confidence(samples)
+        except Exception as e:
+            print(f"Error processing plate: {e}")
+            return None
+        return self._reading(segmented, results)
+
+    def _reading(self, segmented, results):
+        """
+        Ghép kết quả nhận dạng các ký tự của một biển số
+
+        Returns:
+            reading: (plate_text, agreement, distance), None nếu không đọc được
+        """
+        _, first_line_chars, _ = segmented
+        split = len(first_line_chars)
+        characters = [character for character, _, _ in results]
+        plate_text = self.recognizer.format_plate(
+            "".join(characters[:split]), "".join(characters[split:])
+        )
+        if not plate_text:
+            return None
+        return (
+            plate_text,
+            min(agreement for _, agreement, _ in results),
+            max(distance for _, _, distance in results)
+        )
@@ -0,0 +1,197 @@
+"""
+Stage Graph Module
+Đồ thị các bước xử lý có tên, tính lười (lazy) và ghi nhớ kết quả theo từng
+khung hình
+"""
+
+import time
+
+
+class Stage:
+    """Một bước xử lý: hàm, các bước đầu vào và tham số"""
+
+    def __init__(self, name, fn, inputs=(), params=None):
+        """
+        Args:
+            name: Tên bước
+            fn: Hàm fn(frame, *input_values) -> output
+            inputs: Tên các bước (hoặc nguồn) đầu vào
+            params: Hàm trả về tuple tham số hiện tại của bước (tùy chọn)
+        """
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.params = params
+
+    def current_params(self):
+        """Tuple tham số hiện tại (đọc lại mỗi lần gọi)"""
+        return tuple(self.params()) if self.params is not None else ()
+
+
+class StageGraph:
+    """
+    Đồ thị stage: mỗi stage có tên, phụ thuộc vào các stage hoặc nguồn khác
+
+    Nguồn (source) là dữ liệu đầu vào của khung hình (ví dụ ảnh, mask).
+    """
+
+    def __init__(self):
+        self._sources = []
+        self._stages = {}
+
+    def add_source(self, name):
+        """Khai báo một nguồn dữ liệu đầu vào"""
+        if name in self._stages or name in self._sources:
+            raise ValueError(f"Duplicate stage name '{name}'")
+        self._sources.append(name)
+
+    def add_stage(self, name, fn, inputs=(), params=None):
+        """
+        Thêm một stage (các đầu vào phải được khai báo trước)
+
+        Args:
+            name: Tên stage
+            fn: Hàm fn(frame, *input_values) -> output
+            inputs: Tên các stage / nguồn đầu vào
+            params: Hàm trả về tuple tham số của stage (tùy chọn)
+        """
+        if name in self._stages or name in self._sources:
+            raise ValueError(f"Duplicate stage name '{name}'")
+        for input_name in inputs:
+            if input_name not in self._stages and input_name not in self._sources:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{input_name}'")
+        self._stages[name] = Stage(name, fn, inputs, params)
+
+    @property
+    def sources(self):
+        """Tên các nguồn"""
+        return tuple(self._sources)
+
+    @property
+    def stage_names(self):
+        """Tên các stage theo thứ tự khai báo (thứ tự topo)"""
+        return tuple(self._stages)
+
+    def stage(self, name):
+        """Stage theo tên"""
+        return self._stages[name]
+
+    def upstream(self, name):
+        """
+        Các stage mà stage name phụ thuộc (trực tiếp hoặc gián tiếp), kể cả chính nó
+
+        Returns:
+            names: Tập tên stage
+        """
+        names = set()
+        stack = [name]
+        while stack:
+            current = stack.pop()
+            if current in names or current not in self._stages:
+                continue
+            names.add(current)
+            stack.extend(self._stages[current].inputs)
+        return names
+
+    def signature(self, name):
+        """
+        Chữ ký tham số của stage: tham số của stage và của mọi stage phía trên
+
+        Hai cấu hình có cùng chữ ký cho một stage sẽ cho cùng kết quả với cùng
+        đầu vào, nên kết quả có thể dùng lại.
+
+        Returns:
+            signature: Tuple hashable
+        """
+        if name in self._sources:
+            return (name,)
+        stage = self._stages[name]
+        return (name, stage.current_params()) + tuple(
+            self.signature(input_name) for input_name in stage.inputs
+        )
+
+    def frame(self, context=None, cache=None, **sources):
+        """
+        Tạo khung hình mới để tính các stage
+
+        Args:
+            context: Dữ liệu dùng chung cho các stage (ví dụ arena). Khi có
+                     context['deadline'], thời hạn được kiểm tra trước mỗi stage
+            cache: Dict {signature: (value, seconds)} dùng chung giữa các khung
+                   hình của CÙNG một đầu vào với tham số khác nhau (tùy chọn).
+                   Stage có chữ ký đã có trong cache không được tính lại
+            **sources: Giá trị các nguồn
+
+        Returns:
+            frame: StageFrame
+        """
+        missing = [name for name in self._sources if name not in sources]
+        if missing:
+            raise ValueError(f"Missing sources: {missing}")
+        return StageFrame(self, sources, context, cache)
+
+
+class StageFrame:
+    """
+    Kết quả các stage của một khung hình, chỉ tính khi được yêu cầu và
+    chỉ tính một lần
+    """
+
+    def __init__(self, graph, sources, context=None, cache=None):
+        self.graph = graph
+        self.context = context if context is not None else {}
+        self.cache = cache
+        self.values = dict(sources)
+        # Thời gian tính riêng của từng stage (giây, không gồm các stage đầu vào);
+        # với stage lấy từ cache là thời gian của lần tính ban đầu
+        self.timings = {}
+        # Các stage lấy từ cache
+        self.cache_hits = set()
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def __contains__(self, name):
+        """Stage đã được tính (hoặc gán sẵn) hay chưa"""
+        return name in self.values
+
+    def get(self, name):
+        """
+        Kết quả của stage, tính các stage đầu vào nếu cần
+
+        Args:
+            name: Tên stage
+
+        Returns:
+            value: Kết quả của stage
+        """
+        if name in self.values:
+            return self.values[name]
+
+        key = self.graph.signature(name) if self.cache is not None else None
+        if key is not None and key in self.cache:
+            value, seconds = self.cache[key]
+            self.cache_hits.add(name)
+        else:
+            stage = self.graph.stage(name)
+            args = [self.get(input_name) for input_name in stage.inputs]
+            # Hết thời hạn thì dừng giữa các stage (context['deadline'] là Deadline)
+            deadline = self.context.get('deadline')
+            if deadline is not None:
+                deadline.check(name)
+            start = time.perf_counter()
+            value = stage.fn(self, *args)
+            seconds = time.perf_counter() - start
+            if key is not None:
+                self.cache[key] = (value, seconds)
+
+        self.timings[name] = seconds
+        self.values[name] = value
+        return value
+
+    def preset(self, name, value):
+        """
+        Gán sẵn kết quả của một stage (ví dụ từ bộ phát hiện khác hoặc từ cache);
+        các stage phía trên sẽ không được tính nếu không cần
+        """
+        self.values[name] = value
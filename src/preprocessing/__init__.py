@@ -3,6 +3,9 @@ Module xử lý ảnh trước khi nhận dạng biển số
 """
 
 from .image_preprocessor import ImagePreprocessor
+from .roi import RegionOfInterest, load_roi_config
+from .frame_dedup import FrameDeduplicator, dhash, hamming_distance, load_dedup_config
 
-__all__ = ['ImagePreprocessor']
+__all__ = ['ImagePreprocessor', 'RegionOfInterest', 'load_roi_config',
+           'FrameDeduplicator', 'dhash', 'hamming_distance', 'load_dedup_config']
 
@@ -0,0 +1,173 @@
+"""
+Frame Deduplication Module
+Bỏ qua khung hình gần như trùng với khung hình vừa xử lý của cùng nguồn
+(camera cố định: các khung hình liên tiếp chỉ khác nhau bởi nhiễu cảm biến).
+
+Mỗi khung hình (vùng quan tâm của camera nếu có) được tính một perceptual hash
+(dHash) trên ảnh grayscale thu nhỏ; khung hình có khoảng cách Hamming tới hash
+của khung hình xử lý gần nhất không vượt ngưỡng của camera thì dùng lại kết quả
+của khung hình đó. Khung hình khác độ phân giải với khung hình tham chiếu không
+bao giờ bị coi là trùng.
+
+Hash mặc định là 64x64 bit: một biển số chỉ chiếm vài phần trăm khung hình,
+với hash 8x8 biển số nằm gọn trong một hai ô nên xe khác dừng đúng chỗ xe cũ
+(hoặc xe mới vào cảnh trống) chỉ đổi vài bit, không phân biệt được với nhiễu.
+"""
+
+import json
+import os
+
+import cv2
+import numpy as np
+
+
+def dhash(img, hash_size=8, margin=3):
+    """
+    Difference hash: so sánh độ sáng các pixel kề nhau theo chiều ngang trên
+    ảnh thu nhỏ về (hash_size + 1) x hash_size
+
+    Args:
+        img: Ảnh BGR hoặc grayscale
+        hash_size: Số bit mỗi chiều (hash có hash_size^2 bit)
+        margin: Chênh lệch tối thiểu (mức xám) để bit là 1; vùng phẳng (bầu
+                trời, mặt đường) cho bit 0 ổn định thay vì lật theo nhiễu (ô
+                của hash lớn ít pixel hơn nên nhiễu còn lại nhiều hơn)
+
+    Returns:
+        hash: Số nguyên hash_size^2 bit
+    """
+    # Thu nhỏ trước (INTER_AREA lấy trung bình nên nhiễu cảm biến gần như mất)
+    small = cv2.resize(img, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    small = small.astype(np.int16)
+    bits = ((small[:, 1:] - small[:, :-1]) > margin).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distance(hash_a, hash_b):
+    """Số bit khác nhau giữa hai hash"""
+    return bin(hash_a ^ hash_b).count('1')
+
+
+class FrameDeduplicator:
+    """Nhớ hash và kết quả của khung hình xử lý gần nhất theo từng nguồn (camera)"""
+
+    # Tham số mặc định
+    THRESHOLD = 1
+    HASH_SIZE = 64
+
+    def __init__(self, threshold=1, thresholds=None, hash_size=64):
+        """
+        Khởi tạo FrameDeduplicator
+
+        Args:
+            threshold: Khoảng cách Hamming tối đa để coi là trùng (mặc định cho
+                       mọi camera); None = không bỏ qua khung hình nào
+            thresholds: Dictionary {camera_id: threshold} ghi đè ngưỡng theo
+                        camera (None = tắt cho camera đó)
+            hash_size: Kích thước dHash (hash có hash_size^2 bit)
+        """
+        self.THRESHOLD = threshold
+        self.HASH_SIZE = hash_size
+        self.thresholds = {str(camera): value for camera, value in (thresholds or {}).items()}
+
+        # source -> ((shape, hash), result) của khung hình xử lý gần nhất
+        self._last = {}
+        # source -> {'frames': n, 'skipped': n}
+        self._stats = {}
+
+    def threshold_for(self, source):
+        """Ngưỡng của nguồn (None nếu tắt)"""
+        return self.thresholds.get(str(source), self.THRESHOLD)
+
+    def check(self, source, img):
+        """
+        Kiểm tra khung hình có trùng với khung hình xử lý gần nhất của nguồn
+
+        Args:
+            source: Mã nguồn (camera_id, có thể là None)
+            img: Khung hình (hoặc vùng quan tâm đã cắt của camera)
+
+        Returns:
+            signature: (kích thước, hash) của khung hình (truyền lại cho update)
+            previous: Kết quả của khung hình trùng, None nếu phải xử lý
+        """
+        key = str(source)
+        stats = self._stats.setdefault(key, {'frames': 0, 'skipped': 0})
+        stats['frames'] += 1
+
+        signature = (img.shape[:2], dhash(img, self.HASH_SIZE))
+        threshold = self.threshold_for(source)
+        last = self._last.get(key)
+        if threshold is None or last is None:
+            return signature, None
+
+        (last_shape, last_hash), result = last
+        if last_shape != signature[0] or hamming_distance(signature[1], last_hash) > threshold:
+            return signature, None
+        stats['skipped'] += 1
+        return signature, result
+
+    def update(self, source, signature, result):
+        """Ghi nhận khung hình vừa xử lý (khung hình tham chiếu mới của nguồn)"""
+        self._last[str(source)] = (signature, result)
+
+    def skip_rate(self, source=None):
+        """Tỷ lệ khung hình bị bỏ qua của một nguồn, hoặc của mọi nguồn"""
+        if source is None:
+            stats = self._stats.values()
+        else:
+            stats = [self._stats.get(str(source), {'frames': 0, 'skipped': 0})]
+        frames = sum(entry['frames'] for entry in stats)
+        skipped = sum(entry['skipped'] for entry in stats)
+        return skipped / frames if frames else 0.0
+
+    def stats(self):
+        """
+        Thống kê theo nguồn
+
+        Returns:
+            stats: Dictionary {source: {'frames', 'skipped', 'skip_rate', 'threshold'}}
+        """
+        return {
+            source: {
+                'frames': entry['frames'],
+                'skipped': entry['skipped'],
+                'skip_rate': entry['skipped'] / entry['frames'] if entry['frames'] else 0.0,
+                'threshold': self.threshold_for(source)
+            }
+            for source, entry in self._stats.items()
+        }
+
+
+def load_dedup_config(config_path):
+    """
+    Đọc ngưỡng bỏ qua khung hình trùng theo camera từ file JSON
+
+    Định dạng file (null = tắt cho camera đó)::
+
+        {
+          "cam01": 2,
+          "cam02": 0,
+          "cam03": null
+        }
+
+    Args:
+        config_path: Đường dẫn file cấu hình
+
+    Returns:
+        thresholds: Dictionary {camera_id: threshold}
+    """
+    if not os.path.exists(config_path):
+        raise FileNotFoundError(f"Dedup config not found: {config_path}")
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    thresholds = {}
+    for camera_id, threshold in data.items():
+        if threshold is not None and (not isinstance(threshold, int) or threshold < 0):
+            raise ValueError(f"Invalid dedup threshold for '{camera_id}': {threshold}")
+        thresholds[str(camera_id)] = threshold
+    return thresholds
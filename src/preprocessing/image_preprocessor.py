@@ -6,6 +6,8 @@ Xử lý ảnh: chuyển đổi màu, tăng độ tương phản, làm mịn, nh
 import cv2
 import numpy as np
 
+from ..utils.buffer_arena import arena_buffer
+
 
 class ImagePreprocessor:
     """Class xử lý ảnh trước khi nhận dạng biển số"""
@@ -36,26 +38,49 @@ class ImagePreprocessor:
         self.ADAPTIVE_THRESH_WEIGHT = adaptive_weight
         self.MORPHOLOGY_ITERATIONS = morphology_iterations
     
-    def extract_value(self, img_original):
+    def extract_value(self, img_original, arena=None):
         """
-        Chuyển đổi ảnh BGR sang HSV và trích xuất kênh Value (độ sáng)
+        Trích xuất kênh Value (độ sáng) của HSV
+        
+        Với ảnh 8-bit, V = max(B, G, R) nên được tính trực tiếp trên các kênh
+        màu (view, không tách kênh ra ảnh riêng), không cần chuyển đổi toàn bộ
+        sang HSV. Ảnh đã là grayscale (ví dụ camera hồng ngoại) được dùng luôn
+        vì V = giá trị xám.
         
         Args:
-            img_original: Ảnh gốc (BGR)
+            img_original: Ảnh gốc (BGR, BGRA hoặc grayscale)
+            arena: FrameBufferArena để dùng lại buffer (tùy chọn)
             
         Returns:
             img_value: Ảnh grayscale từ kênh Value của HSV
+            
+        Raises:
+            ValueError: Số kênh không phải 1, 3 hoặc 4
         """
-        img_hsv = cv2.cvtColor(img_original, cv2.COLOR_BGR2HSV)
-        _, _, img_value = cv2.split(img_hsv)
+        if img_original.ndim == 2:
+            return img_original
+        
+        num_channels = img_original.shape[2]
+        if num_channels == 1:
+            return img_original[:, :, 0]
+        if num_channels not in (3, 4):
+            raise ValueError(f"Expected 1, 3 or 4 channels, got {num_channels}")
+        
+        # V = max(B, G, R) (bỏ qua kênh alpha nếu có)
+        img_value = np.maximum(
+            img_original[:, :, 0], img_original[:, :, 1],
+            out=arena_buffer(arena, 'value', img_original[:, :, 0])
+        )
+        np.maximum(img_value, img_original[:, :, 2], out=img_value)
         return img_value
     
-    def maximize_contrast(self, img_grayscale):
+    def maximize_contrast(self, img_grayscale, arena=None):
         """
         Tăng độ tương phản bằng Top Hat và Black Hat morphology
         
         Args:
             img_grayscale: Ảnh grayscale
+            arena: FrameBufferArena để dùng lại buffer (tùy chọn)
             
         Returns:
             img_enhanced: Ảnh đã tăng độ tương phản
@@ -70,6 +95,7 @@ class ImagePreprocessor:
             img_grayscale, 
             cv2.MORPH_TOPHAT, 
             structuring_element, 
+            dst=arena_buffer(arena, 'top_hat', img_grayscale),
             iterations=self.MORPHOLOGY_ITERATIONS
         )
         
@@ -78,49 +104,86 @@ class ImagePreprocessor:
             img_grayscale, 
             cv2.MORPH_BLACKHAT, 
             structuring_element, 
+            dst=arena_buffer(arena, 'black_hat', img_grayscale),
             iterations=self.MORPHOLOGY_ITERATIONS
         )
         
         # Kết hợp: img + TopHat - BlackHat
-        img_plus_top_hat = cv2.add(img_grayscale, img_top_hat)
-        img_enhanced = cv2.subtract(img_plus_top_hat, img_black_hat)
+        img_plus_top_hat = cv2.add(
+            img_grayscale, img_top_hat,
+            dst=arena_buffer(arena, 'plus_top_hat', img_grayscale)
+        )
+        img_enhanced = cv2.subtract(
+            img_plus_top_hat, img_black_hat,
+            dst=arena_buffer(arena, 'contrast', img_grayscale)
+        )
         
         return img_enhanced
     
-    def preprocess(self, img_original):
+    def blur(self, img_grayscale, arena=None):
+        """
+        Làm mịn bằng Gaussian blur
+        
+        Args:
+            img_grayscale: Ảnh grayscale
+            arena: FrameBufferArena để dùng lại buffer (tùy chọn)
+            
+        Returns:
+            img_blurred: Ảnh đã làm mịn
+        """
+        return cv2.GaussianBlur(
+            img_grayscale, 
+            self.GAUSSIAN_SMOOTH_FILTER_SIZE, 
+            0,
+            dst=arena_buffer(arena, 'blurred', img_grayscale)
+        )
+    
+    def threshold(self, img_blurred, arena=None):
+        """
+        Nhị phân hóa bằng Adaptive Threshold
+        
+        Args:
+            img_blurred: Ảnh đã làm mịn
+            arena: FrameBufferArena để dùng lại buffer (tùy chọn)
+            
+        Returns:
+            img_thresh: Ảnh nhị phân
+        """
+        return cv2.adaptiveThreshold(
+            img_blurred,
+            255.0,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY_INV,
+            self.ADAPTIVE_THRESH_BLOCK_SIZE,
+            self.ADAPTIVE_THRESH_WEIGHT,
+            dst=arena_buffer(arena, 'threshold', img_blurred)
+        )
+    
+    def preprocess(self, img_original, arena=None):
         """
         Xử lý ảnh đầy đủ: chuyển đổi màu, tăng độ tương phản, 
         làm mịn, nhị phân hóa
         
         Args:
             img_original: Ảnh gốc (BGR)
+            arena: FrameBufferArena để dùng lại buffer (tùy chọn). Khi dùng arena,
+                   ảnh trả về sẽ bị ghi đè ở lần gọi kế tiếp
             
         Returns:
             img_grayscale: Ảnh grayscale
             img_thresh: Ảnh nhị phân
         """
         # Bước 1: Chuyển đổi sang HSV và trích xuất Value
-        img_grayscale = self.extract_value(img_original)
+        img_grayscale = self.extract_value(img_original, arena)
         
         # Bước 2: Tăng độ tương phản
-        img_max_contrast = self.maximize_contrast(img_grayscale)
+        img_max_contrast = self.maximize_contrast(img_grayscale, arena)
         
         # Bước 3: Làm mịn bằng Gaussian blur
-        img_blurred = cv2.GaussianBlur(
-            img_max_contrast, 
-            self.GAUSSIAN_SMOOTH_FILTER_SIZE, 
-            0
-        )
+        img_blurred = self.blur(img_max_contrast, arena)
         
         # Bước 4: Nhị phân hóa bằng Adaptive Threshold
-        img_thresh = cv2.adaptiveThreshold(
-            img_blurred,
-            255.0,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY_INV,
-            self.ADAPTIVE_THRESH_BLOCK_SIZE,
-            self.ADAPTIVE_THRESH_WEIGHT
-        )
+        img_thresh = self.threshold(img_blurred, arena)
         
         return img_grayscale, img_thresh
 
@@ -0,0 +1,192 @@
+"""
+Region of Interest Module
+Vùng quan tâm (ROI) theo từng camera: chỉ xử lý phần ảnh có thể chứa biển số
+"""
+
+import json
+import os
+
+import cv2
+import numpy as np
+
+
+class RegionOfInterest:
+    """Class mô tả vùng quan tâm gồm các đa giác và hình chữ nhật"""
+
+    def __init__(self, polygons=None, rectangles=None):
+        """
+        Khởi tạo RegionOfInterest
+
+        Tọa độ tính theo ảnh đã resize về kích thước chuẩn (Config.TARGET_IMAGE_SIZE).
+
+        Args:
+            polygons: Danh sách đa giác, mỗi đa giác là danh sách đỉnh [[x, y], ...]
+            rectangles: Danh sách hình chữ nhật [x, y, w, h]
+        """
+        self.polygons = []
+        for polygon in polygons or []:
+            points = np.array(polygon, dtype=np.int32).reshape(-1, 2)
+            if len(points) < 3:
+                raise ValueError(f"Polygon needs at least 3 points: {polygon}")
+            self.polygons.append(points)
+
+        for rect in rectangles or []:
+            if len(rect) != 4:
+                raise ValueError(f"Rectangle must be [x, y, w, h]: {rect}")
+            x, y, w, h = [int(v) for v in rect]
+            if w < 1 or h < 1:
+                raise ValueError(f"Rectangle must have positive size: {rect}")
+            # Đỉnh là pixel (boundingRect / fillPoly tính cả đỉnh) nên góc dưới
+            # phải là (x + w - 1, y + h - 1): vùng cắt đúng w x h
+            x1, y1 = x + w - 1, y + h - 1
+            self.polygons.append(np.array(
+                [[x, y], [x1, y], [x1, y1], [x, y1]],
+                dtype=np.int32
+            ))
+
+        if len(self.polygons) == 0:
+            raise ValueError("ROI must contain at least one polygon or rectangle")
+
+        # Hình chữ nhật bao được tính một lần (x, y, w, h)
+        all_points = np.concatenate(self.polygons)
+        self._bounding_rect = cv2.boundingRect(all_points)
+
+        # ROI chỉ là một hình chữ nhật thì không cần mask
+        x, y, w, h = self._bounding_rect
+        self.is_rectangle = (
+            len(self.polygons) == 1 and
+            cv2.contourArea(self.polygons[0]) >= (w - 1) * (h - 1)
+        )
+
+        # Mask theo kích thước crop, chỉ tạo lại khi kích thước ảnh thay đổi
+        self._mask = None
+        self._mask_key = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Tạo ROI từ dictionary cấu hình
+
+        Args:
+            data: {'polygons': [...], 'rectangles': [...]}
+
+        Returns:
+            roi: RegionOfInterest
+        """
+        return cls(polygons=data.get('polygons'), rectangles=data.get('rectangles'))
+
+    def scaled(self, fx, fy):
+        """
+        ROI tương ứng trên ảnh được phóng to / thu nhỏ
+
+        Args:
+            fx: Tỷ lệ theo chiều ngang
+            fy: Tỷ lệ theo chiều dọc
+
+        Returns:
+            roi: RegionOfInterest mới
+        """
+        scale = np.array([fx, fy], dtype=np.float64)
+        return RegionOfInterest(polygons=[
+            np.round(polygon * scale).astype(np.int32).tolist()
+            for polygon in self.polygons
+        ])
+
+    def bounding_rect(self, image_shape):
+        """
+        Hình chữ nhật bao của ROI, đã cắt theo biên ảnh
+
+        Args:
+            image_shape: Shape của ảnh (height, width, ...)
+
+        Returns:
+            (x, y, w, h): Hình chữ nhật bao (w, h có thể bằng 0 nếu ROI nằm ngoài ảnh)
+        """
+        height, width = image_shape[:2]
+        x, y, w, h = self._bounding_rect
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, width), min(y + h, height)
+        return x0, y0, max(x1 - x0, 0), max(y1 - y0, 0)
+
+    def crop(self, img):
+        """
+        Cắt ảnh theo hình chữ nhật bao của ROI
+
+        Args:
+            img: Ảnh đầy đủ
+
+        Returns:
+            img_crop: Vùng ảnh đã cắt (view, không copy)
+            offset: Tọa độ (x, y) góc trên trái của vùng cắt trong ảnh đầy đủ
+        """
+        x, y, w, h = self.bounding_rect(img.shape)
+        return img[y:y + h, x:x + w], (x, y)
+
+    def get_mask(self, crop_shape, offset):
+        """
+        Mask nhị phân của ROI theo tọa độ vùng cắt (None nếu ROI là hình chữ nhật)
+
+        Args:
+            crop_shape: Shape của vùng cắt
+            offset: Tọa độ (x, y) của vùng cắt trong ảnh đầy đủ
+
+        Returns:
+            mask: Ảnh uint8, 255 bên trong ROI và 0 bên ngoài
+        """
+        if self.is_rectangle:
+            return None
+
+        key = (tuple(crop_shape[:2]), tuple(offset))
+        if self._mask_key != key:
+            mask = np.zeros(crop_shape[:2], np.uint8)
+            shifted = [p - np.array(offset, dtype=np.int32) for p in self.polygons]
+            cv2.fillPoly(mask, shifted, 255)
+            self._mask = mask
+            self._mask_key = key
+        return self._mask
+
+    @staticmethod
+    def to_frame_coordinates(contours, offset):
+        """
+        Chuyển contour từ tọa độ vùng cắt về tọa độ ảnh đầy đủ
+
+        Args:
+            contours: Danh sách contour trong vùng cắt
+            offset: Tọa độ (x, y) của vùng cắt
+
+        Returns:
+            contours: Danh sách contour mới trong tọa độ ảnh đầy đủ
+        """
+        if offset == (0, 0):
+            return list(contours)
+        shift = np.array(offset, dtype=np.int32).reshape(1, 1, 2)
+        return [contour + shift for contour in contours]
+
+
+def load_roi_config(config_path):
+    """
+    Đọc cấu hình ROI theo camera từ file JSON
+
+    Định dạng file::
+
+        {
+          "cam01": {"rectangles": [[600, 400, 900, 600]]},
+          "cam02": {"polygons": [[[100, 500], [1800, 450], [1850, 1000], [50, 1050]]]}
+        }
+
+    Args:
+        config_path: Đường dẫn file cấu hình
+
+    Returns:
+        rois: Dictionary {camera_id: RegionOfInterest}
+    """
+    if not os.path.exists(config_path):
+        raise FileNotFoundError(f"ROI config not found: {config_path}")
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    return {
+        str(camera_id): RegionOfInterest.from_dict(entry)
+        for camera_id, entry in data.items()
+    }
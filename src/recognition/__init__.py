@@ -4,6 +4,17 @@ Module nhận dạng ký tự trên biển số
 
 from .character_segmenter import CharacterSegmenter
 from .character_recognizer import CharacterRecognizer
+from .micro_batcher import MicroBatchClassifier
+from .binary_knn import BinaryKNearest
+from .features import (
+    FeatureExtractor, ZoningFeatures, HOGFeatures, PCAFeatures, create_feature_extractor
+)
+from .condensation import condense_training_set, save_model, load_model_samples, split_held_out
+from .glyph_store import GlyphStore
+from .dataset_builder import build_glyph_dataset
 
-__all__ = ['CharacterSegmenter', 'CharacterRecognizer']
+__all__ = ['CharacterSegmenter', 'CharacterRecognizer', 'MicroBatchClassifier',
+           'BinaryKNearest', 'FeatureExtractor', 'ZoningFeatures', 'HOGFeatures',
+           'PCAFeatures', 'create_feature_extractor', 'condense_training_set', 'save_model',
+           'load_model_samples', 'split_held_out', 'GlyphStore', 'build_glyph_dataset']
 
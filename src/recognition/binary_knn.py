@@ -0,0 +1,156 @@
+"""
+Binary KNN Module
+KNN trên ký tự nhị phân nén bit (20x30 -> 75 bytes), khoảng cách Hamming
+tính bằng XOR + popcount
+"""
+
+import numpy as np
+
+
+if hasattr(np, 'bitwise_count'):
+    _popcount = np.bitwise_count
+else:  # NumPy < 2.0: tra bảng 256 phần tử
+    _POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values):
+        return _POPCOUNT_TABLE[values]
+
+
+class BinaryKNearest:
+    """
+    KNN trên ký tự nhị phân
+
+    Mỗi mẫu chỉ tốn 75 bytes thay vì 600 float32 (2400 bytes) nên model nhỏ
+    hơn 32 lần và nằm gọn trong cache CPU.
+    """
+
+    # Tham số mặc định
+    THRESHOLD = 127
+    # Giới hạn bộ nhớ tạm cho ma trận XOR (bytes)
+    CHUNK_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, threshold=127):
+        """
+        Khởi tạo BinaryKNearest
+
+        Args:
+            threshold: Ngưỡng nhị phân hóa pixel (0-255)
+        """
+        self.THRESHOLD = threshold
+        self.packed = None
+        self.labels = None
+
+    def pack(self, samples):
+        """
+        Nhị phân hóa và nén bit các mẫu
+
+        Args:
+            samples: Ma trận (N, 600) giá trị pixel 0-255
+
+        Returns:
+            packed: Ma trận uint8 (N, 75)
+        """
+        samples = np.asarray(samples)
+        return np.packbits(samples > self.THRESHOLD, axis=1)
+
+    def train(self, samples, labels):
+        """
+        "Huấn luyện" model: nén bit các mẫu
+
+        Args:
+            samples: Ma trận (N, 600) giá trị pixel 0-255
+            labels: Nhãn (mã ASCII), N phần tử
+        """
+        self.packed = self.pack(samples)
+        self.labels = np.asarray(labels, dtype=np.float32).reshape(-1)
+
+    @property
+    def nbytes(self):
+        """Bộ nhớ của model (bytes)"""
+        if self.packed is None:
+            return 0
+        return self.packed.nbytes + self.labels.nbytes
+
+    def save(self, path):
+        """
+        Lưu model nén (.npz)
+
+        Args:
+            path: Đường dẫn file
+        """
+        np.savez(path, packed=self.packed, labels=self.labels,
+                 threshold=np.array(self.THRESHOLD))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Tải model nén đã lưu bằng save()
+
+        Args:
+            path: Đường dẫn file .npz
+
+        Returns:
+            model: BinaryKNearest
+        """
+        with np.load(path) as data:
+            model = cls(threshold=int(data['threshold']))
+            model.packed = data['packed']
+            model.labels = data['labels']
+        return model
+
+    def hamming_distances(self, packed):
+        """
+        Khoảng cách Hamming tới mọi mẫu huấn luyện
+
+        Args:
+            packed: Ma trận uint8 (N, 75)
+
+        Returns:
+            distances: Ma trận uint16 (N, số mẫu huấn luyện)
+        """
+        count, width = self.packed.shape
+        distances = np.empty((len(packed), count), dtype=np.uint16)
+
+        # Chia theo lô để ma trận XOR (lô, số mẫu, 75) không quá CHUNK_BYTES
+        step = max(1, self.CHUNK_BYTES // max(1, count * width))
+        for start in range(0, len(packed), step):
+            chunk = packed[start:start + step]
+            xor = np.bitwise_xor(chunk[:, None, :], self.packed[None, :, :])
+            distances[start:start + step] = _popcount(xor).sum(axis=2, dtype=np.uint16)
+        return distances
+
+    def find_nearest(self, samples, k=3):
+        """
+        Nhận dạng bằng bỏ phiếu đa số trong k láng giềng gần nhất
+
+        Khi hòa phiếu, chọn nhãn có láng giềng gần nhất.
+
+        Args:
+            samples: Ma trận (N, 600) giá trị pixel 0-255
+            k: Số láng giềng
+
+        Returns:
+            results: Nhãn được chọn, float32 (N, 1)
+            neighbor_responses: Nhãn của k láng giềng, float32 (N, k)
+            distances: Khoảng cách Hamming của k láng giềng, float32 (N, k)
+        """
+        if self.packed is None:
+            raise ValueError("Model not trained. Call train() first.")
+
+        k = min(k, len(self.packed))
+        distances = self.hamming_distances(self.pack(samples))
+
+        # k láng giềng gần nhất, sắp theo (khoảng cách, thứ tự mẫu)
+        nearest = np.argsort(distances, axis=1, kind='stable')[:, :k]
+        neighbor_distances = np.take_along_axis(distances, nearest, axis=1)
+        neighbor_responses = self.labels[nearest]
+
+        # Bỏ phiếu: đếm số phiếu của nhãn tại từng vị trí, vị trí đầu tiên có
+        # số phiếu lớn nhất là nhãn gần nhất trong các nhãn hòa
+        votes = (neighbor_responses[:, :, None] == neighbor_responses[:, None, :]).sum(axis=2)
+        winner = np.argmax(votes, axis=1)
+        results = neighbor_responses[np.arange(len(nearest)), winner].reshape(-1, 1)
+
+        return (results.astype(np.float32),
+                neighbor_responses.astype(np.float32),
+                neighbor_distances.astype(np.float32))
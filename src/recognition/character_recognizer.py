@@ -6,6 +6,12 @@ Nhận dạng ký tự sử dụng KNN
 import cv2
 import numpy as np
 import os
+import threading
+from collections import OrderedDict
+
+from .binary_knn import BinaryKNearest
+from .features import create_feature_extractor
+from .glyph_store import GlyphStore
 
 
 class CharacterRecognizer:
@@ -15,12 +21,19 @@ class CharacterRecognizer:
     RESIZED_IMAGE_WIDTH = 20
     RESIZED_IMAGE_HEIGHT = 30
     K_NEIGHBORS = 3
+    GLYPH_THRESHOLD = 127
+    MODEL_TYPES = ('float', 'binary')
     
     def __init__(self, 
                  model_path="models",
                  classifications_file="classifications.txt",
                  flattened_images_file="flattened_images.txt",
-                 k_neighbors=3):
+                 k_neighbors=3,
+                 cache_size=0,
+                 model_type="float",
+                 features="pixels",
+                 features_file=None,
+                 glyph_store=None):
         """
         Khởi tạo CharacterRecognizer
         
@@ -29,38 +42,242 @@ class CharacterRecognizer:
             classifications_file: Tên file classifications
             flattened_images_file: Tên file flattened images
             k_neighbors: Số láng giềng gần nhất cho KNN
+            cache_size: Số ký tự tối đa trong cache LRU, 0 = tắt cache
+            model_type: 'float' (cv2.ml.KNearest, khoảng cách Euclid) hoặc
+                        'binary' (BinaryKNearest, khoảng cách Hamming)
+            features: Đặc trưng cho KNN float: 'pixels', 'zoning', 'hog' hoặc 'pca'
+            features_file: File tham số đặc trưng đã fit offline trong model_path
+                           (ví dụ PCA .npz); nếu không có thì fit khi tải model
+            glyph_store: Thư mục GlyphStore trong model_path (tùy chọn); khi store
+                         đã có version.json thì được dùng thay cho model text,
+                         kể cả khi store được tạo sau lúc khởi động
         """
+        if model_type not in self.MODEL_TYPES:
+            raise ValueError(
+                f"Unknown model type '{model_type}', expected one of {self.MODEL_TYPES}"
+            )
+        if model_type == 'binary' and features != 'pixels':
+            raise ValueError("Binary model only supports 'pixels' features")
+        
         self.K_NEIGHBORS = k_neighbors
+        self.model_type = model_type
+        self.features = features
+        self.features_file = features_file
+        self.glyph_store = glyph_store
+        self.feature_extractor = None
         self.k_nearest = None
+        
+        # Model hiện tại: (k_nearest, feature_extractor), thay bằng một phép gán
+        # khi tải lại để các thread đang nhận dạng không thấy model dở dang
+        self._model = (None, None)
+        self._model_source = None
+        self._model_signature = None
+        self._model_generation = 0
+        
+        # Cache LRU: ký tự đã nhị phân hóa và nén bit (75 bytes) -> kết quả
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
         self.load_model(model_path, classifications_file, flattened_images_file)
     
     def load_model(self, model_path, classifications_file, flattened_images_file):
         """
         Tải model KNN
         
+        flattened_images_file có thể là:
+        - file text (np.savetxt), đi cùng classifications_file
+        - thư mục GlyphStore (khi đó không cần classifications_file)
+        - file .npz do BinaryKNearest.save tạo ra (chỉ với model_type='binary')
+        
+        Nếu có glyph_store và store đã có version.json thì store được dùng thay
+        cho model text.
+        
+        Model mới được dựng xong rồi mới thay model cũ, nên có thể gọi trong
+        khi các thread khác đang nhận dạng.
+        
         Args:
             model_path: Đường dẫn đến thư mục chứa model
             classifications_file: Tên file classifications
             flattened_images_file: Tên file flattened images
         """
-        class_path = os.path.join(model_path, classifications_file)
-        flat_path = os.path.join(model_path, flattened_images_file)
+        source = (model_path, classifications_file, flattened_images_file)
+        class_path, flat_path = self._model_files(*source)
+        # Đọc chữ ký trước khi đọc dữ liệu: nếu model đổi trong lúc đọc thì
+        # lần kiểm tra sau sẽ tải lại
+        signature = self._read_signature(*source)
+        feature_extractor = None
         
-        if not os.path.exists(class_path) or not os.path.exists(flat_path):
-            raise FileNotFoundError(
-                f"Model files not found: {class_path} or {flat_path}"
-            )
+        if self.model_type == 'binary' and flat_path.endswith('.npz'):
+            if not os.path.exists(flat_path):
+                raise FileNotFoundError(f"Model file not found: {flat_path}")
+            k_nearest = BinaryKNearest.load(flat_path)
+        else:
+            if GlyphStore.is_store(flat_path):
+                npa_flattened_images, npa_classifications = GlyphStore(flat_path).read()
+            elif not os.path.exists(class_path) or not os.path.exists(flat_path):
+                raise FileNotFoundError(
+                    f"Model files not found: {class_path} or {flat_path}"
+                )
+            else:
+                # Load classifications
+                npa_classifications = np.loadtxt(class_path, np.float32)
+                npa_flattened_images = np.loadtxt(flat_path, np.float32)
+            
+            # Reshape
+            npa_classifications = npa_classifications.reshape((npa_classifications.size, 1))
+            
+            # Train KNN
+            feature_extractor = self.load_feature_extractor(model_path, npa_flattened_images)
+            if self.model_type == 'binary':
+                k_nearest = BinaryKNearest(threshold=self.GLYPH_THRESHOLD)
+                k_nearest.train(npa_flattened_images, npa_classifications)
+            else:
+                k_nearest = cv2.ml.KNearest_create()
+                k_nearest.train(
+                    feature_extractor.transform(npa_flattened_images),
+                    cv2.ml.ROW_SAMPLE, npa_classifications
+                )
+        
+        self._model = (k_nearest, feature_extractor)
+        self.k_nearest = k_nearest
+        self.feature_extractor = feature_extractor
+        self._model_source = source
+        self._model_signature = signature
+        
+        # Kết quả cũ không còn đúng với model mới
+        with self._cache_lock:
+            self._model_generation += 1
+            self._cache.clear()
+    
+    def _model_files(self, model_path, classifications_file, flattened_images_file):
+        """
+        Đường dẫn file model: GlyphStore (nếu đã có version.json) thay cho model text
         
-        # Load classifications
-        npa_classifications = np.loadtxt(class_path, np.float32)
-        npa_flattened_images = np.loadtxt(flat_path, np.float32)
+        Returns:
+            class_path, flat_path
+        """
+        if self.glyph_store and not flattened_images_file.endswith('.npz'):
+            store_path = os.path.join(model_path, self.glyph_store)
+            if GlyphStore.is_store(store_path):
+                flattened_images_file = self.glyph_store
+        return (os.path.join(model_path, classifications_file),
+                os.path.join(model_path, flattened_images_file))
+    
+    @staticmethod
+    def _file_signature(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _read_signature(self, model_path, classifications_file, flattened_images_file):
+        """
+        Chữ ký phiên bản model: version của GlyphStore hoặc (mtime, size) của các
+        file model, cùng (mtime, size) của features_file (ví dụ PCA) nếu có
+        """
+        class_path, flat_path = self._model_files(
+            model_path, classifications_file, flattened_images_file
+        )
+        if GlyphStore.is_store(flat_path):
+            signature = ('store', GlyphStore(flat_path).version)
+        else:
+            signature = (self._file_signature(class_path), self._file_signature(flat_path))
+        if self.features_file:
+            features_path = os.path.join(model_path, self.features_file)
+            signature += (self._file_signature(features_path),)
+        return signature
+    
+    @property
+    def signature(self):
+        """Chữ ký phiên bản của model đang dùng (đổi mỗi khi tải model khác)"""
+        return self._model_signature
+    
+    def model_changed(self):
+        """Model trên đĩa (kể cả features_file) có khác model đang dùng hay không"""
+        if self._model_source is None:
+            return False
+        return self._read_signature(*self._model_source) != self._model_signature
+    
+    def reload_if_changed(self):
+        """
+        Tải lại model nếu file model đã thay đổi (không cần khởi động lại)
         
-        # Reshape
-        npa_classifications = npa_classifications.reshape((npa_classifications.size, 1))
+        Nếu tải lỗi (ví dụ file đang được ghi dở) thì giữ model cũ.
         
-        # Train KNN
-        self.k_nearest = cv2.ml.KNearest_create()
-        self.k_nearest.train(npa_flattened_images, cv2.ml.ROW_SAMPLE, npa_classifications)
+        Returns:
+            reloaded: True nếu đã tải model mới
+        """
+        if not self.model_changed():
+            return False
+        try:
+            self.load_model(*self._model_source)
+        except Exception as e:
+            print(f"Error reloading model: {e}")
+            return False
+        return True
+    
+    def load_feature_extractor(self, model_path, training_samples):
+        """
+        Tạo feature extractor: tải tham số đã fit offline nếu có, nếu không
+        thì fit trên tập huấn luyện
+        
+        Args:
+            model_path: Đường dẫn đến thư mục chứa model
+            training_samples: Ma trận mẫu huấn luyện (N, 600)
+            
+        Returns:
+            extractor: FeatureExtractor
+        """
+        extractor = create_feature_extractor(
+            self.features, self.RESIZED_IMAGE_WIDTH, self.RESIZED_IMAGE_HEIGHT
+        )
+        if not extractor.requires_fit:
+            return extractor
+        
+        if self.features_file:
+            features_path = os.path.join(model_path, self.features_file)
+            if os.path.exists(features_path):
+                return type(extractor).load(features_path)
+        return extractor.fit(training_samples)
+    
+    def clear_cache(self):
+        """Xóa cache ký tự (load_model tự xóa cache khi tải model mới)"""
+        with self._cache_lock:
+            self._cache.clear()
+    
+    @property
+    def cache_info(self):
+        """Thống kê cache: {'hits', 'misses', 'size', 'max_size', 'hit_rate'}"""
+        total = self.cache_hits + self.cache_misses
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'size': len(self._cache),
+            'max_size': self.cache_size,
+            'hit_rate': self.cache_hits / total if total else 0.0
+        }
+    
+    def glyph_keys(self, samples):
+        """
+        Khóa cache của các ký tự: ký tự đã chuẩn hóa được nhị phân hóa và nén
+        bit (20x30 -> 75 bytes)
+        
+        Các ký tự có cùng dạng nhị phân được coi là một. Ký tự từ
+        CharacterSegmenter gần như nhị phân nên chỉ khác nhau ở vài pixel viền
+        sau khi resize.
+        
+        Args:
+            samples: Ma trận float32 (N, 600)
+            
+        Returns:
+            keys: Danh sách bytes
+        """
+        packed = np.packbits(samples > self.GLYPH_THRESHOLD, axis=1)
+        return [row.tobytes() for row in packed]
     
     def normalize_character(self, char_img):
         """
@@ -74,6 +291,128 @@ class CharacterRecognizer:
         """
         return cv2.resize(char_img, (self.RESIZED_IMAGE_WIDTH, self.RESIZED_IMAGE_HEIGHT))
     
+    def flatten_characters(self, char_imgs):
+        """
+        Chuẩn hóa và ghép nhiều ký tự thành ma trận mẫu cho KNN
+        
+        Args:
+            char_imgs: Danh sách ảnh ký tự
+            
+        Returns:
+            samples: Ma trận float32 (N, RESIZED_IMAGE_WIDTH * RESIZED_IMAGE_HEIGHT)
+        """
+        size = self.RESIZED_IMAGE_WIDTH * self.RESIZED_IMAGE_HEIGHT
+        samples = np.empty((len(char_imgs), size), dtype=np.float32)
+        for i, char_img in enumerate(char_imgs):
+            samples[i] = self.normalize_character(char_img).reshape(size)
+        return samples
+    
+    def classify_flattened(self, samples):
+        """
+        Nhận dạng nhiều ký tự đã chuẩn hóa bằng một lần gọi KNN
+        
+        Args:
+            samples: Ma trận float32 (N, RESIZED_IMAGE_WIDTH * RESIZED_IMAGE_HEIGHT)
+            
+        Returns:
+            characters: Danh sách ký tự được nhận dạng
+        """
+        return [character for character, _, _ in self.classify_with_confidence(samples)]
+    
+    def classify_with_confidence(self, samples):
+        """
+        Nhận dạng nhiều ký tự đã chuẩn hóa kèm độ tin cậy của KNN
+        
+        Args:
+            samples: Ma trận float32 (N, RESIZED_IMAGE_WIDTH * RESIZED_IMAGE_HEIGHT)
+            
+        Returns:
+            results: Danh sách (character, agreement, distance):
+                     agreement: tỷ lệ láng giềng bỏ phiếu cho ký tự được chọn (0-1]
+                     distance: khoảng cách tới láng giềng gần nhất cùng nhãn
+                               (Euclid bình phương với model float trong không gian
+                               đặc trưng, Hamming với model binary)
+        """
+        if self.k_nearest is None:
+            raise ValueError("Model not loaded. Call load_model() first.")
+        
+        if len(samples) == 0:
+            return []
+        
+        if self.cache_size <= 0:
+            return self._find_nearest(samples)
+        
+        # Tra cache, chỉ chạy KNN cho các ký tự chưa gặp
+        # (ký tự lặp lại trong cùng batch cũng chỉ chạy KNN một lần)
+        keys = self.glyph_keys(samples)
+        results = [None] * len(keys)
+        misses = {}
+        with self._cache_lock:
+            generation = self._model_generation
+            model = self._model
+            for i, key in enumerate(keys):
+                result = self._cache.get(key)
+                if result is not None:
+                    self._cache.move_to_end(key)
+                    results[i] = result
+                else:
+                    misses.setdefault(key, []).append(i)
+            self.cache_misses += len(misses)
+            self.cache_hits += len(keys) - len(misses)
+        
+        if misses:
+            indices = list(misses.values())
+            found = self._find_nearest(samples[[group[0] for group in indices]], model)
+            with self._cache_lock:
+                # Không lưu kết quả của model cũ nếu model vừa được tải lại
+                store = generation == self._model_generation
+                for key, group, result in zip(misses, indices, found):
+                    for i in group:
+                        results[i] = result
+                    if store:
+                        self._cache[key] = result
+                        self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        
+        return results
+    
+    def _find_nearest(self, samples, model=None):
+        """Chạy KNN, trả về danh sách (character, agreement, distance)"""
+        k_nearest, feature_extractor = model if model is not None else self._model
+        if self.model_type == 'binary':
+            results, neighbor_responses, distances = k_nearest.find_nearest(
+                samples, self.K_NEIGHBORS
+            )
+        else:
+            features = feature_extractor.transform(samples)
+            _, results, neighbor_responses, distances = k_nearest.findNearest(
+                features, self.K_NEIGHBORS
+            )
+        
+        # Độ tin cậy: tỷ lệ phiếu và khoảng cách gần nhất của nhãn được chọn
+        same = neighbor_responses == results
+        agreement = same.sum(axis=1) / neighbor_responses.shape[1]
+        distance = np.where(same, distances, np.inf).min(axis=1)
+        
+        # Chuyển đổi ASCII sang ký tự
+        return [
+            (chr(int(code)), float(votes), float(dist))
+            for code, votes, dist in zip(results[:, 0], agreement, distance)
+        ]
+    
+    def recognize_characters(self, char_imgs):
+        """
+        Nhận dạng nhiều ký tự (vector hóa, một lần gọi KNN)
+        
+        Args:
+            char_imgs: Danh sách ảnh ký tự
+            
+        Returns:
+            characters: Danh sách ký tự được nhận dạng
+        """
+        return self.classify_flattened(self.flatten_characters(char_imgs))
+    
     def recognize_character(self, char_img):
         """
         Nhận dạng một ký tự
@@ -84,24 +423,53 @@ class CharacterRecognizer:
         Returns:
             character: Ký tự được nhận dạng (string)
         """
-        if self.k_nearest is None:
-            raise ValueError("Model not loaded. Call load_model() first.")
+        return self.recognize_characters([char_img])[0]
+    
+    @staticmethod
+    def format_plate(first_line, second_line):
+        """
+        Ghép text hai hàng thành text biển số
         
-        # Chuẩn hóa
-        normalized = self.normalize_character(char_img)
+        Args:
+            first_line: Text hàng trên
+            second_line: Text hàng dưới
+            
+        Returns:
+            plate_text: "ABC123 - 456789" hoặc "ABC12345"
+        """
+        if second_line:
+            return f"{first_line} - {second_line}"
+        else:
+            return first_line
+    
+    def recognize_plate_with_confidence(self, first_line_chars, second_line_chars):
+        """
+        Nhận dạng toàn bộ biển số kèm độ tin cậy
         
-        # Flatten thành vector
-        flattened = normalized.reshape((1, self.RESIZED_IMAGE_WIDTH * self.RESIZED_IMAGE_HEIGHT))
-        flattened = np.float32(flattened)
+        Độ tin cậy của biển số là của ký tự kém nhất.
         
-        # Nhận dạng bằng KNN
-        _, results, _, _ = self.k_nearest.findNearest(flattened, self.K_NEIGHBORS)
+        Args:
+            first_line_chars: Danh sách ký tự hàng trên
+            second_line_chars: Danh sách ký tự hàng dưới
+            
+        Returns:
+            plate_text: Text biển số
+            agreement: Tỷ lệ phiếu thấp nhất trong các ký tự (0 nếu không có ký tự)
+            distance: Khoảng cách lớn nhất trong các ký tự
+        """
+        char_imgs = [char[4] for char in first_line_chars]
+        char_imgs += [char[4] for char in second_line_chars]
+        results = self.classify_with_confidence(self.flatten_characters(char_imgs))
         
-        # Chuyển đổi ASCII sang ký tự
-        char_code = int(results[0][0])
-        character = chr(char_code)
+        split = len(first_line_chars)
+        characters = [character for character, _, _ in results]
+        plate_text = self.format_plate("".join(characters[:split]), "".join(characters[split:]))
         
-        return character
+        if not results:
+            return plate_text, 0.0, float('inf')
+        return (plate_text,
+                min(agreement for _, agreement, _ in results),
+                max(distance for _, _, distance in results))
     
     def recognize_plate(self, first_line_chars, second_line_chars):
         """
@@ -114,24 +482,14 @@ class CharacterRecognizer:
         Returns:
             plate_text: Text biển số (format: "ABC123 - 456789" hoặc "ABC12345")
         """
-        first_line = ""
-        second_line = ""
-        
-        # Nhận dạng hàng trên
-        for char in first_line_chars:
-            _, _, _, _, char_img = char
-            char_text = self.recognize_character(char_img)
-            first_line += char_text
+        # Nhận dạng cả hai hàng bằng một lần gọi KNN
+        char_imgs = [char[4] for char in first_line_chars]
+        char_imgs += [char[4] for char in second_line_chars]
+        characters = self.recognize_characters(char_imgs)
         
-        # Nhận dạng hàng dưới
-        for char in second_line_chars:
-            _, _, _, _, char_img = char
-            char_text = self.recognize_character(char_img)
-            second_line += char_text
+        split = len(first_line_chars)
+        first_line = "".join(characters[:split])
+        second_line = "".join(characters[split:])
         
         # Format kết quả
-        if second_line:
-            return f"{first_line} - {second_line}"
-        else:
-            return first_line
-
+        return self.format_plate(first_line, second_line)
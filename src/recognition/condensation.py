@@ -0,0 +1,246 @@
+"""
+Training-set Condensation Module
+Thu gọn tập huấn luyện KNN (ít mẫu hơn, nhận dạng gần như không đổi)
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+
+CONDENSATION_METHODS = ('cnn', 'enn', 'enn+cnn', 'kmeans')
+
+
+def pairwise_sq_distances(a, b):
+    """
+    Bình phương khoảng cách Euclid giữa hai tập mẫu
+
+    Args:
+        a: Ma trận (N, D)
+        b: Ma trận (M, D)
+
+    Returns:
+        distances: Ma trận float64 (N, M)
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    distances = (a * a).sum(axis=1)[:, None] + (b * b).sum(axis=1)[None, :] - 2.0 * (a @ b.T)
+    return np.maximum(distances, 0.0)
+
+
+def edited_nearest_neighbours(samples, labels, k=3, chunk_size=1024):
+    """
+    Edited Nearest Neighbour (Wilson): bỏ các mẫu bị k láng giềng còn lại
+    nhận dạng sai (nhiễu, mẫu gán nhãn nhầm, mẫu nằm sâu trong lớp khác)
+
+    Args:
+        samples: Ma trận (N, D)
+        labels: Nhãn (N,)
+        k: Số láng giềng
+        chunk_size: Số hàng ma trận khoảng cách tính mỗi lần
+
+    Returns:
+        keep: Chỉ số các mẫu được giữ lại
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    labels = np.asarray(labels).reshape(-1)
+    k = min(k, len(labels) - 1)
+    if k < 1:
+        return np.arange(len(labels))
+
+    # Tính theo lô hàng để không phải giữ cả ma trận N x N
+    nearest = np.empty((len(labels), k), dtype=np.intp)
+    for start in range(0, len(labels), chunk_size):
+        stop = min(start + chunk_size, len(labels))
+        distances = pairwise_sq_distances(samples[start:stop], samples)
+        distances[np.arange(stop - start), np.arange(start, stop)] = np.inf
+        candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(distances, candidates, axis=1), axis=1)
+        nearest[start:stop] = np.take_along_axis(candidates, order, axis=1)
+    neighbor_labels = labels[nearest]
+
+    # Bỏ phiếu đa số, hòa thì chọn nhãn có láng giềng gần nhất
+    votes = (neighbor_labels[:, :, None] == neighbor_labels[:, None, :]).sum(axis=2)
+    predicted = neighbor_labels[np.arange(len(labels)), np.argmax(votes, axis=1)]
+
+    keep = np.flatnonzero(predicted == labels)
+    # Không để mất hẳn một nhãn
+    for label in np.setdiff1d(labels, labels[keep]):
+        keep = np.append(keep, np.flatnonzero(labels == label)[0])
+    return np.sort(keep)
+
+
+def condensed_nearest_neighbour(samples, labels, rng=None):
+    """
+    Condensed Nearest Neighbour (Hart): giữ tập con nhỏ nhất tìm được sao cho
+    1-NN trên tập con nhận dạng đúng toàn bộ tập huấn luyện
+
+    Args:
+        samples: Ma trận (N, D)
+        labels: Nhãn (N,)
+        rng: np.random.Generator để xáo thứ tự duyệt (tùy chọn)
+
+    Returns:
+        keep: Chỉ số các mẫu được giữ lại
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    labels = np.asarray(labels).reshape(-1)
+    order = np.arange(len(labels)) if rng is None else rng.permutation(len(labels))
+
+    # Khoảng cách và nhãn của prototype gần nhất với từng mẫu
+    nearest_distance = np.full(len(labels), np.inf)
+    nearest_label = np.full(len(labels), np.nan)
+    sq_norms = (samples * samples).sum(axis=1)
+    kept = np.zeros(len(labels), dtype=bool)
+
+    def add(index):
+        kept[index] = True
+        distance = sq_norms + sq_norms[index] - 2.0 * (samples @ samples[index])
+        closer = distance < nearest_distance
+        nearest_distance[closer] = distance[closer]
+        nearest_label[closer] = labels[index]
+
+    # Mỗi nhãn bắt đầu với một mẫu
+    for label in np.unique(labels):
+        add(order[np.flatnonzero(labels[order] == label)[0]])
+
+    changed = True
+    while changed:
+        changed = False
+        for index in order:
+            if not kept[index] and nearest_label[index] != labels[index]:
+                add(index)
+                changed = True
+
+    return np.flatnonzero(kept)
+
+
+def kmeans_prototypes(samples, labels, per_class=3, attempts=3):
+    """
+    Thay mẫu của mỗi nhãn bằng per_class tâm cụm k-means
+
+    Args:
+        samples: Ma trận (N, D)
+        labels: Nhãn (N,)
+        per_class: Số prototype tối đa mỗi nhãn
+        attempts: Số lần khởi tạo k-means
+
+    Returns:
+        prototypes: Ma trận float32 (M, D)
+        prototype_labels: Nhãn float32 (M,)
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    labels = np.asarray(labels, dtype=np.float32).reshape(-1)
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 50, 0.5)
+
+    prototypes, prototype_labels = [], []
+    for label in np.unique(labels):
+        class_samples = samples[labels == label]
+        clusters = min(per_class, len(class_samples))
+        if clusters == len(class_samples):
+            centers = class_samples
+        else:
+            _, _, centers = cv2.kmeans(
+                class_samples, clusters, None, criteria, attempts, cv2.KMEANS_PP_CENTERS
+            )
+        prototypes.append(centers)
+        prototype_labels.append(np.full(len(centers), label, dtype=np.float32))
+
+    return np.vstack(prototypes), np.concatenate(prototype_labels)
+
+
+def condense_training_set(samples, labels, method='kmeans', k=3, per_class=3,
+                          max_per_class=None, rng=None):
+    """
+    Thu gọn tập huấn luyện
+
+    Args:
+        samples: Ma trận (N, D)
+        labels: Nhãn (N,)
+        method: 'cnn', 'enn', 'enn+cnn' hoặc 'kmeans'
+        k: Số láng giềng cho ENN
+        per_class: Số prototype mỗi nhãn cho k-means
+        max_per_class: Giới hạn số mẫu mỗi nhãn sau khi thu gọn; nhãn vượt quá
+                       được thay bằng tâm cụm k-means (tùy chọn)
+        rng: np.random.Generator cho CNN (tùy chọn)
+
+    Returns:
+        samples: Ma trận float32 đã thu gọn
+        labels: Nhãn float32 tương ứng
+    """
+    if method not in CONDENSATION_METHODS:
+        raise ValueError(
+            f"Unknown condensation method '{method}', expected one of {CONDENSATION_METHODS}"
+        )
+
+    samples = np.asarray(samples, dtype=np.float32)
+    labels = np.asarray(labels, dtype=np.float32).reshape(-1)
+
+    if method == 'kmeans':
+        return kmeans_prototypes(samples, labels, per_class)
+
+    if method in ('enn', 'enn+cnn'):
+        keep = edited_nearest_neighbours(samples, labels, k)
+        samples, labels = samples[keep], labels[keep]
+
+    if method in ('cnn', 'enn+cnn'):
+        keep = condensed_nearest_neighbour(samples, labels, rng)
+        samples, labels = samples[keep], labels[keep]
+
+    if max_per_class is not None:
+        samples, labels = kmeans_prototypes(samples, labels, max_per_class)
+
+    return samples, labels
+
+
+def save_model(model_path, samples, labels,
+               classifications_file="classifications.txt",
+               flattened_images_file="flattened_images.txt"):
+    """
+    Ghi model theo định dạng CharacterRecognizer.load_model đọc được
+
+    Args:
+        model_path: Thư mục model
+        samples: Ma trận (N, 600)
+        labels: Nhãn (mã ASCII), N phần tử
+        classifications_file: Tên file classifications
+        flattened_images_file: Tên file flattened images
+    """
+    os.makedirs(model_path, exist_ok=True)
+    np.savetxt(os.path.join(model_path, classifications_file),
+               np.asarray(labels, dtype=np.float32).reshape(-1))
+    np.savetxt(os.path.join(model_path, flattened_images_file),
+               np.asarray(samples, dtype=np.float32))
+
+
+def load_model_samples(model_path,
+                       classifications_file="classifications.txt",
+                       flattened_images_file="flattened_images.txt"):
+    """
+    Đọc tập ký tự ở định dạng model (ngược với save_model)
+
+    Returns:
+        samples: Ma trận float32 (N, 600)
+        labels: Nhãn float32 (N,)
+    """
+    labels = np.loadtxt(os.path.join(model_path, classifications_file), np.float32).reshape(-1)
+    samples = np.loadtxt(os.path.join(model_path, flattened_images_file), np.float32)
+    return samples, labels
+
+
+def split_held_out(labels, test_fraction, rng):
+    """
+    Chia tập theo từng nhãn: mỗi nhãn giữ lại test_fraction mẫu để test
+    (ít nhất một mẫu train cho mỗi nhãn)
+
+    Returns:
+        train_idx, test_idx: Mảng chỉ số
+    """
+    train_idx, test_idx = [], []
+    for label in np.unique(labels):
+        idx = rng.permutation(np.flatnonzero(labels == label))
+        n_test = min(int(round(len(idx) * test_fraction)), len(idx) - 1)
+        test_idx.extend(idx[:n_test])
+        train_idx.extend(idx[n_test:])
+    return np.array(train_idx), np.array(test_idx)
@@ -0,0 +1,90 @@
+"""
+Dataset Builder Module
+Tạo tập ký tự huấn luyện từ các thư mục ảnh ký tự đã gán nhãn
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from ..utils.file_utils import iter_image_files
+
+
+def iter_labelled_crops(root):
+    """
+    Duyệt ảnh ký tự đã gán nhãn theo cấu trúc root/<ký tự>/*.png
+
+    Ảnh phải cùng dạng với ký tự do CharacterSegmenter tách ra (ký tự trắng
+    trên nền đen). Thư mục có tên dài hơn một ký tự được bỏ qua.
+
+    Args:
+        root: Thư mục gốc
+
+    Yields:
+        (image_path, label): label là mã ASCII của ký tự
+    """
+    for entry in sorted(os.scandir(root), key=lambda entry: entry.name):
+        if not entry.is_dir():
+            continue
+        if len(entry.name) != 1:
+            print(f"Skipping {entry.path}: label directory must be a single character")
+            continue
+        for image_path in iter_image_files(entry.path, recursive=True, ordered=True):
+            yield image_path, ord(entry.name)
+
+
+def load_glyph(image_path, width=20, height=30):
+    """
+    Đọc một ảnh ký tự và chuẩn hóa về width x height (giống
+    CharacterRecognizer.normalize_character)
+
+    Args:
+        image_path: Đường dẫn ảnh
+        width: Chiều rộng chuẩn hóa
+        height: Chiều cao chuẩn hóa
+
+    Returns:
+        glyph: Vector uint8 (width * height) hoặc None nếu không đọc được
+    """
+    img = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return None
+    return cv2.resize(img, (width, height)).reshape(-1)
+
+
+def build_glyph_dataset(roots, width=20, height=30, workers=4):
+    """
+    Đọc song song các thư mục ký tự đã gán nhãn thành ma trận huấn luyện
+
+    Args:
+        roots: Danh sách thư mục gốc (mỗi thư mục chứa các thư mục nhãn)
+        width: Chiều rộng chuẩn hóa
+        height: Chiều cao chuẩn hóa
+        workers: Số thread đọc và chuẩn hóa ảnh (OpenCV nhả GIL)
+
+    Returns:
+        samples: Ma trận uint8 (N, width * height)
+        labels: Nhãn float32 (N,)
+        skipped: Danh sách ảnh không đọc được
+    """
+    items = [item for root in roots for item in iter_labelled_crops(root)]
+    samples = np.empty((len(items), width * height), dtype=np.uint8)
+    labels = np.empty(len(items), dtype=np.float32)
+    valid = np.zeros(len(items), dtype=bool)
+    skipped = []
+
+    def load(index):
+        return index, load_glyph(items[index][0], width, height)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for index, glyph in executor.map(load, range(len(items))):
+            if glyph is None:
+                skipped.append(items[index][0])
+                continue
+            samples[index] = glyph
+            labels[index] = items[index][1]
+            valid[index] = True
+
+    return samples[valid], labels[valid], skipped
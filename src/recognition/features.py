@@ -0,0 +1,260 @@
+"""
+Character Features Module
+Biến đổi ký tự đã chuẩn hóa (20x30 pixel) thành vector đặc trưng ít chiều
+hơn cho KNN. Mọi biến đổi đều vector hóa trên cả batch (N, 600).
+"""
+
+import numpy as np
+
+
+class FeatureExtractor:
+    """Lớp cơ sở: giữ nguyên pixel (600 chiều)"""
+
+    NAME = "pixels"
+
+    def __init__(self, width=20, height=30):
+        """
+        Khởi tạo FeatureExtractor
+
+        Args:
+            width: Chiều rộng ký tự đã chuẩn hóa
+            height: Chiều cao ký tự đã chuẩn hóa
+        """
+        self.width = width
+        self.height = height
+
+    @property
+    def dimension(self):
+        """Số chiều của vector đặc trưng"""
+        return self.width * self.height
+
+    @property
+    def requires_fit(self):
+        """Có cần fit trên tập huấn luyện hay không"""
+        return False
+
+    def fit(self, samples):
+        """
+        Học tham số từ tập huấn luyện (không làm gì với đặc trưng cố định)
+
+        Args:
+            samples: Ma trận (N, width * height) giá trị pixel 0-255
+
+        Returns:
+            self
+        """
+        return self
+
+    def transform(self, samples):
+        """
+        Biến đổi batch ký tự
+
+        Args:
+            samples: Ma trận (N, width * height) giá trị pixel 0-255
+
+        Returns:
+            features: Ma trận float32 (N, dimension)
+        """
+        return np.asarray(samples, dtype=np.float32)
+
+    def _images(self, samples):
+        """Ma trận mẫu -> batch ảnh (N, height, width) giá trị 0-1"""
+        samples = np.asarray(samples, dtype=np.float32)
+        return samples.reshape(len(samples), self.height, self.width) / 255.0
+
+
+class ZoningFeatures(FeatureExtractor):
+    """
+    Mật độ pixel theo lưới vùng và histogram chiếu theo hàng/cột
+
+    Mặc định: lưới 4x6 (ô 5x5) + 10 bin chiếu hàng + 10 bin chiếu cột = 44 chiều.
+    """
+
+    NAME = "zoning"
+
+    def __init__(self, width=20, height=30, cell_size=5, projection_bins=10):
+        """
+        Args:
+            width: Chiều rộng ký tự đã chuẩn hóa
+            height: Chiều cao ký tự đã chuẩn hóa
+            cell_size: Kích thước ô vuông của lưới (phải chia hết width, height)
+            projection_bins: Số bin của mỗi histogram chiếu (phải chia hết width, height)
+        """
+        super().__init__(width, height)
+        if width % cell_size or height % cell_size:
+            raise ValueError(f"cell_size {cell_size} must divide {width}x{height}")
+        if width % projection_bins or height % projection_bins:
+            raise ValueError(f"projection_bins {projection_bins} must divide {width}x{height}")
+        self.cell_size = cell_size
+        self.projection_bins = projection_bins
+
+    @property
+    def dimension(self):
+        cells = (self.width // self.cell_size) * (self.height // self.cell_size)
+        return cells + 2 * self.projection_bins
+
+    def transform(self, samples):
+        imgs = self._images(samples)
+        n, cell, bins = len(imgs), self.cell_size, self.projection_bins
+
+        zones = imgs.reshape(
+            n, self.height // cell, cell, self.width // cell, cell
+        ).mean(axis=(2, 4))
+        rows = imgs.mean(axis=2).reshape(n, bins, -1).mean(axis=2)
+        cols = imgs.mean(axis=1).reshape(n, bins, -1).mean(axis=2)
+
+        return np.hstack([zones.reshape(n, -1), rows, cols]).astype(np.float32)
+
+
+class HOGFeatures(FeatureExtractor):
+    """
+    Histogram hướng gradient (HOG) theo ô, chuẩn hóa L2 trên cả ký tự
+
+    Mặc định: ô 10x10 (lưới 2x3), 9 hướng = 54 chiều.
+    """
+
+    NAME = "hog"
+
+    def __init__(self, width=20, height=30, cell_size=10, orientations=9):
+        """
+        Args:
+            width: Chiều rộng ký tự đã chuẩn hóa
+            height: Chiều cao ký tự đã chuẩn hóa
+            cell_size: Kích thước ô (phải chia hết width, height)
+            orientations: Số bin hướng trên [0, pi)
+        """
+        super().__init__(width, height)
+        if width % cell_size or height % cell_size:
+            raise ValueError(f"cell_size {cell_size} must divide {width}x{height}")
+        self.cell_size = cell_size
+        self.orientations = orientations
+
+    @property
+    def dimension(self):
+        cells = (self.width // self.cell_size) * (self.height // self.cell_size)
+        return cells * self.orientations
+
+    def transform(self, samples):
+        imgs = self._images(samples)
+        n, cell = len(imgs), self.cell_size
+
+        # Gradient sai phân trung tâm
+        gx = np.zeros_like(imgs)
+        gy = np.zeros_like(imgs)
+        gx[:, :, 1:-1] = imgs[:, :, 2:] - imgs[:, :, :-2]
+        gy[:, 1:-1, :] = imgs[:, 2:, :] - imgs[:, :-2, :]
+
+        magnitude = np.hypot(gx, gy)
+        angle = np.mod(np.arctan2(gy, gx), np.pi)
+        bins = np.minimum(
+            (angle * (self.orientations / np.pi)).astype(np.intp), self.orientations - 1
+        )
+
+        # Cộng độ lớn gradient vào (ký tự, ô, hướng) bằng một lần bincount
+        cells_x = self.width // cell
+        cell_index = (np.arange(self.height)[:, None] // cell) * cells_x \
+            + np.arange(self.width)[None, :] // cell
+        cells = cells_x * (self.height // cell)
+        index = (np.arange(n)[:, None, None] * cells + cell_index) * self.orientations + bins
+        hist = np.bincount(
+            index.ravel(), weights=magnitude.ravel(), minlength=n * self.dimension
+        ).reshape(n, -1)
+
+        norms = np.linalg.norm(hist, axis=1, keepdims=True)
+        return (hist / np.maximum(norms, 1e-6)).astype(np.float32)
+
+
+class PCAFeatures(FeatureExtractor):
+    """
+    Chiếu PCA, fit offline trên tập huấn luyện và lưu cùng model (.npz)
+    """
+
+    NAME = "pca"
+
+    def __init__(self, width=20, height=30, components=40):
+        """
+        Args:
+            width: Chiều rộng ký tự đã chuẩn hóa
+            height: Chiều cao ký tự đã chuẩn hóa
+            components: Số thành phần chính
+        """
+        super().__init__(width, height)
+        self.components = components
+        self.mean = None
+        self.basis = None
+
+    @property
+    def dimension(self):
+        return self.components if self.basis is None else len(self.basis)
+
+    @property
+    def requires_fit(self):
+        return True
+
+    def fit(self, samples):
+        samples = np.asarray(samples, dtype=np.float64)
+        self.mean = samples.mean(axis=0)
+        _, _, vt = np.linalg.svd(samples - self.mean, full_matrices=False)
+        self.basis = vt[:self.components]
+        return self
+
+    def transform(self, samples):
+        if self.basis is None:
+            raise ValueError("PCA not fitted. Call fit() or load() first.")
+        samples = np.asarray(samples, dtype=np.float32)
+        centered = samples - self.mean.astype(np.float32)
+        return centered @ self.basis.astype(np.float32).T
+
+    def save(self, path):
+        """
+        Lưu tham số PCA
+
+        Args:
+            path: Đường dẫn file .npz
+        """
+        np.savez(path, mean=self.mean, basis=self.basis,
+                 size=np.array([self.width, self.height]))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Tải tham số PCA đã lưu bằng save()
+
+        Args:
+            path: Đường dẫn file .npz
+
+        Returns:
+            extractor: PCAFeatures
+        """
+        with np.load(path) as data:
+            width, height = (int(v) for v in data['size'])
+            extractor = cls(width, height, components=len(data['basis']))
+            extractor.mean = data['mean']
+            extractor.basis = data['basis']
+        return extractor
+
+
+FEATURE_EXTRACTORS = {
+    extractor.NAME: extractor
+    for extractor in (FeatureExtractor, ZoningFeatures, HOGFeatures, PCAFeatures)
+}
+
+
+def create_feature_extractor(name, width=20, height=30, **kwargs):
+    """
+    Tạo feature extractor theo tên
+
+    Args:
+        name: 'pixels', 'zoning', 'hog' hoặc 'pca'
+        width: Chiều rộng ký tự đã chuẩn hóa
+        height: Chiều cao ký tự đã chuẩn hóa
+        **kwargs: Tham số riêng của từng loại
+
+    Returns:
+        extractor: FeatureExtractor
+    """
+    if name not in FEATURE_EXTRACTORS:
+        raise ValueError(
+            f"Unknown features '{name}', expected one of {sorted(FEATURE_EXTRACTORS)}"
+        )
+    return FEATURE_EXTRACTORS[name](width, height, **kwargs)
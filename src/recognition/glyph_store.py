@@ -0,0 +1,142 @@
+"""
+Glyph Store Module
+Tập ký tự huấn luyện dạng nhị phân, chỉ ghi nối tiếp (append-only)
+
+Thư mục store gồm:
+    glyphs.u8     Các hàng uint8 (width * height bytes mỗi ký tự)
+    labels.u8     Nhãn (mã ASCII), 1 byte mỗi ký tự
+    version.json  {"version", "rows", "width", "height"}
+
+Thêm mẫu chỉ ghi thêm vào cuối hai file dữ liệu rồi thay version.json bằng
+os.replace. Người đọc chỉ đọc đúng số hàng trong version.json nên không bao
+giờ thấy một lần ghi dở.
+"""
+
+import json
+import os
+
+import numpy as np
+
+
+class GlyphStore:
+    """Tập ký tự huấn luyện append-only"""
+
+    SAMPLES_FILE = "glyphs.u8"
+    LABELS_FILE = "labels.u8"
+    VERSION_FILE = "version.json"
+
+    def __init__(self, path, width=20, height=30):
+        """
+        Khởi tạo GlyphStore (thư mục được tạo khi ghi lần đầu)
+
+        Args:
+            path: Thư mục store
+            width: Chiều rộng ký tự (dùng khi tạo store mới)
+            height: Chiều cao ký tự (dùng khi tạo store mới)
+        """
+        self.path = str(path)
+        self.width = width
+        self.height = height
+
+        info = self.read_version()
+        if info is not None:
+            self.width = info['width']
+            self.height = info['height']
+
+    @staticmethod
+    def is_store(path):
+        """Đường dẫn có phải một GlyphStore hay không"""
+        return os.path.isfile(os.path.join(str(path), GlyphStore.VERSION_FILE))
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def read_version(self):
+        """
+        Đọc version.json
+
+        Returns:
+            info: {'version', 'rows', 'width', 'height'} hoặc None nếu store rỗng
+        """
+        try:
+            with open(self._file(self.VERSION_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    @property
+    def version(self):
+        """Số phiên bản hiện tại (0 nếu store rỗng)"""
+        info = self.read_version()
+        return info['version'] if info else 0
+
+    def __len__(self):
+        info = self.read_version()
+        return info['rows'] if info else 0
+
+    def read(self):
+        """
+        Đọc toàn bộ store (theo số hàng đã commit trong version.json)
+
+        Returns:
+            samples: Ma trận float32 (rows, width * height)
+            labels: Nhãn float32 (rows,)
+        """
+        info = self.read_version()
+        size = self.width * self.height
+        if info is None or info['rows'] == 0:
+            return np.empty((0, size), dtype=np.float32), np.empty(0, dtype=np.float32)
+
+        rows = info['rows']
+        samples = np.fromfile(self._file(self.SAMPLES_FILE), dtype=np.uint8, count=rows * size)
+        labels = np.fromfile(self._file(self.LABELS_FILE), dtype=np.uint8, count=rows)
+        if len(samples) != rows * size or len(labels) != rows:
+            raise ValueError(f"Glyph store {self.path} is truncated")
+        return samples.reshape(rows, size).astype(np.float32), labels.astype(np.float32)
+
+    def append(self, samples, labels):
+        """
+        Thêm mẫu vào cuối store (không ghi lại các hàng cũ)
+
+        Chỉ hỗ trợ một tiến trình ghi tại một thời điểm.
+
+        Args:
+            samples: Ma trận (N, width * height) giá trị pixel 0-255
+            labels: Nhãn (mã ASCII), N phần tử
+
+        Returns:
+            version: Số phiên bản mới
+        """
+        samples = np.asarray(samples)
+        labels = np.asarray(labels).reshape(-1)
+        size = self.width * self.height
+        if samples.ndim != 2 or samples.shape[1] != size:
+            raise ValueError(f"Expected samples of shape (N, {size}), got {samples.shape}")
+        if len(samples) != len(labels):
+            raise ValueError("samples and labels must have the same length")
+
+        os.makedirs(self.path, exist_ok=True)
+        info = self.read_version() or {
+            'version': 0, 'rows': 0, 'width': self.width, 'height': self.height
+        }
+        rows = info['rows']
+
+        for name, row_bytes, data in (
+            (self.SAMPLES_FILE, size, np.clip(np.rint(samples), 0, 255).astype(np.uint8)),
+            (self.LABELS_FILE, 1, labels.astype(np.uint8)),
+        ):
+            with open(self._file(name), 'ab') as f:
+                # Bỏ phần ghi dở của lần append bị gián đoạn trước đó
+                f.truncate(rows * row_bytes)
+                f.write(data.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        info = dict(info, version=info['version'] + 1, rows=rows + len(samples))
+        temp_path = self._file(self.VERSION_FILE + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self._file(self.VERSION_FILE))
+        return info['version']
@@ -0,0 +1,164 @@
+"""
+Micro-batching Module
+Gom ký tự từ nhiều request đồng thời để nhận dạng bằng một lần gọi KNN
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatchClassifier:
+    """
+    Gom các ký tự đã chuẩn hóa từ nhiều thread trong một khoảng thời gian ngắn
+    (hoặc tới khi đủ số ký tự tối đa) rồi nhận dạng bằng một lần gọi KNN
+
+    Có cùng giao diện recognize_plate với CharacterRecognizer nên có thể dùng
+    thay thế trong server.
+    """
+
+    # Tham số mặc định
+    MAX_WAIT_MS = 2.0
+    MAX_BATCH_SIZE = 256
+
+    def __init__(self, recognizer, max_wait_ms=2.0, max_batch_size=256):
+        """
+        Khởi tạo MicroBatchClassifier và thread gom batch
+
+        Args:
+            recognizer: CharacterRecognizer
+            max_wait_ms: Thời gian chờ tối đa để gom batch (mili giây)
+            max_batch_size: Số ký tự tối đa trong một batch
+        """
+        self.recognizer = recognizer
+        self.MAX_WAIT_MS = max_wait_ms
+        self.MAX_BATCH_SIZE = max_batch_size
+
+        self._queue = queue.Queue()
+        self._closed = False
+
+        # Thống kê
+        self.batches = 0
+        self.samples = 0
+
+        self._thread = threading.Thread(
+            target=self._run, name='knn-micro-batch', daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, samples):
+        """
+        Gửi các ký tự đã chuẩn hóa để nhận dạng
+
+        Args:
+            samples: Ma trận float32 từ CharacterRecognizer.flatten_characters
+
+        Returns:
+            future: Future trả về danh sách (ký tự, agreement, distance)
+        """
+        future = Future()
+        if len(samples) == 0:
+            future.set_result([])
+            return future
+        if self._closed:
+            raise RuntimeError("MicroBatchClassifier is closed")
+        self._queue.put((samples, future))
+        return future
+
+    def classify_with_confidence(self, samples):
+        """
+        Nhận dạng các ký tự đã chuẩn hóa kèm độ tin cậy (giống
+        CharacterRecognizer.classify_with_confidence), KNN theo batch
+        """
+        return self.submit(samples).result()
+
+    def recognize_characters(self, char_imgs):
+        """Nhận dạng nhiều ký tự (chuẩn hóa ở thread gọi, KNN theo batch)"""
+        samples = self.recognizer.flatten_characters(char_imgs)
+        return [character for character, _, _ in self.classify_with_confidence(samples)]
+
+    def recognize_plate(self, first_line_chars, second_line_chars):
+        """
+        Nhận dạng toàn bộ biển số (giống CharacterRecognizer.recognize_plate)
+
+        Args:
+            first_line_chars: Danh sách ký tự hàng trên
+            second_line_chars: Danh sách ký tự hàng dưới
+
+        Returns:
+            plate_text: Text biển số
+        """
+        char_imgs = [char[4] for char in first_line_chars]
+        char_imgs += [char[4] for char in second_line_chars]
+        characters = self.recognize_characters(char_imgs)
+
+        split = len(first_line_chars)
+        return self.recognizer.format_plate(
+            "".join(characters[:split]), "".join(characters[split:])
+        )
+
+    def _collect(self):
+        """Lấy một batch: chờ request đầu tiên, sau đó gom thêm trong MAX_WAIT_MS"""
+        item = self._queue.get()
+        if item is None:
+            return None
+
+        batch = [item]
+        size = len(item[0])
+        deadline = time.perf_counter() + self.MAX_WAIT_MS / 1000.0
+
+        while size < self.MAX_BATCH_SIZE:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Đóng: xử lý nốt batch hiện tại rồi dừng
+                self._queue.put(None)
+                break
+            batch.append(item)
+            size += len(item[0])
+
+        return batch
+
+    def _run(self):
+        """Vòng lặp của thread gom batch"""
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            samples = np.concatenate([item[0] for item in batch])
+            try:
+                results = self.recognizer.classify_with_confidence(samples)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.samples += len(samples)
+
+            start = 0
+            for item_samples, future in batch:
+                end = start + len(item_samples)
+                future.set_result(results[start:end])
+                start = end
+
+    @property
+    def average_batch_size(self):
+        """Số ký tự trung bình mỗi lần gọi KNN"""
+        return self.samples / self.batches if self.batches else 0.0
+
+    def close(self):
+        """Dừng thread gom batch (các request đang chờ vẫn được xử lý)"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
@@ -2,8 +2,29 @@
 Utility functions
 """
 
-from .file_utils import load_image, save_results, create_output_directory
+from .file_utils import (
+    load_image, save_results, append_result, create_output_directory, get_image_files,
+    iter_image_files, is_manifest_file, read_image_bytes, decode_image, ImageTooLarge,
+    result_name, image_source_root
+)
 from .config import Config
+from .buffer_arena import FrameBufferArena
+from .prefetch import ImagePrefetcher
+from .sharding import parse_shard, filter_shard, merge_results
+from .watcher import FolderWatcher, ProcessedCheckpoint
+from .frame_ring import SharedFrameRing, SharedFramePool
+from .admission import (
+    Deadline, DeadlineExceeded, AdmissionController, AsyncAdmissionController, AdmissionRejected
+)
+from .render_store import RenderStore
 
-__all__ = ['load_image', 'save_results', 'create_output_directory', 'Config']
+__all__ = ['load_image', 'save_results', 'append_result', 'create_output_directory',
+           'get_image_files',
+           'iter_image_files', 'is_manifest_file',
+           'read_image_bytes', 'decode_image', 'ImageTooLarge', 'result_name', 'image_source_root',
+           'Config', 'FrameBufferArena', 'ImagePrefetcher',
+           'parse_shard', 'filter_shard', 'merge_results',
+           'FolderWatcher', 'ProcessedCheckpoint', 'SharedFrameRing', 'SharedFramePool',
+           'Deadline', 'DeadlineExceeded', 'AdmissionController', 'AsyncAdmissionController',
+           'AdmissionRejected', 'RenderStore']
 
@@ -0,0 +1,302 @@
+"""
+Admission Control
+Giới hạn số request xử lý đồng thời và thời hạn (deadline) của từng request,
+để khi quá tải server từ chối sớm thay vì để độ trễ tăng không giới hạn
+"""
+
+import asyncio
+import math
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+
+
+class DeadlineExceeded(Exception):
+    """Hết thời hạn xử lý, phần việc còn lại bị bỏ"""
+
+    def __init__(self, stage):
+        super().__init__(stage)
+        self.stage = stage
+
+    def __str__(self):
+        return f"Deadline exceeded before stage '{self.stage}'"
+
+
+class Deadline:
+    """Thời hạn xử lý tính từ lúc tạo (time.monotonic)"""
+
+    def __init__(self, seconds=None):
+        """
+        Args:
+            seconds: Thời gian cho phép (giây), None hoặc <= 0 = không giới hạn
+        """
+        self.start = time.monotonic()
+        self.expires_at = self.start + seconds if seconds and seconds > 0 else None
+
+    @classmethod
+    def at(cls, wall_time):
+        """
+        Deadline hết hạn tại một thời điểm tuyệt đối (để truyền sang tiến trình
+        khác: đồng hồ monotonic không so sánh được giữa các tiến trình)
+
+        Args:
+            wall_time: Thời điểm hết hạn theo time.time(), None = không giới hạn
+        """
+        deadline = cls()
+        if wall_time is not None:
+            deadline.expires_at = deadline.start + (wall_time - time.time())
+        return deadline
+
+    def wall_time(self):
+        """Thời điểm hết hạn theo time.time() (None nếu không giới hạn), dùng với Deadline.at"""
+        if self.expires_at is None:
+            return None
+        return time.time() + (self.expires_at - time.monotonic())
+
+    def timeout(self):
+        """Số giây còn lại để chờ kết quả (None nếu không giới hạn, như Future.result)"""
+        remaining = self.remaining()
+        return None if remaining == math.inf else remaining
+
+    def remaining(self):
+        """Số giây còn lại (math.inf nếu không giới hạn, 0 nếu đã hết hạn)"""
+        if self.expires_at is None:
+            return math.inf
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def check(self, stage):
+        """
+        Kiểm tra thời hạn trước khi bắt đầu một bước
+
+        Args:
+            stage: Tên bước sắp chạy (để báo lỗi)
+
+        Raises:
+            DeadlineExceeded: Đã hết thời hạn
+        """
+        if self.expired:
+            raise DeadlineExceeded(stage)
+
+
+class AdmissionRejected(Exception):
+    """Request bị từ chối vì server đang quá tải"""
+
+    def __init__(self, retry_after):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+    def __str__(self):
+        return f"Server busy, retry after {self.retry_after} s"
+
+
+class AdmissionController:
+    """
+    Giới hạn số request đang xử lý và số request chờ
+
+    Request vượt quá MAX_IN_FLIGHT phải chờ trong hàng đợi (tối đa MAX_QUEUE
+    request, mỗi request chờ tối đa QUEUE_TIMEOUT giây hoặc tới hết deadline);
+    hàng đợi đầy hoặc chờ quá lâu thì bị từ chối với thời gian gợi ý thử lại.
+    """
+
+    # Tham số mặc định
+    MAX_IN_FLIGHT = 4
+    MAX_QUEUE = 16
+    QUEUE_TIMEOUT = 2.0
+
+    def __init__(self, max_in_flight=4, max_queue=16, queue_timeout=2.0):
+        """
+        Khởi tạo AdmissionController
+
+        Args:
+            max_in_flight: Số request xử lý đồng thời tối đa
+            max_queue: Số request chờ tối đa
+            queue_timeout: Thời gian chờ tối đa trong hàng đợi (giây)
+        """
+        self.MAX_IN_FLIGHT = max_in_flight
+        self.MAX_QUEUE = max_queue
+        self.QUEUE_TIMEOUT = queue_timeout
+
+        self._condition = threading.Condition()
+        self.in_flight = 0
+        self.queued = 0
+
+        # Thống kê
+        self.admitted = 0
+        self.completed = 0
+        self.rejected = 0           # Hàng đợi đầy
+        self.queue_timeouts = 0     # Chờ quá lâu trong hàng đợi
+        self.timed_out = 0          # Hết deadline khi đang xử lý
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        # Thời gian xử lý trung bình (trung bình trượt), dùng để gợi ý Retry-After
+        self.service_time = None
+
+    def retry_after(self):
+        """Thời gian gợi ý thử lại (giây, làm tròn lên, ít nhất 1)"""
+        service_time = self.service_time if self.service_time is not None else 1.0
+        backlog = (self.queued + 1) * service_time / max(self.MAX_IN_FLIGHT, 1)
+        return max(1, math.ceil(backlog))
+
+    @contextmanager
+    def admit(self, deadline=None):
+        """
+        Chờ tới lượt xử lý
+
+        Args:
+            deadline: Deadline của request (tùy chọn), không chờ quá thời hạn
+
+        Raises:
+            AdmissionRejected: Hàng đợi đầy hoặc chờ quá lâu
+        """
+        start = time.monotonic()
+        with self._condition:
+            if not self._try_admit(start):
+                wait_until = start + self._queue_timeout(deadline)
+                self.queued += 1
+                try:
+                    while self.in_flight >= self.MAX_IN_FLIGHT:
+                        remaining = wait_until - time.monotonic()
+                        if remaining <= 0:
+                            self.queue_timeouts += 1
+                            raise AdmissionRejected(self.retry_after())
+                        self._condition.wait(remaining)
+                finally:
+                    self.queued -= 1
+                self._enter(start)
+
+        service_start = time.monotonic()
+        outcome = None
+        try:
+            yield
+            outcome = 'completed'
+        except DeadlineExceeded:
+            outcome = 'timed_out'
+            raise
+        finally:
+            with self._condition:
+                self._leave(time.monotonic() - service_start, outcome)
+                self._condition.notify()
+
+    # Các bước dùng chung với AsyncAdmissionController (gọi khi giữ self._condition)
+
+    def _try_admit(self, start):
+        """Nhận ngay nếu còn chỗ; hàng đợi đầy thì từ chối. Returns: True nếu đã nhận"""
+        if self.in_flight < self.MAX_IN_FLIGHT:
+            self._enter(start)
+            return True
+        if self.queued >= self.MAX_QUEUE:
+            self.rejected += 1
+            raise AdmissionRejected(self.retry_after())
+        return False
+
+    def _queue_timeout(self, deadline):
+        """Thời gian được chờ trong hàng đợi (giây)"""
+        if deadline is None:
+            return self.QUEUE_TIMEOUT
+        return min(self.QUEUE_TIMEOUT, deadline.remaining())
+
+    def _enter(self, start):
+        self.in_flight += 1
+        self.admitted += 1
+        wait = time.monotonic() - start
+        self.queue_wait_total += wait
+        self.queue_wait_max = max(self.queue_wait_max, wait)
+
+    def _leave(self, service_time, outcome):
+        """outcome: 'completed', 'timed_out' hoặc None (lỗi khác)"""
+        self.in_flight -= 1
+        if outcome is not None:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+        self.service_time = service_time if self.service_time is None \
+            else 0.8 * self.service_time + 0.2 * service_time
+
+    def stats(self):
+        """Thống kê hiện tại (dict, dùng cho endpoint metrics)"""
+        with self._condition:
+            return {
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'max_in_flight': self.MAX_IN_FLIGHT,
+                'max_queue': self.MAX_QUEUE,
+                'admitted': self.admitted,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'queue_timeouts': self.queue_timeouts,
+                'timed_out': self.timed_out,
+                'queue_wait_avg_ms': round(
+                    self.queue_wait_total / self.admitted * 1000, 2) if self.admitted else 0.0,
+                'queue_wait_max_ms': round(self.queue_wait_max * 1000, 2),
+                'service_time_ms': round(self.service_time * 1000, 2)
+                                   if self.service_time is not None else None,
+            }
+
+
+class AsyncAdmissionController(AdmissionController):
+    """
+    AdmissionController cho front end asyncio: request chờ trong hàng đợi là
+    coroutine (không chiếm thread). admit() không an toàn khi gọi đồng thời từ
+    nhiều event loop.
+    """
+
+    def __init__(self, max_in_flight=4, max_queue=16, queue_timeout=2.0):
+        super().__init__(max_in_flight, max_queue, queue_timeout)
+        # Tạo khi dùng lần đầu trên mỗi event loop (asyncio.Condition gắn với loop)
+        self._available = None
+        self._loop = None
+
+    @asynccontextmanager
+    async def admit(self, deadline=None):
+        """
+        Chờ tới lượt xử lý (async with)
+
+        Args:
+            deadline: Deadline của request (tùy chọn), không chờ quá thời hạn
+
+        Raises:
+            AdmissionRejected: Hàng đợi đầy hoặc chờ quá lâu
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._available = asyncio.Condition()
+            self._loop = loop
+        start = time.monotonic()
+
+        async with self._available:
+            with self._condition:
+                admitted = self._try_admit(start)
+                if not admitted:
+                    timeout = self._queue_timeout(deadline)
+                    self.queued += 1
+            if not admitted:
+                try:
+                    await asyncio.wait_for(
+                        self._available.wait_for(lambda: self.in_flight < self.MAX_IN_FLIGHT),
+                        timeout
+                    )
+                except asyncio.TimeoutError:
+                    with self._condition:
+                        self.queue_timeouts += 1
+                    raise AdmissionRejected(self.retry_after()) from None
+                finally:
+                    with self._condition:
+                        self.queued -= 1
+                with self._condition:
+                    self._enter(start)
+
+        service_start = time.monotonic()
+        outcome = None
+        try:
+            yield
+            outcome = 'completed'
+        except DeadlineExceeded:
+            outcome = 'timed_out'
+            raise
+        finally:
+            with self._condition:
+                self._leave(time.monotonic() - service_start, outcome)
+            async with self._available:
+                self._available.notify()
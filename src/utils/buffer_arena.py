@@ -0,0 +1,71 @@
+"""
+Frame Buffer Arena
+Bộ đệm cấp phát trước cho các ảnh trung gian kích thước bằng khung hình
+"""
+
+import numpy as np
+
+
+class FrameBufferArena:
+    """
+    Quản lý các buffer theo tên, dùng lại giữa các khung hình
+
+    Buffer chỉ được cấp phát lại khi kích thước hoặc kiểu dữ liệu thay đổi.
+    Ảnh trả về từ pipeline khi dùng arena sẽ bị ghi đè ở khung hình kế tiếp,
+    vì vậy cần copy nếu muốn giữ lại. Không dùng chung một arena giữa nhiều thread.
+    """
+
+    def __init__(self):
+        """Khởi tạo arena rỗng"""
+        self._buffers = {}
+        self.allocations = 0
+
+    def get(self, name, shape, dtype=np.uint8):
+        """
+        Lấy buffer theo tên, cấp phát lại nếu shape/dtype khác
+
+        Args:
+            name: Tên buffer (ví dụ: 'value', 'top_hat', 'canny')
+            shape: Kích thước mong muốn
+            dtype: Kiểu dữ liệu
+
+        Returns:
+            buffer: numpy array (nội dung không được khởi tạo)
+        """
+        shape = tuple(shape)
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buffer
+            self.allocations += 1
+        return buffer
+
+    def like(self, name, img):
+        """Lấy buffer cùng shape và dtype với ảnh cho trước"""
+        return self.get(name, img.shape, img.dtype)
+
+    def clear(self):
+        """Giải phóng tất cả buffer"""
+        self._buffers.clear()
+
+    @property
+    def nbytes(self):
+        """Tổng dung lượng các buffer đang giữ (bytes)"""
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+
+def arena_buffer(arena, name, img):
+    """
+    Buffer đích cho tham số dst= của OpenCV
+
+    Args:
+        arena: FrameBufferArena hoặc None
+        name: Tên buffer
+        img: Ảnh mẫu (shape, dtype)
+
+    Returns:
+        buffer: Buffer của arena, hoặc None để OpenCV tự cấp phát
+    """
+    if arena is None:
+        return None
+    return arena.like(name, img)
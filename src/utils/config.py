@@ -21,6 +21,7 @@ class Config:
     
     # Image processing parameters
     TARGET_IMAGE_SIZE = (1920, 1080)
+    REDUCED_DECODE = True       # Giải mã JPEG lớn ở 1/2, 1/4, 1/8 độ phân giải
     RESIZED_CHAR_WIDTH = 20
     RESIZED_CHAR_HEIGHT = 30
     
@@ -31,6 +32,18 @@ class Config:
     APPROX_EPSILON_FACTOR = 0.06
     MAX_CONTOURS = 10
     
+    # Coarse-to-fine detection
+    COARSE_TO_FINE = False
+    PYRAMID_LEVELS = 1          # Mỗi mức giảm một nửa kích thước
+    PYRAMID_WINDOW_PADDING = 0.5
+    
+    # Cascade: chạy cấu hình nhanh trước, chỉ chạy cấu hình đầy đủ khi cần
+    CASCADE_ENABLED = False
+    CASCADE_FAST_SIZE = (960, 540)
+    CASCADE_FAST_MORPHOLOGY_ITERATIONS = 3
+    CASCADE_MIN_AGREEMENT = 1.0     # Tỷ lệ phiếu KNN tối thiểu của mọi ký tự
+    CASCADE_MAX_DISTANCE = None     # Khoảng cách KNN tối đa (None = không xét)
+    
     # Character segmentation parameters (giống Test_all_images.py)
     MIN_CHAR_AREA_RATIO = 0.01  # 1% diện tích biển số
     MAX_CHAR_AREA_RATIO = 0.09  # 9% diện tích biển số
@@ -39,6 +52,35 @@ class Config:
     
     # Recognition parameters
     K_NEIGHBORS = 3
+    MODEL_TYPE = "float"        # 'float' (Euclid, cv2.ml) hoặc 'binary' (Hamming, nén bit)
+    FEATURES = "pixels"         # Đặc trưng cho KNN float: pixels, zoning, hog, pca
+    FEATURES_FILE = "features_pca.npz"  # PCA fit offline (scripts/fit_features.py)
+    GLYPH_STORE_DIR = "glyph_store"     # Tập ký tự append-only, thay model text khi có version.json (None = tắt)
+    MODEL_RELOAD_INTERVAL = 5.0  # Kiểm tra model thay đổi mỗi N giây (0 = tắt)
+    PLATE_WORKERS = 0           # Thread xử lý đồng thời các biển số trong một ảnh
+    GLYPH_CACHE_SIZE = 0        # Cache LRU kết quả theo ký tự nhị phân (0 = tắt)
+    RECOGNITION_WORKERS = 0     # Tiến trình nhận dạng, khung hình qua shared memory (0 = tắt)
+    
+    # Web server: gom ký tự từ các request đồng thời vào một lần gọi KNN
+    MICRO_BATCH_ENABLED = False
+    MICRO_BATCH_WAIT_MS = 2.0
+    MICRO_BATCH_MAX_SIZE = 256
+    WEB_WORKERS = 0             # Tiến trình nhận dạng cho web, khung hình qua shared memory
+    
+    # Web server: giới hạn tải (quá tải thì trả 503 + Retry-After thay vì xếp hàng mãi)
+    WEB_MAX_IN_FLIGHT = 4       # Request nhận dạng xử lý đồng thời
+    WEB_MAX_QUEUE = 16          # Request chờ tối đa
+    WEB_QUEUE_TIMEOUT = 2.0     # Thời gian chờ tối đa trong hàng đợi (giây)
+    WEB_REQUEST_TIMEOUT = 10.0  # Thời hạn xử lý một request (giây, 0 = không giới hạn)
+    WEB_MAX_UPLOAD_BYTES = 16 * 1024 * 1024
+    
+    # Web server: ảnh hiển thị trả về dạng URL (mã hóa JPEG khi được tải lần đầu)
+    # thay vì base64 trong JSON
+    WEB_RENDER_STORE = False
+    WEB_RENDER_STORE_MAX_BYTES = 256 * 1024 * 1024
+    WEB_RENDER_STORE_DIR = None         # Thư mục ghi ảnh bị đẩy ra khỏi bộ nhớ (None = bỏ)
+    WEB_RENDER_STORE_MAX_DISK_BYTES = 2 * 1024 * 1024 * 1024
+    WEB_RENDER_MAX_AGE = 3600           # Cache-Control max-age của ảnh (giây)
     
     # Preprocessing parameters
     GAUSSIAN_KERNEL_SIZE = (5, 5)
@@ -46,6 +88,33 @@ class Config:
     ADAPTIVE_WEIGHT = 9
     MORPHOLOGY_ITERATIONS = 10
     
+    # Dùng lại buffer kích thước khung hình giữa các ảnh (FrameBufferArena)
+    USE_BUFFER_ARENA = False
+    
+    # Đọc trước ảnh khi xử lý hàng loạt (0 = tắt)
+    PREFETCH_DEPTH = 0
+    PREFETCH_WORKERS = 2
+    PREFETCH_MAX_BYTES = 512 * 1024 * 1024
+    
+    # Giới hạn cho từng ảnh khi xử lý hàng loạt: ảnh bất thường được ghi TIMEOUT /
+    # OVERSIZE thay vì chặn cả batch (mặc định tắt, ví dụ 30.0 và 50_000_000)
+    IMAGE_TIME_BUDGET = 0           # Thời gian nhận dạng tối đa một ảnh (giây, 0 = tắt)
+    MAX_IMAGE_PIXELS = 0            # Ảnh lớn hơn được giải mã thu nhỏ (0 = tắt)
+    
+    # Watch mode: khoảng thời gian quét thư mục spool (giây)
+    WATCH_POLL_INTERVAL = 2.0
+    
+    # Region of interest theo camera (file JSON, None = xử lý toàn bộ ảnh)
+    ROI_CONFIG_FILE = None
+    
+    # Bỏ qua khung hình gần như trùng với khung hình vừa xử lý của cùng camera
+    # (dHash trên vùng quan tâm của camera, khoảng cách Hamming <= ngưỡng thì
+    # dùng lại kết quả)
+    FRAME_DEDUP_ENABLED = False
+    FRAME_DEDUP_THRESHOLD = 1       # Ngưỡng mặc định (số bit khác nhau trên 64x64 bit)
+    FRAME_DEDUP_HASH_SIZE = 64      # Đủ ô để biển số đổi chữ đổi nhiều bit
+    FRAME_DEDUP_CONFIG_FILE = None  # File JSON ngưỡng theo camera {camera_id: ngưỡng}
+    
     @classmethod
     def get_model_path(cls, filename):
         """Lấy đường dẫn đầy đủ đến file model"""
@@ -3,28 +3,282 @@ File utility functions
 """
 
 import os
+import glob
+import json
+import struct
+import time
 import cv2
+import numpy as np
 from pathlib import Path
 
 
-def load_image(image_path):
+# Phần mở rộng file ảnh được hỗ trợ (so sánh không phân biệt hoa thường)
+IMAGE_EXTENSIONS = frozenset(['.jpg', '.jpeg', '.png', '.bmp'])
+
+# File danh sách ảnh: mỗi dòng một đường dẫn (.txt, .lst) hoặc một object JSON (.jsonl)
+MANIFEST_EXTENSIONS = frozenset(['.txt', '.lst', '.jsonl'])
+
+# Cờ giải mã JPEG ở độ phân giải giảm (1/2, 1/4, 1/8) theo (hệ số, grayscale)
+_REDUCED_DECODE_FLAGS = {
+    (1, False): cv2.IMREAD_COLOR,
+    (2, False): cv2.IMREAD_REDUCED_COLOR_2,
+    (4, False): cv2.IMREAD_REDUCED_COLOR_4,
+    (8, False): cv2.IMREAD_REDUCED_COLOR_8,
+    (1, True): cv2.IMREAD_GRAYSCALE,
+    (2, True): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (4, True): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    (8, True): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+# Marker SOF của JPEG chứa kích thước ảnh (bỏ qua DHT=C4, JPG=C8, DAC=CC)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                     0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def read_image_info(data):
+    """
+    Đọc kích thước và số kênh từ header ảnh JPEG/PNG mà không giải mã
+    
+    Args:
+        data: Nội dung file ảnh (bytes hoặc numpy array uint8)
+        
+    Returns:
+        info: (format, width, height, channels) hoặc None nếu không đọc được
+    """
+    header = bytes(data[:2]) if len(data) >= 2 else b''
+    
+    if header == b'\xff\xd8':
+        i = 2
+        size = len(data)
+        while i + 4 <= size:
+            if data[i] != 0xFF:
+                return None
+            marker = data[i + 1]
+            if marker == 0xFF:
+                # Byte đệm
+                i += 1
+                continue
+            if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+                i += 2
+                continue
+            (length,) = struct.unpack('>H', bytes(data[i + 2:i + 4]))
+            if marker in _JPEG_SOF_MARKERS:
+                if i + 10 > size:
+                    return None
+                height, width = struct.unpack('>HH', bytes(data[i + 5:i + 9]))
+                channels = data[i + 9]
+                return 'jpeg', int(width), int(height), int(channels)
+            i += 2 + length
+        return None
+    
+    if bytes(data[:8]) == b'\x89PNG\r\n\x1a\n' and len(data) >= 26:
+        width, height = struct.unpack('>II', bytes(data[16:24]))
+        color_type = data[25]
+        channels = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}.get(int(color_type), 3)
+        return 'png', int(width), int(height), channels
+    
+    return None
+
+
+def choose_reduction_factor(width, height, target_size):
+    """
+    Hệ số giảm lớn nhất (1, 2, 4, 8) mà ảnh giải mã vẫn không nhỏ hơn target
+    
+    Ảnh có thể bị xoay theo EXIF khi giải mã nên so sánh cạnh dài với cạnh
+    dài và cạnh ngắn với cạnh ngắn.
+    
+    Args:
+        width, height: Kích thước ảnh gốc
+        target_size: Kích thước làm việc (width, height)
+        
+    Returns:
+        factor: Hệ số giảm
+    """
+    long_side, short_side = max(width, height), min(width, height)
+    target_long, target_short = max(target_size), min(target_size)
+    
+    for factor in (8, 4, 2):
+        if long_side // factor >= target_long and short_side // factor >= target_short:
+            return factor
+    return 1
+
+
+class ImageTooLarge(ValueError):
+    """Ảnh vượt giới hạn số pixel và không giải mã thu nhỏ được"""
+    
+    def __init__(self, width, height, max_pixels):
+        super().__init__(width, height, max_pixels)
+        self.width = width
+        self.height = height
+        self.max_pixels = max_pixels
+    
+    def __str__(self):
+        return f"Image {self.width}x{self.height} exceeds the {self.max_pixels} pixel limit"
+
+
+def choose_pixel_limit_factor(width, height, max_pixels, image_format):
+    """
+    Hệ số giảm nhỏ nhất để ảnh giải mã không vượt quá max_pixels
+    
+    Chỉ JPEG giải mã thu nhỏ được (1/2, 1/4, 1/8); định dạng khác phải nằm
+    trong giới hạn ở độ phân giải gốc.
+    
+    Args:
+        width, height: Kích thước ảnh gốc
+        max_pixels: Số pixel tối đa sau khi giải mã
+        image_format: 'jpeg' hoặc 'png'
+        
+    Returns:
+        factor: Hệ số giảm
+        
+    Raises:
+        ImageTooLarge: Không có hệ số nào đưa ảnh về trong giới hạn
+    """
+    factors = (1, 2, 4, 8) if image_format == 'jpeg' else (1,)
+    for factor in factors:
+        if -(-width // factor) * -(-height // factor) <= max_pixels:
+            return factor
+    raise ImageTooLarge(width, height, max_pixels)
+
+
+def decode_image(data, target_size=None, allow_grayscale=True, max_pixels=None):
+    """
+    Giải mã ảnh từ bộ nhớ, dùng giải mã JPEG giảm độ phân giải khi ảnh
+    lớn hơn kích thước làm việc
+    
+    Args:
+        data: Nội dung file ảnh (bytes hoặc numpy array uint8)
+        target_size: Kích thước làm việc (width, height); None = giải mã đầy đủ
+        allow_grayscale: Ảnh chỉ có 1 kênh (ví dụ camera hồng ngoại) được giải
+                         mã thẳng sang grayscale thay vì BGR
+        max_pixels: Số pixel tối đa của ảnh giải mã (None hoặc 0 = không giới
+                    hạn). JPEG và PNG được kiểm tra theo header trước khi cấp
+                    phát, ảnh JPEG lớn hơn được giải mã thu nhỏ; định dạng khác
+                    (BMP, TIFF, WebP...) chỉ kiểm tra được sau khi giải mã
+        
+    Returns:
+        img: Ảnh (BGR hoặc grayscale) hoặc None nếu lỗi
+        decode_time: Thời gian giải mã (giây)
+        
+    Raises:
+        ImageTooLarge: Ảnh vượt max_pixels kể cả khi giải mã thu nhỏ
+    """
+    buffer = np.frombuffer(data, np.uint8) if isinstance(data, (bytes, bytearray)) else data
+    
+    factor = 1
+    grayscale = False
+    info = read_image_info(buffer)
+    if info is not None:
+        image_format, width, height, channels = info
+        grayscale = allow_grayscale and channels == 1
+        # Giải mã giảm độ phân giải chỉ nhanh hơn với JPEG (scale trong miền DCT)
+        if target_size is not None and image_format == 'jpeg':
+            factor = choose_reduction_factor(width, height, target_size)
+        # Kiểm tra trước khi giải mã: ảnh quá lớn không được cấp phát
+        if max_pixels and width * height > max_pixels:
+            factor = max(factor, choose_pixel_limit_factor(width, height, max_pixels,
+                                                           image_format))
+    
+    start = time.perf_counter()
+    img = cv2.imdecode(buffer, _REDUCED_DECODE_FLAGS[(factor, grayscale)])
+    decode_time = time.perf_counter() - start
+    
+    # Định dạng không đọc được header: kiểm tra sau khi giải mã
+    if info is None and max_pixels and img is not None:
+        height, width = img.shape[:2]
+        if width * height > max_pixels:
+            raise ImageTooLarge(width, height, max_pixels)
+    
+    return img, decode_time
+
+
+def read_image_bytes(image_path):
+    """
+    Đọc nội dung file ảnh
+    
+    Args:
+        image_path: Đường dẫn đến file ảnh
+        
+    Returns:
+        data: numpy array uint8 hoặc None nếu không đọc được
+    """
+    try:
+        with open(image_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    return np.frombuffer(data, np.uint8)
+
+
+def load_image(image_path, target_size=None, allow_grayscale=False, max_pixels=None):
     """
     Load ảnh từ đường dẫn
     
     Args:
         image_path: Đường dẫn đến file ảnh
+        target_size: Kích thước làm việc (width, height). Nếu có, ảnh JPEG lớn
+                     được giải mã ở độ phân giải giảm (vẫn không nhỏ hơn target)
+        allow_grayscale: Giải mã ảnh 1 kênh thành grayscale thay vì BGR
+        max_pixels: Số pixel tối đa của ảnh giải mã (xem decode_image)
         
     Returns:
         img: Ảnh (numpy array) hoặc None nếu lỗi
     """
-    if not os.path.exists(image_path):
+    data = read_image_bytes(image_path)
+    if data is None or data.size == 0:
         return None
     
-    img = cv2.imread(image_path)
+    img, _ = decode_image(data, target_size, allow_grayscale, max_pixels)
     return img
 
 
-def save_results(results, output_path, format='txt'):
+def result_name(image_path, root=None):
+    """
+    Tên ảnh ghi vào file kết quả
+    
+    Args:
+        image_path: Đường dẫn ảnh
+        root: Thư mục gốc của đầu vào (xem image_source_root): tên là đường dẫn
+              tương đối so với root (phân cách '/'), nên ảnh trùng tên trong các
+              thư mục con khác nhau không bị lẫn; '' = giữ nguyên đường dẫn;
+              None = chỉ tên file
+    
+    Returns:
+        image_name: Tên ảnh
+    """
+    if root is None:
+        return os.path.basename(image_path)
+    name = str(image_path) if root == '' else os.path.relpath(image_path, root)
+    return name.replace(os.sep, '/')
+
+
+def image_source_root(source):
+    """
+    Thư mục gốc để đặt tên kết quả cho các ảnh của iter_image_files(source)
+    
+    Args:
+        source: Thư mục, file ảnh, glob pattern hoặc file danh sách
+    
+    Returns:
+        root: Thư mục (với glob là phần đường dẫn trước ký tự đại diện đầu
+              tiên, với file danh sách là thư mục chứa file), None nếu là
+              một file ảnh
+    """
+    source = str(source)
+    if os.path.isdir(source):
+        return source
+    if os.path.isfile(source):
+        return os.path.dirname(os.path.abspath(source)) if is_manifest_file(source) else None
+    
+    prefix = []
+    for part in Path(source).parts:
+        if glob.has_magic(part):
+            break
+        prefix.append(part)
+    return os.path.join(*prefix) if prefix else os.curdir
+
+
+def save_results(results, output_path, format='txt', root=None):
     """
     Lưu kết quả nhận dạng
     
@@ -32,19 +286,20 @@ def save_results(results, output_path, format='txt'):
         results: Danh sách kết quả [(image_path, plate_text), ...]
         output_path: Đường dẫn file output
         format: Định dạng output ('txt' hoặc 'json')
+        root: Thư mục gốc của đầu vào, tên ảnh là đường dẫn tương đối (xem
+              result_name; mặc định chỉ ghi tên file)
     """
     os.makedirs(os.path.dirname(output_path) if os.path.dirname(output_path) else '.', exist_ok=True)
     
     if format == 'txt':
         with open(output_path, 'w', encoding='utf-8') as f:
             for image_path, plate_text in results:
-                image_name = os.path.basename(image_path)
+                image_name = result_name(image_path, root)
                 f.write(f"{image_name}\t{plate_text}\n")
     elif format == 'json':
-        import json
         data = [
             {
-                'image': os.path.basename(img_path),
+                'image': result_name(img_path, root),
                 'plate': plate_text
             }
             for img_path, plate_text in results
@@ -53,6 +308,32 @@ def save_results(results, output_path, format='txt'):
             json.dump(data, f, ensure_ascii=False, indent=2)
 
 
+def append_result(output_path, image_path, plate_text, format='txt', root=None):
+    """
+    Ghi nối tiếp một kết quả (dùng cho watch mode, ghi ngay sau mỗi ảnh)
+    
+    Định dạng 'txt' giống save_results; định dạng 'json' ghi JSON Lines
+    (mỗi dòng một object {'image': ..., 'plate': ...}).
+    
+    Args:
+        output_path: Đường dẫn file output
+        image_path: Đường dẫn ảnh
+        plate_text: Kết quả nhận dạng
+        format: Định dạng output ('txt' hoặc 'json')
+        root: Thư mục gốc của đầu vào (xem result_name)
+    """
+    os.makedirs(os.path.dirname(output_path) if os.path.dirname(output_path) else '.', exist_ok=True)
+    
+    image_name = result_name(image_path, root)
+    if format == 'json':
+        line = json.dumps({'image': image_name, 'plate': plate_text}, ensure_ascii=False)
+    else:
+        line = f"{image_name}\t{plate_text}"
+    
+    with open(output_path, 'a', encoding='utf-8') as f:
+        f.write(line + '\n')
+
+
 def create_output_directory(output_dir):
     """
     Tạo thư mục output nếu chưa tồn tại
@@ -74,14 +355,131 @@ def get_image_files(directory, extensions=None):
     Returns:
         image_files: Danh sách đường dẫn file ảnh
     """
+    if not os.path.isdir(directory):
+        return []
+    
+    return sorted(iter_image_files(directory, extensions=extensions))
+
+
+def _normalize_extensions(extensions):
+    """Tập extension viết thường"""
     if extensions is None:
-        extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.JPG', '.JPEG', '.PNG', '.BMP']
+        return IMAGE_EXTENSIONS
+    return frozenset(ext.lower() for ext in extensions)
+
+
+def _is_image_name(name, extensions):
+    """Kiểm tra tên file có phải ảnh theo extension"""
+    return os.path.splitext(name)[1].lower() in extensions
+
+
+def is_manifest_file(path):
+    """File danh sách ảnh (.txt, .lst, .jsonl)"""
+    return os.path.splitext(str(path))[1].lower() in MANIFEST_EXTENSIONS
+
+
+def _iter_directory(directory, extensions, recursive, ordered):
+    """
+    Duyệt thư mục bằng os.scandir, trả về đường dẫn ngay khi gặp
     
-    image_files = []
-    if os.path.isdir(directory):
-        for filename in os.listdir(directory):
-            if any(filename.lower().endswith(ext.lower()) for ext in extensions):
-                image_files.append(os.path.join(directory, filename))
+    Ở chế độ ordered, các mục trong từng thư mục được sắp xếp theo tên (file
+    trước, thư mục con sau) nên thứ tự luôn cố định mà không cần duyệt hết cây.
+    """
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it) if ordered else it
+                if ordered:
+                    entries.sort(key=lambda entry: entry.name)
+                subdirs = []
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            if _is_image_name(entry.name, extensions):
+                                yield entry.path
+                        elif recursive and entry.is_dir():
+                            subdirs.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"Warning: Cannot read directory {current}: {e}")
+            continue
+        
+        # Stack LIFO: đảo ngược để thư mục con được duyệt theo thứ tự tên
+        stack.extend(reversed(subdirs))
+
+
+def _iter_manifest(manifest_path, extensions):
+    """
+    Đọc file danh sách ảnh từng dòng
     
-    return sorted(image_files)
+    File .jsonl: mỗi dòng là object có khóa 'path' hoặc 'image' (hoặc một chuỗi).
+    File khác: mỗi dòng một đường dẫn, bỏ qua dòng trống và dòng bắt đầu bằng '#'.
+    Đường dẫn tương đối được tính theo thư mục chứa file danh sách.
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    is_jsonl = manifest_path.lower().endswith('.jsonl')
+    
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            
+            if is_jsonl:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"Warning: Invalid JSON at {manifest_path}:{line_number}")
+                    continue
+                path = record if isinstance(record, str) else (
+                    record.get('path') or record.get('image')
+                )
+                if not path:
+                    continue
+            else:
+                path = line
+            
+            if not os.path.isabs(path):
+                path = os.path.join(base_dir, path)
+            if _is_image_name(path, extensions):
+                yield path
+
 
+def iter_image_files(source, recursive=False, ordered=False, extensions=None):
+    """
+    Duyệt lười (lazy) các file ảnh từ thư mục, glob pattern hoặc file danh sách
+    
+    Đường dẫn được trả về ngay khi tìm thấy nên có thể bắt đầu xử lý trước khi
+    duyệt xong cả cây thư mục lớn.
+    
+    Args:
+        source: Thư mục, file ảnh, glob pattern (ví dụ 'archive/**/*.jpg')
+                hoặc file danh sách (.txt, .lst, .jsonl)
+        recursive: Duyệt cả thư mục con (với thư mục)
+        ordered: Thứ tự cố định (sắp xếp theo tên trong từng thư mục; glob được
+                 sắp xếp toàn bộ). File danh sách luôn giữ nguyên thứ tự
+        extensions: Danh sách extension (mặc định: IMAGE_EXTENSIONS)
+        
+    Yields:
+        image_path: Đường dẫn file ảnh
+    """
+    extensions = _normalize_extensions(extensions)
+    source = str(source)
+    
+    if os.path.isdir(source):
+        yield from _iter_directory(source, extensions, recursive, ordered)
+    elif os.path.isfile(source):
+        if is_manifest_file(source):
+            yield from _iter_manifest(source, extensions)
+        elif _is_image_name(source, extensions):
+            yield source
+    elif glob.has_magic(source):
+        paths = glob.iglob(source, recursive=True)
+        if ordered:
+            paths = sorted(paths)
+        for path in paths:
+            if _is_image_name(path, extensions) and os.path.isfile(path):
+                yield path
@@ -0,0 +1,207 @@
+"""
+Shared-memory Frame Ring
+Truyền khung hình giữa tiến trình giải mã và các tiến trình nhận dạng qua
+multiprocessing.shared_memory: khung hình được ghi một lần vào một ô (slot)
+của vùng nhớ chung, tiến trình worker đọc trực tiếp dưới dạng numpy view.
+Chỉ chỉ số ô và kết quả nhỏ đi qua ranh giới tiến trình (không pickle ảnh).
+"""
+
+import multiprocessing
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+
+class SharedFrameRing:
+    """
+    Các ô khung hình kích thước cố định trong một vùng shared memory
+
+    Tiến trình tạo ring quản lý các ô trống (acquire/release); tiến trình
+    worker chỉ gắn vào (attach) và đọc.
+    """
+
+    def __init__(self, slots, frame_shape, name=None):
+        """
+        Tạo ring mới (name=None) hoặc gắn vào ring đã có
+
+        Args:
+            slots: Số ô
+            frame_shape: Shape lớn nhất của một khung hình uint8, ví dụ (1080, 1920, 3)
+            name: Tên vùng shared memory để gắn vào (tùy chọn)
+        """
+        if slots < 1:
+            raise ValueError("Frame ring needs at least one slot")
+        self.slots = slots
+        self.frame_shape = tuple(frame_shape)
+        self.slot_bytes = int(np.prod(self.frame_shape))
+        self.owner = name is None
+
+        self._shm = shared_memory.SharedMemory(
+            name=name, create=self.owner, size=self.slots * self.slot_bytes if self.owner else 0
+        )
+        self._buffer = np.ndarray((self.slots, self.slot_bytes), dtype=np.uint8,
+                                  buffer=self._shm.buf)
+
+        self._free = queue.Queue()
+        if self.owner:
+            for slot in range(self.slots):
+                self._free.put(slot)
+
+    @property
+    def name(self):
+        """Tên vùng shared memory (truyền cho worker để attach)"""
+        return self._shm.name
+
+    def acquire(self, timeout=None):
+        """
+        Lấy một ô trống, chờ nếu tất cả đang được dùng (an toàn giữa các thread)
+
+        Args:
+            timeout: Thời gian chờ tối đa (giây), None = chờ mãi
+
+        Returns:
+            slot: Chỉ số ô
+
+        Raises:
+            queue.Empty: Hết thời gian chờ
+        """
+        return self._free.get(timeout=timeout)
+
+    def release(self, slot):
+        """Trả ô về ring sau khi worker xử lý xong"""
+        self._free.put(slot)
+
+    def write(self, slot, img, size=None):
+        """
+        Ghi khung hình vào ô
+
+        Args:
+            slot: Chỉ số ô (từ acquire)
+            img: Ảnh uint8
+            size: Resize về (width, height) khi ghi (tùy chọn); ảnh được resize
+                  thẳng vào vùng nhớ chung, không qua buffer trung gian
+
+        Returns:
+            header: (slot, shape) để worker đọc lại khung hình
+        """
+        if size is not None:
+            shape = (size[1], size[0]) + img.shape[2:]
+        else:
+            shape = img.shape
+        if img.dtype != np.uint8 or int(np.prod(shape)) > self.slot_bytes:
+            raise ValueError(f"Frame {shape} {img.dtype} does not fit a {self.frame_shape} slot")
+
+        view = self.view(slot, shape)
+        if size is not None:
+            cv2.resize(img, tuple(size), dst=view)
+        else:
+            np.copyto(view, img)
+        return slot, shape
+
+    def view(self, slot, shape):
+        """numpy view (không copy) của khung hình trong ô"""
+        return self._buffer[slot, :int(np.prod(shape))].reshape(shape)
+
+    def read(self, header):
+        """Khung hình theo header của write (view, hợp lệ tới khi ô được release)"""
+        slot, shape = header
+        return self.view(slot, shape)
+
+    def close(self):
+        """Đóng ring; tiến trình tạo ring giải phóng luôn vùng shared memory"""
+        self._buffer = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+# Ring của tiến trình worker (gắn vào trong initializer)
+_worker_ring = None
+
+
+def _init_frame_worker(ring_name, slots, frame_shape, initializer, initargs):
+    global _worker_ring
+    # Song song theo tiến trình: tránh mỗi worker tạo thêm thread OpenCV
+    cv2.setNumThreads(1)
+    _worker_ring = SharedFrameRing(slots, frame_shape, name=ring_name)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _call_with_frame(fn, header, args):
+    return fn(_worker_ring.read(header), *args)
+
+
+class SharedFramePool:
+    """
+    Process pool nhận khung hình qua SharedFrameRing
+
+    submit() ghi ảnh vào một ô trống rồi gửi chỉ số ô cho worker; ô được trả lại
+    khi worker xong. Số ô giới hạn số khung hình đang xử lý, nên submit() chờ khi
+    mọi ô đều bận.
+    """
+
+    def __init__(self, workers, frame_shape, initializer=None, initargs=(), slots=None,
+                 mp_context=None):
+        """
+        Khởi tạo ring và process pool
+
+        Args:
+            workers: Số tiến trình worker
+            frame_shape: Shape lớn nhất của một khung hình uint8
+            initializer: Hàm khởi tạo trạng thái của worker (tùy chọn, phải pickle được)
+            initargs: Tham số của initializer
+            slots: Số ô (mặc định: 2 * workers để worker không phải chờ ghi)
+            mp_context: Context multiprocessing (mặc định: spawn, vì tiến trình cha
+                        thường đã có thread giải mã/OpenCV khi worker được tạo)
+        """
+        if slots is None:
+            slots = 2 * workers
+        if mp_context is None:
+            mp_context = multiprocessing.get_context('spawn')
+        self.workers = workers
+        self.ring = SharedFrameRing(slots, frame_shape)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp_context,
+            initializer=_init_frame_worker,
+            initargs=(self.ring.name, slots, frame_shape, initializer, initargs)
+        )
+
+    def submit(self, fn, img, *args, size=None):
+        """
+        Gửi khung hình cho worker
+
+        Args:
+            fn: Hàm fn(frame, *args) chạy trong worker (hàm cấp module). frame là
+                view vào shared memory, chỉ hợp lệ trong lúc fn chạy
+            img: Ảnh uint8
+            *args: Tham số nhỏ khác cho fn
+            size: Resize về (width, height) khi ghi vào ô (tùy chọn)
+
+        Returns:
+            future: Future trả về kết quả của fn
+        """
+        slot = self.ring.acquire()
+        try:
+            header = self.ring.write(slot, img, size)
+            future = self.executor.submit(_call_with_frame, fn, header, args)
+        except Exception:
+            self.ring.release(slot)
+            raise
+        future.add_done_callback(lambda _: self.ring.release(slot))
+        return future
+
+    def close(self):
+        """Chờ các khung hình đang xử lý, dừng worker và giải phóng shared memory"""
+        self.executor.shutdown(wait=True)
+        self.ring.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
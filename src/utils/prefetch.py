@@ -0,0 +1,89 @@
+"""
+Image Prefetcher
+Đọc và giải mã trước các ảnh kế tiếp trên thread pool trong khi ảnh hiện tại
+đang được nhận dạng (OpenCV nhả GIL khi giải mã)
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ImagePrefetcher:
+    """Iterator trả về ảnh đã giải mã theo đúng thứ tự đầu vào"""
+
+    def __init__(self, image_paths, load_fn, depth=4, max_bytes=512 * 1024 * 1024, workers=2):
+        """
+        Khởi tạo ImagePrefetcher
+
+        Args:
+            image_paths: Danh sách (hoặc iterator) đường dẫn ảnh
+            load_fn: Hàm load_fn(path) -> (img, decode_time), phải an toàn khi
+                     gọi từ nhiều thread
+            depth: Số ảnh tối đa được đọc trước
+            max_bytes: Giới hạn bộ nhớ cho các ảnh đang chờ (bytes). Ước lượng theo
+                       ảnh lớn nhất đã giải mã; luôn cho phép ít nhất một ảnh
+            workers: Số thread giải mã
+        """
+        if depth < 1:
+            raise ValueError("Prefetch depth must be at least 1")
+
+        self.image_paths = iter(image_paths)
+        self.load_fn = load_fn
+        self.depth = depth
+        self.max_bytes = max_bytes
+        self.workers = max(1, min(workers, depth))
+        self._frame_bytes = 0
+        # Lỗi của ảnh vừa trả về (None nếu đọc được), ví dụ ImageTooLarge
+        self.error = None
+
+    def _can_submit(self, pending):
+        """Còn chỗ trong hàng đợi và trong giới hạn bộ nhớ hay không"""
+        if len(pending) == 0:
+            return True
+        if len(pending) >= self.depth:
+            return False
+        if self.max_bytes is None:
+            return True
+        if self._frame_bytes == 0:
+            # Chưa biết kích thước ảnh: chờ ảnh đầu tiên giải mã xong
+            return False
+        return (len(pending) + 1) * self._frame_bytes <= self.max_bytes
+
+    def __iter__(self):
+        """
+        Duyệt các ảnh đã giải mã
+
+        Yields:
+            (image_path, img, decode_time): img là None nếu không đọc được ảnh
+            (lỗi khi đọc nằm trong self.error)
+        """
+        pending = deque()
+        exhausted = False
+
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix='prefetch') as executor:
+            while True:
+                while not exhausted and self._can_submit(pending):
+                    try:
+                        path = next(self.image_paths)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.append((path, executor.submit(self.load_fn, path)))
+
+                if len(pending) == 0:
+                    return
+
+                path, future = pending.popleft()
+                self.error = None
+                try:
+                    img, decode_time = future.result()
+                except Exception as e:
+                    print(f"Error loading image {path}: {e}")
+                    self.error = e
+                    img, decode_time = None, 0.0
+
+                if img is not None:
+                    self._frame_bytes = max(self._frame_bytes, img.nbytes)
+
+                yield path, img, decode_time
@@ -0,0 +1,296 @@
+"""
+Render Store
+Lưu ảnh hiển thị (ảnh phát hiện, biển số, các bước xử lý) của từng request
+theo request id để trả về dạng URL thay vì base64 trong JSON. Ảnh được giữ ở
+dạng chưa mã hóa và chỉ mã hóa JPEG khi được tải lần đầu; ảnh không ai tải
+không tốn thời gian mã hóa.
+
+Dung lượng bộ nhớ có giới hạn (LRU); ảnh bị đẩy ra khỏi bộ nhớ được ghi
+xuống thư mục tạm nếu có cấu hình đĩa (cũng có giới hạn), nếu không thì bị bỏ.
+"""
+
+import itertools
+import os
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+# Tên hợp lệ của request id và ảnh (dùng làm tên file khi ghi xuống đĩa)
+_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class RenderStore:
+    """LRU các ảnh hiển thị, khóa (request_id, name), mã hóa JPEG khi được tải"""
+
+    # Tham số mặc định
+    MAX_BYTES = 256 * 1024 * 1024
+    MAX_DISK_BYTES = 2 * 1024 * 1024 * 1024
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, disk_dir=None,
+                 max_disk_bytes=2 * 1024 * 1024 * 1024):
+        """
+        Khởi tạo RenderStore
+
+        Args:
+            max_bytes: Dung lượng bộ nhớ tối đa (bytes, tính theo ảnh chưa mã hóa
+                       hoặc JPEG đã mã hóa)
+            disk_dir: Thư mục để ghi ảnh bị đẩy ra khỏi bộ nhớ (tùy chọn); store
+                      dùng một thư mục con riêng, xóa khi close()
+            max_disk_bytes: Dung lượng đĩa tối đa (bytes)
+        """
+        self.MAX_BYTES = max_bytes
+        self.MAX_DISK_BYTES = max_disk_bytes
+
+        self._lock = threading.Lock()
+        # (request_id, name) -> ndarray (chưa mã hóa) hoặc bytes (JPEG)
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        # (request_id, name) -> (path, size)
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        # Ảnh đã ra khỏi bộ nhớ, đang được ghi xuống đĩa (ngoài lock)
+        self._spilling = {}
+        self._file_ids = itertools.count()
+
+        self.disk_dir = None
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+            self.disk_dir = tempfile.mkdtemp(prefix='renders-', dir=disk_dir)
+
+        # Thống kê
+        self.stored = 0
+        self.encoded = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    @staticmethod
+    def new_id():
+        """Request id mới (ngẫu nhiên, dùng được trong URL và tên file)"""
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def is_valid_key(request_id, name):
+        """request_id và name chỉ gồm chữ, số, '_' và '-'"""
+        return bool(_NAME_PATTERN.match(request_id)) and bool(_NAME_PATTERN.match(name))
+
+    @staticmethod
+    def etag(request_id, name):
+        """ETag của ảnh: nội dung không đổi theo (request_id, name)"""
+        return f'"{request_id}-{name}"'
+
+    def put(self, request_id, name, image):
+        """
+        Lưu một ảnh
+
+        Args:
+            request_id: Request id (new_id)
+            name: Tên ảnh trong request, ví dụ 'detected', 'plate_0', 'threshold'
+            image: Ảnh chưa mã hóa (numpy array, mã hóa khi được tải) hoặc bytes JPEG
+        """
+        if not self.is_valid_key(request_id, name):
+            raise ValueError(f"Invalid render key '{request_id}/{name}'")
+        key = (request_id, name)
+        with self._lock:
+            stale = self._remove(key)
+            self._memory[key] = image
+            self._memory_bytes += self._size(image)
+            self.stored += 1
+            spills, evicted = self._evict()
+        # Ghi / xóa file ngoài lock: các request khác không phải chờ đĩa
+        self._delete_files(stale + evicted)
+        self._spill(spills)
+
+    def get(self, request_id, name):
+        """
+        JPEG của ảnh (mã hóa lần đầu nếu cần)
+
+        Returns:
+            data: bytes hoặc None nếu không có (chưa lưu hoặc đã bị đẩy ra)
+        """
+        key = (request_id, name)
+        path = None
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+            elif key in self._spilling:
+                image = self._spilling[key]
+            elif key in self._disk:
+                self._disk.move_to_end(key)
+                path = self._disk[key][0]
+            else:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        if image is None:
+            image = self._read_disk(path)
+            if image is None:
+                return None
+        if isinstance(image, bytes):
+            return image
+
+        # Mã hóa ngoài lock: các request khác không phải chờ
+        data = self._encode(image)
+        spills = []
+        with self._lock:
+            self.encoded += 1
+            if self._memory.get(key) is image:
+                self._memory_bytes += len(data) - image.nbytes
+                self._memory[key] = data
+            elif key in self._disk and key not in self._spilling:
+                # Thay ảnh thô trên đĩa bằng JPEG để lần tải sau không mã hóa lại
+                self._spilling[key] = data
+                spills.append((key, data))
+        self._spill(spills)
+        return data
+
+    def _encode(self, image):
+        _, buffer = cv2.imencode('.jpg', image)
+        return buffer.tobytes()
+
+    @staticmethod
+    def _size(image):
+        return len(image) if isinstance(image, bytes) else image.nbytes
+
+    def _remove(self, key):
+        """
+        Xóa khóa khỏi bộ nhớ và đĩa (gọi khi giữ lock)
+
+        Returns:
+            stale: Đường dẫn file cần xóa (xóa sau khi nhả lock)
+        """
+        image = self._memory.pop(key, None)
+        if image is not None:
+            self._memory_bytes -= self._size(image)
+        self._spilling.pop(key, None)
+        return self._forget_disk(key)
+
+    def _forget_disk(self, key):
+        """Bỏ khóa khỏi danh sách trên đĩa (gọi khi giữ lock), trả về file cần xóa"""
+        entry = self._disk.pop(key, None)
+        if entry is None:
+            return []
+        path, size = entry
+        self._disk_bytes -= size
+        return [path]
+
+    def _evict(self):
+        """
+        Đẩy ảnh cũ nhất ra khỏi bộ nhớ cho tới khi đủ chỗ (gọi khi giữ lock)
+
+        Returns:
+            spills: [(key, image)] cần ghi xuống đĩa (nếu có cấu hình đĩa)
+            stale: Đường dẫn file cần xóa do vượt giới hạn đĩa
+        """
+        spills = []
+        while self._memory_bytes > self.MAX_BYTES and len(self._memory) > 1:
+            key, image = self._memory.popitem(last=False)
+            self._memory_bytes -= self._size(image)
+            self.evicted += 1
+            if self.disk_dir is not None:
+                # Vẫn tải được trong lúc đang ghi xuống đĩa
+                self._spilling[key] = image
+                spills.append((key, image))
+        return spills, self._trim_disk()
+
+    def _trim_disk(self):
+        """Bỏ ảnh cũ nhất trên đĩa cho tới khi đủ chỗ (gọi khi giữ lock)"""
+        stale = []
+        while self._disk_bytes > self.MAX_DISK_BYTES and self._disk:
+            _, (path, size) = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            stale.append(path)
+        return stale
+
+    def _spill(self, spills):
+        """Ghi ảnh xuống đĩa (gọi khi không giữ lock) rồi đưa vào danh sách trên đĩa"""
+        for key, image in spills:
+            entry = self._write_disk(key, image)
+            with self._lock:
+                if self._spilling.get(key) is not image:
+                    # Khóa đã bị ghi đè hoặc xóa trong lúc ghi
+                    stale = [entry[0]] if entry is not None else []
+                else:
+                    del self._spilling[key]
+                    stale = self._forget_disk(key)
+                    if entry is not None:
+                        self._disk[key] = entry
+                        self._disk_bytes += entry[1]
+                    stale += self._trim_disk()
+            self._delete_files(stale)
+
+    def _write_disk(self, key, image):
+        """
+        Ghi ảnh xuống đĩa: JPEG đã mã hóa, hoặc ảnh thô (.npy, mã hóa khi được tải)
+
+        Returns:
+            entry: (path, size) hoặc None nếu ghi lỗi
+        """
+        request_id, name = key
+        encoded = isinstance(image, bytes)
+        # Mỗi lần ghi một file riêng: không ghi đè file có thể đang được đọc
+        path = os.path.join(self.disk_dir, f"{request_id}-{name}-{next(self._file_ids)}" +
+                            ('.jpg' if encoded else '.npy'))
+        try:
+            if encoded:
+                with open(path, 'wb') as f:
+                    f.write(image)
+            else:
+                np.save(path, image, allow_pickle=False)
+            return path, os.path.getsize(path)
+        except OSError as e:
+            print(f"Error writing render {path}: {e}")
+            return None
+
+    def _read_disk(self, path):
+        try:
+            if path.endswith('.jpg'):
+                with open(path, 'rb') as f:
+                    return f.read()
+            return np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            # File đã bị xóa do đẩy ra khỏi đĩa trong lúc đọc
+            return None
+
+    @staticmethod
+    def _delete_files(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self):
+        """Thống kê hiện tại (dict)"""
+        with self._lock:
+            return {
+                'memory_bytes': self._memory_bytes,
+                'memory_items': len(self._memory),
+                'disk_bytes': self._disk_bytes,
+                'disk_items': len(self._disk),
+                'stored': self.stored,
+                'encoded': self.encoded,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evicted': self.evicted,
+            }
+
+    def close(self):
+        """Xóa thư mục tạm trên đĩa"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._spilling.clear()
+            self._disk.clear()
+            self._disk_bytes = 0
+        if self.disk_dir is not None:
+            shutil.rmtree(self.disk_dir, ignore_errors=True)
@@ -0,0 +1,120 @@
+"""
+Sharding utilities
+Chia ảnh đầu vào cho nhiều máy theo hash ổn định của đường dẫn và gộp kết quả
+"""
+
+import hashlib
+import json
+import os
+
+from .file_utils import save_results, result_name
+
+
+def parse_shard(spec):
+    """
+    Đọc cấu hình shard dạng 'INDEX/COUNT'
+
+    Args:
+        spec: Chuỗi, ví dụ '0/4'
+
+    Returns:
+        (index, count)
+    """
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}', expected INDEX/COUNT (e.g. 0/4)")
+
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{spec}': need 0 <= INDEX < COUNT")
+    return index, count
+
+
+def shard_of(image_path, count):
+    """
+    Shard của một ảnh, chỉ phụ thuộc vào đường dẫn (không phụ thuộc máy,
+    thứ tự duyệt hay PYTHONHASHSEED)
+
+    Args:
+        image_path: Đường dẫn ảnh (dạng giống nhau trên mọi máy)
+        count: Tổng số shard
+
+    Returns:
+        index: Chỉ số shard trong [0, count)
+    """
+    key = str(image_path).replace(os.sep, '/').encode('utf-8')
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % count
+
+
+def filter_shard(image_paths, index, count, root=None):
+    """
+    Chỉ giữ lại các ảnh thuộc shard được chọn (lười, giữ nguyên thứ tự)
+
+    Args:
+        image_paths: Iterator đường dẫn ảnh
+        index: Chỉ số shard
+        count: Tổng số shard
+        root: Thư mục gốc của đầu vào (xem image_source_root); khi có, shard
+              được chọn theo tên ảnh tương đối (cùng khóa với dòng kết quả) nên
+              các máy mount archive ở đường dẫn khác nhau vẫn chia giống nhau
+
+    Yields:
+        image_path: Đường dẫn ảnh thuộc shard
+    """
+    for image_path in image_paths:
+        key = image_path if root is None else result_name(image_path, root)
+        if shard_of(key, count) == index:
+            yield image_path
+
+
+def read_results(result_path, format='txt'):
+    """
+    Đọc file kết quả do save_results tạo ra
+
+    Args:
+        result_path: Đường dẫn file kết quả
+        format: 'txt' hoặc 'json'
+
+    Returns:
+        results: Danh sách [(image_name, plate_text), ...], image_name như đã
+                 ghi (đường dẫn tương đối nếu có)
+    """
+    with open(result_path, 'r', encoding='utf-8') as f:
+        if format == 'json':
+            return [(item['image'], item['plate']) for item in json.load(f)]
+
+        results = []
+        for line in f:
+            line = line.rstrip('\n')
+            if not line:
+                continue
+            image_name, _, plate_text = line.partition('\t')
+            results.append((image_name, plate_text))
+        return results
+
+
+def merge_results(result_paths, output_path, format='txt'):
+    """
+    Gộp các file kết quả của từng shard thành một file có thứ tự cố định
+
+    Kết quả được sắp xếp theo (đường dẫn tương đối của ảnh, biển số) nên file
+    gộp giống hệt nhau từng byte bất kể số shard đã dùng; ảnh trùng tên trong
+    các thư mục con khác nhau là các dòng riêng.
+
+    Args:
+        result_paths: Danh sách file kết quả của các shard
+        output_path: Đường dẫn file gộp
+        format: 'txt' hoặc 'json'
+
+    Returns:
+        count: Số dòng kết quả
+    """
+    results = []
+    for result_path in result_paths:
+        results.extend(read_results(result_path, format))
+
+    results.sort()
+    # Giữ nguyên tên đã ghi trong file của từng shard
+    save_results(results, output_path, format=format, root='')
+    return len(results)
@@ -0,0 +1,328 @@
+"""
+Folder Watcher
+Theo dõi thư mục spool để xử lý liên tục các ảnh mới (watch mode)
+"""
+
+import os
+import time
+
+from .file_utils import IMAGE_EXTENSIONS
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:  # inotify_simple là tùy chọn (chỉ có trên Linux)
+    INotify = None
+    inotify_flags = None
+
+
+class ProcessedCheckpoint:
+    """Danh sách file đã xử lý, ghi nối tiếp để khởi động lại không làm lại"""
+
+    def __init__(self, checkpoint_path):
+        """
+        Khởi tạo và đọc checkpoint (nếu có)
+
+        Args:
+            checkpoint_path: Đường dẫn file checkpoint (mỗi dòng một đường dẫn)
+        """
+        self.checkpoint_path = checkpoint_path
+        self.processed = set()
+        # Số dòng trong file (gồm cả file đã bị xóa khỏi spool)
+        self._lines = 0
+
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        self.processed.add(line.rstrip('\n'))
+                        self._lines += 1
+
+        directory = os.path.dirname(checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(checkpoint_path, 'a', encoding='utf-8')
+
+    def __contains__(self, image_path):
+        return image_path in self.processed
+
+    def __len__(self):
+        return len(self.processed)
+
+    def add(self, image_path):
+        """Đánh dấu đã xử lý và ghi ngay xuống đĩa"""
+        if image_path in self.processed:
+            return
+        self.processed.add(image_path)
+        self._file.write(image_path + '\n')
+        self._file.flush()
+        self._lines += 1
+
+    def intersection_update(self, existing):
+        """
+        Chỉ giữ các file còn tồn tại (file đã bị xóa khỏi spool không cần nhớ)
+
+        File checkpoint được ghi lại khi quá nửa số dòng là file đã bị xóa.
+
+        Args:
+            existing: Tập đường dẫn file ảnh hiện có
+        """
+        stale = self.processed.difference(existing)
+        if not stale:
+            return
+        self.processed.difference_update(stale)
+        if self._lines > 2 * len(self.processed):
+            self._rewrite()
+
+    def _rewrite(self):
+        """Ghi lại file checkpoint chỉ với các file còn nhớ (ghi file tạm rồi thay thế)"""
+        temp_path = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for image_path in sorted(self.processed):
+                f.write(image_path + '\n')
+        self._file.close()
+        os.replace(temp_path, self.checkpoint_path)
+        self._file = open(self.checkpoint_path, 'a', encoding='utf-8')
+        self._lines = len(self.processed)
+
+    def close(self):
+        """Đóng file checkpoint"""
+        self._file.close()
+
+
+class FolderWatcher:
+    """
+    Phát hiện file ảnh mới trong thư mục
+
+    File chỉ được coi là sẵn sàng khi kích thước và mtime không đổi giữa hai
+    lần quét liên tiếp (camera có thể đang ghi dở). Nếu có inotify_simple,
+    watcher được đánh thức ngay khi file được ghi xong (IN_CLOSE_WRITE) hoặc
+    được move vào thư mục (IN_MOVED_TO) và chỉ kiểm tra các file có trong sự
+    kiện; quét toàn bộ thư mục vẫn chạy mỗi rescan_interval giây để không bỏ sót.
+    Với recursive=True, mỗi thư mục con có một watch riêng, thư mục con mới
+    được thêm watch ở lần quét kế tiếp.
+
+    File đã trả về chỉ được nhớ tới khi nó có trong processed (checkpoint)
+    hoặc bị xóa khỏi thư mục, nên daemon chạy lâu không bị tăng bộ nhớ.
+    """
+
+    def __init__(self, directory,
+                 poll_interval=2.0,
+                 recursive=False,
+                 use_inotify=True,
+                 processed=None,
+                 extensions=None,
+                 rescan_interval=60.0):
+        """
+        Khởi tạo FolderWatcher
+
+        Args:
+            directory: Thư mục cần theo dõi
+            poll_interval: Khoảng thời gian giữa hai lần quét (giây)
+            recursive: Theo dõi cả thư mục con
+            use_inotify: Dùng inotify nếu có thể
+            processed: Tập/ProcessedCheckpoint các file đã xử lý (bỏ qua); file
+                       đã bị xóa khỏi thư mục được bỏ khỏi tập
+            extensions: Tập extension ảnh (mặc định: IMAGE_EXTENSIONS)
+            rescan_interval: Khoảng thời gian giữa hai lần quét toàn bộ thư mục
+                             khi dùng inotify (giây)
+        """
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.recursive = recursive
+        self.rescan_interval = rescan_interval
+        self.processed = processed if processed is not None else set()
+        self.extensions = (
+            IMAGE_EXTENSIONS if extensions is None
+            else frozenset(ext.lower() for ext in extensions)
+        )
+
+        # Trạng thái (size, mtime_ns) của file chưa ổn định
+        self._pending = {}
+        # File đã trả về nhưng chưa có trong processed
+        self._emitted = set()
+        # File inotify báo đã ghi xong, không cần chờ ổn định
+        self._closed = set()
+        # Thời điểm quét toàn bộ gần nhất (None = chưa quét, hoặc cần quét lại)
+        self._last_full_scan = None
+
+        self._inotify = None
+        # watch descriptor -> thư mục, và ngược lại
+        self._watches = {}
+        self._watched_dirs = {}
+        if use_inotify and INotify is not None:
+            self._inotify = INotify()
+            self._watch_mask = inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO
+            if recursive:
+                # Thư mục con mới được tạo: quét lại để thêm watch
+                self._watch_mask |= inotify_flags.CREATE
+            self._add_watch(directory)
+
+    @property
+    def uses_inotify(self):
+        """Watcher đang dùng inotify hay chỉ quét định kỳ"""
+        return self._inotify is not None
+
+    def _add_watch(self, directory):
+        """Thêm inotify watch cho một thư mục (bỏ qua nếu đã có)"""
+        if self._inotify is None or directory in self._watched_dirs:
+            return
+        try:
+            wd = self._inotify.add_watch(directory, self._watch_mask)
+        except OSError as e:
+            # Ví dụ vượt fs.inotify.max_user_watches: thư mục vẫn được quét định kỳ
+            print(f"Warning: cannot watch {directory} with inotify ({e}), "
+                  f"relying on rescans every {self.rescan_interval}s")
+            self._watched_dirs[directory] = None
+            return
+        self._watches[wd] = directory
+        self._watched_dirs[directory] = wd
+
+    def _is_candidate(self, path):
+        return (os.path.splitext(path)[1].lower() in self.extensions and
+                path not in self.processed and path not in self._emitted)
+
+    def _scan(self):
+        """
+        Quét toàn bộ thư mục
+
+        Returns:
+            found: {path: (size, mtime_ns)} của file ảnh chưa xử lý
+        """
+        found = {}
+        # Mọi file ảnh hiện có (kể cả đã xử lý), để quên các file đã bị xóa
+        existing = set()
+        complete = True
+        stack = [self.directory]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir():
+                                if self.recursive:
+                                    self._add_watch(entry.path)
+                                    stack.append(entry.path)
+                                continue
+                            if os.path.splitext(entry.name)[1].lower() not in self.extensions:
+                                continue
+                            existing.add(entry.path)
+                            if entry.path in self.processed or entry.path in self._emitted:
+                                continue
+                            stat = entry.stat()
+                            found[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                        except OSError:
+                            continue
+            except OSError:
+                complete = False
+                continue
+
+        # Chỉ quên file khi chắc chắn đã quét hết (thư mục không đọc được thì giữ)
+        if complete:
+            self._emitted = {
+                path for path in self._emitted
+                if path in existing and path not in self.processed
+            }
+            self.processed.intersection_update(existing)
+        return found
+
+    def _stat(self, paths):
+        """Chỉ kiểm tra các file cho trước (từ sự kiện inotify hoặc đang chờ ổn định)"""
+        found = {}
+        for path in paths:
+            if not self._is_candidate(path):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            found[path] = (stat.st_size, stat.st_mtime_ns)
+        return found
+
+    def poll(self):
+        """
+        Quét một lần
+
+        Returns:
+            ready: Danh sách file mới đã ghi xong, sắp xếp theo mtime rồi tên
+        """
+        now = time.monotonic()
+        if (self._inotify is None or self._last_full_scan is None or
+                now - self._last_full_scan >= self.rescan_interval):
+            found = self._scan()
+            self._last_full_scan = now
+        else:
+            found = self._stat(self._closed | self._pending.keys())
+        ready = []
+
+        for path, state in found.items():
+            size, _ = state
+            if size > 0 and (path in self._closed or self._pending.get(path) == state):
+                ready.append((state[1], path))
+            else:
+                self._pending[path] = state
+
+        # Bỏ trạng thái của file đã bị xóa
+        for path in list(self._pending):
+            if path not in found:
+                del self._pending[path]
+        self._closed.intersection_update(found)
+
+        ready.sort()
+        paths = [path for _, path in ready]
+        for path in paths:
+            self._pending.pop(path, None)
+            self._closed.discard(path)
+            self._emitted.add(path)
+        return paths
+
+    def wait(self):
+        """Chờ tới lần quét kế tiếp (hoặc tới khi inotify báo có file mới)"""
+        if self._inotify is None:
+            time.sleep(self.poll_interval)
+            return
+
+        for event in self._inotify.read(timeout=int(self.poll_interval * 1000)):
+            if event.mask & inotify_flags.Q_OVERFLOW:
+                # Mất sự kiện: quét lại toàn bộ
+                self._last_full_scan = None
+                continue
+            directory = self._watches.get(event.wd)
+            if directory is None:
+                continue
+            if event.mask & inotify_flags.IGNORED:
+                # Thư mục đã bị xóa
+                del self._watches[event.wd]
+                self._watched_dirs.pop(directory, None)
+                continue
+            if not event.name:
+                continue
+            if event.mask & inotify_flags.ISDIR:
+                if self.recursive:
+                    self._last_full_scan = None
+                continue
+            if event.mask & (inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO):
+                self._closed.add(os.path.join(directory, event.name))
+
+    def watch(self, stop_event=None):
+        """
+        Trả về file mới liên tục cho tới khi stop_event được set
+
+        Args:
+            stop_event: threading.Event để dừng (tùy chọn)
+
+        Yields:
+            image_path: Đường dẫn file ảnh mới
+        """
+        while stop_event is None or not stop_event.is_set():
+            for path in self.poll():
+                yield path
+            self.wait()
+
+    def close(self):
+        """Giải phóng inotify"""
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+            self._watches.clear()
+            self._watched_dirs.clear()
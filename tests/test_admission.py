@@ -0,0 +1,180 @@
+"""
+Test giới hạn tải và thời hạn xử lý
+"""
+
+import sys
+import asyncio
+import threading
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.preprocessing import ImagePreprocessor
+from src.detection import PlateDetector
+from src.recognition import CharacterSegmenter, CharacterRecognizer
+from src.pipeline import StageGraph, RecognitionPipeline
+from src.utils import (
+    Config, Deadline, DeadlineExceeded, AdmissionController, AsyncAdmissionController,
+    AdmissionRejected
+)
+import numpy as np
+
+
+def test_admission_rejects_when_saturated():
+    """Quá số request đồng thời thì chờ; hàng đợi đầy hoặc chờ quá lâu thì bị từ chối"""
+    print("Testing admission control...")
+    admission = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=0.05)
+
+    started = threading.Event()
+    finish = threading.Event()
+
+    def hold():
+        with admission.admit():
+            started.set()
+            finish.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    started.wait()
+
+    # Hàng đợi còn chỗ: chờ tới QUEUE_TIMEOUT rồi bị từ chối
+    try:
+        with admission.admit():
+            assert False, "admitted while saturated"
+    except AdmissionRejected as e:
+        assert e.retry_after >= 1
+
+    # Hàng đợi đầy: từ chối ngay
+    admission.MAX_QUEUE = 0
+    try:
+        with admission.admit():
+            assert False, "admitted with a full queue"
+    except AdmissionRejected:
+        pass
+
+    finish.set()
+    holder.join()
+
+    # Hết hạn khi đang xử lý được đếm riêng
+    try:
+        with admission.admit():
+            raise DeadlineExceeded('plates')
+    except DeadlineExceeded:
+        pass
+
+    stats = admission.stats()
+    assert stats['admitted'] == 2
+    assert stats['completed'] == 1
+    assert stats['queue_timeouts'] == 1
+    assert stats['rejected'] == 1
+    assert stats['timed_out'] == 1
+    assert stats['in_flight'] == 0 and stats['queued'] == 0
+
+    print("✓ Admission control test passed")
+
+
+def test_async_admission_waits_without_threads():
+    """Bản asyncio: request chờ là coroutine, được nhận theo lượt khi có chỗ"""
+    print("Testing async admission control...")
+    admission = AsyncAdmissionController(max_in_flight=2, max_queue=2, queue_timeout=1.0)
+    peak = []
+
+    async def request(hold):
+        async with admission.admit():
+            peak.append(admission.in_flight)
+            await asyncio.sleep(hold)
+
+    async def run():
+        results = await asyncio.gather(*[request(0.02) for _ in range(6)],
+                                       return_exceptions=True)
+        return [isinstance(result, AdmissionRejected) for result in results]
+
+    rejected = asyncio.run(run())
+    # 2 xử lý ngay, 2 chờ, 2 bị từ chối vì hàng đợi đầy
+    assert rejected.count(True) == 2
+    assert max(peak) == 2
+
+    admission.QUEUE_TIMEOUT = 0.01
+
+    async def queue_timeout():
+        async with admission.admit():
+            try:
+                async with admission.admit():
+                    assert False, "admitted over the limit"
+            except AdmissionRejected:
+                pass
+
+    admission.MAX_IN_FLIGHT = 1
+    asyncio.run(queue_timeout())
+
+    stats = admission.stats()
+    assert stats['admitted'] == 5 and stats['completed'] == 5
+    assert stats['rejected'] == 2 and stats['queue_timeouts'] == 1
+    assert stats['in_flight'] == 0 and stats['queued'] == 0
+
+    print("✓ Async admission control test passed")
+
+
+def test_deadline_stops_between_stages():
+    """Hết thời hạn thì stage kế tiếp không được tính"""
+    print("Testing deadlines...")
+    assert not Deadline().expired
+    assert Deadline(None).remaining() == float('inf')
+
+    calls = []
+    graph = StageGraph()
+    graph.add_source('x')
+    graph.add_stage('first', lambda frame, x: calls.append('first') or x + 1, ('x',))
+    graph.add_stage('second', lambda frame, y: calls.append('second') or y * 2, ('first',))
+
+    deadline = Deadline(60)
+    frame = graph.frame(context={'deadline': deadline}, x=1)
+    assert frame['first'] == 2
+    deadline.expires_at = deadline.start
+    try:
+        frame['second']
+        assert False, "stage ran after the deadline"
+    except DeadlineExceeded as e:
+        assert e.stage == 'second'
+    assert calls == ['first']
+
+    # Pipeline nhận dạng: ảnh hết hạn từ đầu không chạy bước nào
+    recognizer = CharacterRecognizer(model_path=str(Config.MODEL_DIR))
+    pipeline = RecognitionPipeline(ImagePreprocessor(), PlateDetector(),
+                                   CharacterSegmenter(), recognizer)
+    img = np.full((540, 960, 3), 60, dtype=np.uint8)
+    frame = pipeline.frame(img, deadline=deadline)
+    try:
+        frame['recognition']
+        assert False, "pipeline ran after the deadline"
+    except DeadlineExceeded as e:
+        assert e.stage == 'value'
+    assert frame.timings == {}
+
+    print("✓ Deadline test passed")
+
+
+def test_deadline_crosses_processes():
+    """Thời hạn truyền sang worker dạng thời điểm tuyệt đối: thời gian chờ trước đó vẫn được tính"""
+    print("Testing wall-clock deadlines...")
+    assert Deadline().wall_time() is None
+    assert Deadline.at(None).remaining() == float('inf')
+    assert Deadline().timeout() is None
+
+    deadline = Deadline(10)
+    remote = Deadline.at(deadline.wall_time())
+    assert 9 < remote.remaining() <= 10
+    assert 9 < remote.timeout() <= 10
+
+    # Hết hạn khi còn chờ trong hàng đợi: worker dừng trước bước đầu tiên
+    deadline.expires_at = deadline.start
+    remote = Deadline.at(deadline.wall_time())
+    assert remote.expired
+    try:
+        remote.check('recognize')
+        assert False, "expired deadline passed the check"
+    except DeadlineExceeded as e:
+        assert e.stage == 'recognize'
+
+    print("✓ Wall-clock deadline test passed")
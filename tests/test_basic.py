@@ -11,7 +11,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 from src.preprocessing import ImagePreprocessor
 from src.detection import PlateDetector
 from src.recognition import CharacterSegmenter, CharacterRecognizer
-from src.utils import Config
+from src.utils import Config, FrameBufferArena
 import cv2
 import numpy as np
 
@@ -36,6 +36,39 @@ def test_preprocessing():
     print("✓ Preprocessing test passed")
 
 
+def test_extract_value_matches_hsv():
+    """Kênh Value tính trực tiếp giống hệt khi chuyển đổi qua HSV"""
+    print("Testing value extraction...")
+    preprocessor = ImagePreprocessor()
+    
+    rng = np.random.default_rng(0)
+    test_img = rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    _, _, expected = cv2.split(cv2.cvtColor(test_img, cv2.COLOR_BGR2HSV))
+    
+    assert np.array_equal(preprocessor.extract_value(test_img), expected)
+    
+    # Ảnh grayscale (camera hồng ngoại) dùng trực tiếp
+    gray_img = expected.copy()
+    assert np.array_equal(preprocessor.extract_value(gray_img), expected)
+    
+    # BGRA: bỏ qua kênh alpha; dùng lại buffer của arena
+    bgra_img = cv2.cvtColor(test_img, cv2.COLOR_BGR2BGRA)
+    bgra_img[:, :, 3] = 255
+    arena = FrameBufferArena()
+    img_value = preprocessor.extract_value(bgra_img, arena)
+    assert np.array_equal(img_value, expected)
+    assert preprocessor.extract_value(test_img, arena) is img_value
+    
+    # Số kênh không hợp lệ
+    try:
+        preprocessor.extract_value(test_img[:, :, :2])
+        assert False, "2-channel image accepted"
+    except ValueError:
+        pass
+    
+    print("✓ Value extraction test passed")
+
+
 def test_detection():
     """Test detection module"""
     print("Testing detection...")
@@ -110,6 +143,7 @@ if __name__ == '__main__':
     
     try:
         test_preprocessing()
+        test_extract_value_matches_hsv()
         test_detection()
         test_recognition()
         test_integration()
@@ -0,0 +1,54 @@
+"""
+Test KNN nhị phân (khoảng cách Hamming trên ký tự nén bit)
+"""
+
+import sys
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.recognition import BinaryKNearest, CharacterRecognizer
+from src.utils import Config
+import numpy as np
+
+
+def test_binary_knn_matches_reference(tmp_path):
+    """Khoảng cách và kết quả bỏ phiếu khớp với cách tính trực tiếp"""
+    print("Testing binary KNN...")
+    rng = np.random.default_rng(2)
+    train = (rng.random((50, 600)) > 0.5).astype(np.float32) * 255
+    labels = rng.integers(65, 70, 50).astype(np.float32)
+    test = (rng.random((7, 600)) > 0.5).astype(np.float32) * 255
+
+    knn = BinaryKNearest()
+    knn.train(train, labels)
+    assert knn.packed.shape == (50, 75)
+
+    results, responses, distances = knn.find_nearest(test, k=3)
+    expected = (test[:, None, :] > 127) != (train[None, :, :] > 127)
+    expected = expected.sum(axis=2)
+    assert np.array_equal(distances, np.sort(expected, axis=1)[:, :3])
+    for row, result in zip(responses, results[:, 0]):
+        values, counts = np.unique(row, return_counts=True)
+        assert counts[values == result][0] == counts.max()
+
+    # Lưu / tải model nén
+    path = tmp_path / "glyphs.npz"
+    knn.save(path)
+    loaded = BinaryKNearest.load(path)
+    assert np.array_equal(loaded.find_nearest(test, k=3)[0], results)
+    print("✓ Binary KNN test passed")
+
+
+def test_binary_recognizer():
+    """CharacterRecognizer với model nhị phân nhận dạng đúng mẫu huấn luyện"""
+    print("Testing binary recognizer...")
+    recognizer = CharacterRecognizer(model_path=str(Config.MODEL_DIR), model_type="binary")
+    samples = np.loadtxt(Config.MODEL_DIR / Config.FLATTENED_IMAGES_FILE, np.float32)
+    labels = np.loadtxt(Config.MODEL_DIR / Config.CLASSIFICATIONS_FILE, np.float32)
+
+    characters = recognizer.classify_flattened(samples[:20])
+    accuracy = np.mean([c == chr(int(label)) for c, label in zip(characters, labels[:20])])
+    assert accuracy >= 0.8
+    print("✓ Binary recognizer test passed")
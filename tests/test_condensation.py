@@ -0,0 +1,73 @@
+"""
+Test thu gọn tập huấn luyện KNN
+"""
+
+import sys
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.recognition import (
+    CharacterRecognizer, condense_training_set, save_model, load_model_samples, split_held_out
+)
+from src.recognition.condensation import condensed_nearest_neighbour, edited_nearest_neighbours
+import numpy as np
+
+
+def make_clusters(rng, per_class=20):
+    """Hai nhãn, mỗi nhãn là một cụm ký tự quanh một mẫu gốc"""
+    centers = (rng.random((2, 600)) > 0.5).astype(np.float32) * 255
+    samples, labels = [], []
+    for label, center in zip((65, 66), centers):
+        noise = rng.normal(0, 20, (per_class, 600))
+        samples.append(np.clip(center + noise, 0, 255))
+        labels.append(np.full(per_class, label))
+    return np.vstack(samples).astype(np.float32), np.concatenate(labels).astype(np.float32)
+
+
+def test_condensation_keeps_accuracy():
+    """Các phương pháp thu gọn giữ đủ nhãn và vẫn nhận dạng đúng tập gốc"""
+    print("Testing training-set condensation...")
+    rng = np.random.default_rng(4)
+    samples, labels = make_clusters(rng)
+
+    keep = condensed_nearest_neighbour(samples, labels)
+    assert len(keep) < len(samples)
+    assert set(labels[keep]) == {65, 66}
+
+    # Mẫu gán nhãn sai bị ENN loại bỏ
+    noisy = labels.copy()
+    noisy[0] = 66
+    assert 0 not in edited_nearest_neighbours(samples, noisy, k=3)
+
+    for method in ('cnn', 'enn', 'enn+cnn', 'kmeans'):
+        condensed, condensed_labels = condense_training_set(
+            samples, labels, method=method, per_class=2, max_per_class=5
+        )
+        assert len(condensed) <= 10
+        distances = ((samples[:, None, :] - condensed[None, :, :]) ** 2).sum(axis=2)
+        assert np.array_equal(condensed_labels[np.argmin(distances, axis=1)], labels)
+    print("✓ Condensation test passed")
+
+
+def test_condensed_model_loads(tmp_path):
+    """Model thu gọn được ghi theo định dạng CharacterRecognizer đọc được"""
+    print("Testing condensed model format...")
+    rng = np.random.default_rng(5)
+    samples, labels = make_clusters(rng)
+    condensed, condensed_labels = condense_training_set(samples, labels, per_class=3)
+    save_model(str(tmp_path), condensed, condensed_labels)
+
+    recognizer = CharacterRecognizer(model_path=str(tmp_path), k_neighbors=1)
+    assert recognizer.classify_flattened(samples[:1]) == ['A']
+    assert recognizer.classify_flattened(samples[-1:]) == ['B']
+
+    loaded, loaded_labels = load_model_samples(str(tmp_path))
+    assert np.allclose(loaded, condensed) and np.array_equal(loaded_labels, condensed_labels)
+
+    # Mỗi nhãn giữ lại ít nhất một mẫu train
+    train_idx, test_idx = split_held_out(loaded_labels, 0.5, np.random.default_rng(0))
+    assert sorted(np.concatenate([train_idx, test_idx])) == list(range(len(loaded_labels)))
+    assert set(loaded_labels[train_idx]) == set(loaded_labels)
+    print("✓ Condensed model test passed")
@@ -0,0 +1,56 @@
+"""
+Test các đặc trưng ký tự ít chiều
+"""
+
+import sys
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.recognition import CharacterRecognizer, PCAFeatures, create_feature_extractor
+from src.utils import Config
+import numpy as np
+
+
+def test_feature_dimensions():
+    """Mỗi loại đặc trưng trả về đúng số chiều, xử lý cả batch"""
+    print("Testing feature extractors...")
+    rng = np.random.default_rng(3)
+    samples = (rng.random((12, 600)) > 0.5).astype(np.float32) * 255
+
+    for name, dimension in [('pixels', 600), ('zoning', 44), ('hog', 54), ('pca', 10)]:
+        kwargs = {'components': 10} if name == 'pca' else {}
+        extractor = create_feature_extractor(name, **kwargs).fit(samples)
+        features = extractor.transform(samples)
+        assert features.shape == (12, dimension)
+        assert features.dtype == np.float32
+        # Biến đổi batch giống biến đổi từng ký tự
+        assert np.allclose(extractor.transform(samples[3:4]), features[3:4], atol=1e-4)
+
+    # Zoning: ô trên cùng bên trái đầy pixel trắng
+    glyph = np.zeros((1, 30, 20), dtype=np.float32)
+    glyph[:, :5, :5] = 255
+    zoning = create_feature_extractor('zoning').transform(glyph.reshape(1, 600))
+    assert zoning[0, 0] == 1.0 and zoning[0, 1] == 0.0
+    print("✓ Feature extractor test passed")
+
+
+def test_pca_saved_with_model(tmp_path):
+    """PCA fit offline được tải lại khi khởi tạo CharacterRecognizer"""
+    print("Testing PCA features...")
+    samples = np.loadtxt(Config.MODEL_DIR / Config.FLATTENED_IMAGES_FILE, np.float32)
+    labels = np.loadtxt(Config.MODEL_DIR / Config.CLASSIFICATIONS_FILE, np.float32)
+    for filename in (Config.CLASSIFICATIONS_FILE, Config.FLATTENED_IMAGES_FILE):
+        (tmp_path / filename).write_bytes((Config.MODEL_DIR / filename).read_bytes())
+    PCAFeatures(components=24).fit(samples).save(tmp_path / Config.FEATURES_FILE)
+
+    recognizer = CharacterRecognizer(
+        model_path=str(tmp_path), features='pca', features_file=Config.FEATURES_FILE
+    )
+    assert recognizer.feature_extractor.dimension == 24
+
+    characters = recognizer.classify_flattened(samples)
+    accuracy = np.mean([c == chr(int(label)) for c, label in zip(characters, labels)])
+    assert accuracy >= 0.8
+    print("✓ PCA features test passed")
@@ -0,0 +1,116 @@
+"""
+Test các hàm đọc/giải mã ảnh
+"""
+
+import sys
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils import load_image, decode_image, iter_image_files, ImageTooLarge
+from src.utils.file_utils import read_image_info, choose_reduction_factor
+import cv2
+import numpy as np
+
+
+def test_read_image_info():
+    """Đọc kích thước từ header JPEG/PNG"""
+    img = np.zeros((90, 160, 3), dtype=np.uint8)
+    _, jpeg = cv2.imencode('.jpg', img)
+    _, png = cv2.imencode('.png', img[:, :, 0])
+
+    assert read_image_info(jpeg) == ('jpeg', 160, 90, 3)
+    assert read_image_info(png) == ('png', 160, 90, 1)
+    assert read_image_info(b'not an image') is None
+
+
+def test_reduced_decode():
+    """Ảnh JPEG lớn được giải mã ở độ phân giải giảm nhưng không nhỏ hơn target"""
+    print("Testing reduced decode...")
+    assert choose_reduction_factor(3840, 2160, (1920, 1080)) == 2
+    assert choose_reduction_factor(7680, 4320, (1920, 1080)) == 4
+    assert choose_reduction_factor(2160, 3840, (1920, 1080)) == 2
+    assert choose_reduction_factor(1920, 1080, (1920, 1080)) == 1
+    assert choose_reduction_factor(3000, 2000, (1920, 1080)) == 1
+
+    img = np.zeros((2160, 3840, 3), dtype=np.uint8)
+    cv2.rectangle(img, (100, 100), (1000, 600), (255, 255, 255), -1)
+    _, jpeg = cv2.imencode('.jpg', img)
+
+    decoded, decode_time = decode_image(jpeg, (1920, 1080))
+    assert decoded.shape == (1080, 1920, 3)
+    assert decode_time >= 0
+
+    decoded_full, _ = decode_image(jpeg)
+    assert decoded_full.shape == (2160, 3840, 3)
+
+    print("✓ Reduced decode test passed")
+
+
+def test_pixel_limit_decode():
+    """Ảnh vượt giới hạn pixel được giải mã thu nhỏ, không thu nhỏ được thì bị từ chối"""
+    print("Testing pixel limit...")
+    img = np.zeros((2160, 3840, 3), dtype=np.uint8)
+    _, jpeg = cv2.imencode('.jpg', img)
+    _, png = cv2.imencode('.png', img)
+
+    decoded, _ = decode_image(jpeg, max_pixels=1_000_000)
+    assert decoded.shape == (540, 960, 3)
+    assert decode_image(png, max_pixels=10_000_000)[0].shape == (2160, 3840, 3)
+
+    _, bmp = cv2.imencode('.bmp', img)
+    for data in (png, jpeg, bmp):
+        try:
+            decode_image(data, max_pixels=100_000)
+            assert False, "oversized image decoded"
+        except ImageTooLarge as e:
+            assert (e.width, e.height) == (3840, 2160)
+
+    # 0 = không giới hạn
+    assert decode_image(bmp, max_pixels=0)[0].shape == (2160, 3840, 3)
+
+    print("✓ Pixel limit test passed")
+
+
+def test_grayscale_decode(tmp_path):
+    """Ảnh 1 kênh được giải mã thẳng thành grayscale khi cho phép"""
+    gray = np.full((50, 80), 128, dtype=np.uint8)
+    path = tmp_path / "ir.png"
+    cv2.imwrite(str(path), gray)
+
+    assert load_image(str(path)).shape == (50, 80, 3)
+    assert load_image(str(path), allow_grayscale=True).shape == (50, 80)
+    assert load_image(str(tmp_path / "missing.jpg")) is None
+
+
+def _touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'')
+
+
+def test_iter_image_files(tmp_path):
+    """Duyệt thư mục lồng nhau, glob và file danh sách"""
+    _touch(tmp_path / "b.jpg")
+    _touch(tmp_path / "a.PNG")
+    _touch(tmp_path / "notes.md")
+    _touch(tmp_path / "2026-10-01" / "cam1" / "c.jpg")
+    _touch(tmp_path / "2026-10-02" / "cam2" / "d.bmp")
+
+    flat = list(iter_image_files(str(tmp_path), ordered=True))
+    assert [Path(p).name for p in flat] == ["a.PNG", "b.jpg"]
+
+    nested = list(iter_image_files(str(tmp_path), recursive=True, ordered=True))
+    assert [Path(p).name for p in nested] == ["a.PNG", "b.jpg", "c.jpg", "d.bmp"]
+    assert sorted(iter_image_files(str(tmp_path), recursive=True)) == sorted(nested)
+
+    pattern = str(tmp_path / "**" / "*.jpg")
+    assert [Path(p).name for p in iter_image_files(pattern, ordered=True)] == ["c.jpg", "b.jpg"]
+
+    manifest = tmp_path / "list.txt"
+    manifest.write_text("# comment\n2026-10-02/cam2/d.bmp\n\nb.jpg\n", encoding='utf-8')
+    assert [Path(p).name for p in iter_image_files(str(manifest))] == ["d.bmp", "b.jpg"]
+
+    manifest_jsonl = tmp_path / "list.jsonl"
+    manifest_jsonl.write_text('{"path": "b.jpg"}\n{"image": "a.PNG"}\n', encoding='utf-8')
+    assert [Path(p).name for p in iter_image_files(str(manifest_jsonl))] == ["b.jpg", "a.PNG"]
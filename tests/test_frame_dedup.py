@@ -0,0 +1,101 @@
+"""
+Test bỏ qua khung hình trùng (dHash theo camera)
+"""
+
+import sys
+import json
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.preprocessing import FrameDeduplicator, dhash, hamming_distance, load_dedup_config
+import cv2
+import numpy as np
+
+
+def _make_scene(x, text="51A"):
+    """Ảnh test: nền phẳng với một biển số giả tại hoành độ x (None = cảnh trống)"""
+    img = np.full((540, 960, 3), 60, dtype=np.uint8)
+    if x is not None:
+        cv2.rectangle(img, (x, 200), (x + 200, 300), (240, 240, 240), -1)
+        cv2.putText(img, text, (x + 20, 260), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 4)
+    return img
+
+
+def _add_noise(img, seed):
+    rng = np.random.default_rng(seed)
+    return np.clip(img.astype(np.int16) + rng.normal(0, 6, img.shape), 0, 255).astype(np.uint8)
+
+
+def test_dhash_ignores_noise():
+    """Nhiễu cảm biến không đổi hash, cảnh thay đổi thì đổi hash"""
+    print("Testing dHash...")
+    scene = _make_scene(300)
+    base = dhash(scene)
+    assert base.bit_length() <= 64
+    for seed in range(3):
+        assert hamming_distance(base, dhash(_add_noise(scene, seed))) <= 1
+    assert hamming_distance(base, dhash(_make_scene(650))) > 4
+    assert dhash(cv2.cvtColor(scene, cv2.COLOR_BGR2GRAY)) == base
+    assert dhash(scene, hash_size=16).bit_length() <= 256
+
+    print("✓ dHash test passed")
+
+
+def test_changed_plate_not_skipped():
+    """Xe khác dừng đúng chỗ xe cũ, hoặc xe vào cảnh trống, không bị coi là trùng"""
+    print("Testing changed plates...")
+    dedup = FrameDeduplicator()
+    for before, after in [(_make_scene(300, "51A"), _make_scene(300, "30F")),
+                          (_make_scene(None), _make_scene(300, "51A"))]:
+        signature, _ = dedup.check('cam01', before)
+        dedup.update('cam01', signature, ['before'])
+        # Nhiễu cảm biến vẫn được bỏ qua với ngưỡng mặc định
+        assert dedup.check('cam01', _add_noise(before, 0))[1] == ['before']
+        assert dedup.check('cam01', after)[1] is None
+        assert dedup.check('cam01', _add_noise(after, 1))[1] is None
+
+    print("✓ Changed plate test passed")
+
+
+def test_deduplicator_per_camera(tmp_path):
+    """So với khung hình xử lý gần nhất của cùng camera, ngưỡng riêng theo camera"""
+    print("Testing frame deduplicator...")
+    dedup = FrameDeduplicator(threshold=4, thresholds={'cam02': None})
+    scene = _make_scene(300)
+
+    # Khung hình đầu tiên của mỗi camera luôn được xử lý
+    signature, previous = dedup.check('cam01', scene)
+    assert previous is None
+    dedup.update('cam01', signature, ['51A'])
+
+    assert dedup.check('cam01', _add_noise(scene, 1))[1] == ['51A']
+    assert dedup.check('cam01', _make_scene(650))[1] is None
+    # Camera khác không dùng chung khung hình tham chiếu
+    assert dedup.check('cam03', scene)[1] is None
+    # Kích thước khác thì không trùng
+    assert dedup.check('cam01', cv2.resize(scene, (480, 270)))[1] is None
+
+    # Ngưỡng None: không bỏ qua khung hình nào
+    signature, _ = dedup.check('cam02', scene)
+    dedup.update('cam02', signature, ['51A'])
+    assert dedup.check('cam02', scene)[1] is None
+
+    stats = dedup.stats()
+    assert stats['cam01'] == {'frames': 4, 'skipped': 1, 'skip_rate': 0.25, 'threshold': 4}
+    assert stats['cam02']['threshold'] is None and stats['cam02']['skipped'] == 0
+    assert dedup.skip_rate() == 1 / 7
+
+    # File cấu hình ngưỡng theo camera
+    config_path = tmp_path / "dedup.json"
+    config_path.write_text(json.dumps({"cam01": 6, "cam02": None}))
+    assert load_dedup_config(str(config_path)) == {'cam01': 6, 'cam02': None}
+    config_path.write_text(json.dumps({"cam01": -1}))
+    try:
+        load_dedup_config(str(config_path))
+        assert False, "negative threshold accepted"
+    except ValueError:
+        pass
+
+    print("✓ Frame deduplicator test passed")
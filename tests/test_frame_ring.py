@@ -0,0 +1,56 @@
+"""
+Test truyền khung hình qua shared memory
+"""
+
+import sys
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils import SharedFrameRing, SharedFramePool
+import cv2
+import numpy as np
+
+
+def test_frame_ring_roundtrip():
+    """Ghi vào ô và đọc lại dưới dạng view, kể cả khi resize lúc ghi"""
+    print("Testing shared frame ring...")
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 255, (120, 160, 3), dtype=np.uint8)
+
+    ring = SharedFrameRing(2, (120, 160, 3))
+    try:
+        slot = ring.acquire()
+        assert np.array_equal(ring.read(ring.write(slot, img)), img)
+
+        # Gắn vào ring từ "tiến trình khác" thấy cùng dữ liệu, không copy
+        other = SharedFrameRing(2, (120, 160, 3), name=ring.name)
+        header = ring.write(slot, img, size=(80, 60))
+        assert np.array_equal(other.read(header), cv2.resize(img, (80, 60)))
+        other.close()
+
+        # Ảnh lớn hơn ô bị từ chối
+        try:
+            ring.write(slot, np.zeros((240, 320, 3), np.uint8))
+            assert False, "oversized frame accepted"
+        except ValueError:
+            pass
+        ring.release(slot)
+    finally:
+        ring.close()
+
+    print("✓ Shared frame ring test passed")
+
+
+def test_frame_pool_results():
+    """Worker đọc khung hình từ shared memory, ô được trả lại sau mỗi khung hình"""
+    print("Testing shared frame pool...")
+    frames = [np.full((60, 80), i, dtype=np.uint8) for i in range(10)]
+
+    with SharedFramePool(2, (60, 80), slots=2) as pool:
+        futures = [pool.submit(np.sum, frame) for frame in frames]
+        assert [future.result() for future in futures] == [i * 60 * 80 for i in range(10)]
+        assert pool.ring._free.qsize() == 2
+
+    print("✓ Shared frame pool test passed")
@@ -0,0 +1,37 @@
+"""
+Test cache LRU theo ký tự của CharacterRecognizer
+"""
+
+import sys
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.recognition import CharacterRecognizer
+from src.utils import Config
+import numpy as np
+
+
+def test_glyph_cache_hits_and_eviction():
+    """Ký tự lặp lại không chạy lại KNN, cache bị giới hạn kích thước"""
+    print("Testing glyph cache...")
+    plain = CharacterRecognizer(model_path=str(Config.MODEL_DIR))
+    cached = CharacterRecognizer(model_path=str(Config.MODEL_DIR), cache_size=4)
+
+    rng = np.random.default_rng(1)
+    glyphs = [(rng.random((30, 20)) > 0.5).astype(np.uint8) * 255 for _ in range(6)]
+    char_imgs = glyphs[:3] + glyphs[:3]
+
+    assert cached.recognize_characters(char_imgs) == plain.recognize_characters(char_imgs)
+    assert cached.cache_hits == 3
+    assert cached.cache_misses == 3
+
+    cached.recognize_characters(glyphs)
+    assert cached.cache_info['size'] == 4
+
+    # Tải lại model thì cache bị xóa
+    cached.load_model(str(Config.MODEL_DIR), Config.CLASSIFICATIONS_FILE,
+                      Config.FLATTENED_IMAGES_FILE)
+    assert cached.cache_info['size'] == 0
+    print("✓ Glyph cache test passed")
@@ -0,0 +1,116 @@
+"""
+Test tập ký tự append-only, dataset builder và tải lại model
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.recognition import CharacterRecognizer, GlyphStore, build_glyph_dataset
+from src.utils import Config
+import cv2
+import numpy as np
+
+
+def test_glyph_store_append_only(tmp_path):
+    """Append chỉ ghi thêm, phần ghi dở không hiển thị với người đọc"""
+    print("Testing glyph store...")
+    store = GlyphStore(tmp_path / "store")
+    assert len(store) == 0 and store.version == 0
+
+    rng = np.random.default_rng(6)
+    first = rng.integers(0, 256, (5, 600)).astype(np.float32)
+    second = rng.integers(0, 256, (3, 600)).astype(np.float32)
+    assert store.append(first, [65] * 5) == 1
+    samples_file = tmp_path / "store" / GlyphStore.SAMPLES_FILE
+    head = samples_file.read_bytes()
+
+    # Lần ghi bị gián đoạn: dữ liệu thừa ở cuối file nhưng version chưa đổi
+    with open(samples_file, 'ab') as f:
+        f.write(b'\xff' * 100)
+    samples, labels = GlyphStore(tmp_path / "store").read()
+    assert np.array_equal(samples, first)
+
+    assert store.append(second, [66] * 3) == 2
+    assert samples_file.read_bytes()[:len(head)] == head
+    samples, labels = store.read()
+    assert np.array_equal(samples, np.vstack([first, second]))
+    assert list(labels) == [65] * 5 + [66] * 3
+    print("✓ Glyph store test passed")
+
+
+def test_build_dataset_and_reload(tmp_path):
+    """Ký tự đã gán nhãn được thêm vào store, recognizer đang chạy tự tải lại"""
+    print("Testing dataset builder and model reload...")
+    model_samples = np.loadtxt(Config.MODEL_DIR / Config.FLATTENED_IMAGES_FILE, np.float32)
+    model_labels = np.loadtxt(Config.MODEL_DIR / Config.CLASSIFICATIONS_FILE, np.float32)
+    store = GlyphStore(tmp_path / "store")
+    store.append(model_samples, model_labels)
+
+    recognizer = CharacterRecognizer(
+        model_path=str(tmp_path), flattened_images_file="store", k_neighbors=1,
+        cache_size=16
+    )
+    glyph = np.zeros((30, 20), dtype=np.uint8)
+    cv2.circle(glyph, (10, 15), 6, 255, -1)
+    before = recognizer.recognize_character(glyph)
+    assert not recognizer.reload_if_changed()
+
+    # Ký tự mới, nhãn '#'
+    crops = tmp_path / "crops"
+    (crops / "#").mkdir(parents=True)
+    cv2.imwrite(str(crops / "#" / "dot.png"), cv2.resize(glyph, (40, 60)))
+    (crops / "ignored_label").mkdir()
+    samples, labels, skipped = build_glyph_dataset([str(crops)], workers=2)
+    assert samples.shape == (1, 600) and list(labels) == [ord('#')] and not skipped
+    store.append(samples, labels)
+
+    # Nhận dạng song song trong khi tải lại model
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(50):
+                recognizer.recognize_character(glyph)
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert recognizer.reload_if_changed()
+    thread.join()
+    assert not errors
+    assert recognizer.recognize_character(glyph) == '#' != before
+    print("✓ Dataset builder test passed")
+
+
+def test_recognizer_switches_to_glyph_store(tmp_path):
+    """Store được tạo sau khi khởi động thay model text; features_file đổi thì tải lại"""
+    print("Testing glyph store discovery...")
+    model_samples = np.loadtxt(Config.MODEL_DIR / Config.FLATTENED_IMAGES_FILE, np.float32)
+    model_labels = np.loadtxt(Config.MODEL_DIR / Config.CLASSIFICATIONS_FILE, np.float32)
+    np.savetxt(tmp_path / "classifications.txt", model_labels)
+    np.savetxt(tmp_path / "flattened_images.txt", model_samples)
+
+    recognizer = CharacterRecognizer(
+        model_path=str(tmp_path), k_neighbors=1,
+        features_file="features_pca.npz", glyph_store="glyph_store"
+    )
+    glyph = np.zeros((30, 20), dtype=np.uint8)
+    cv2.circle(glyph, (10, 15), 6, 255, -1)
+    assert recognizer.recognize_character(glyph) != '#'
+    assert not recognizer.reload_if_changed()
+
+    sample = cv2.resize(glyph, (20, 30)).reshape(1, -1)
+    GlyphStore(tmp_path / "glyph_store").append(
+        np.vstack([model_samples, sample]), np.append(model_labels, ord('#'))
+    )
+    assert recognizer.reload_if_changed()
+    assert recognizer.recognize_character(glyph) == '#'
+
+    (tmp_path / "features_pca.npz").write_bytes(b'')
+    assert recognizer.model_changed()
+    print("✓ Glyph store discovery test passed")
@@ -0,0 +1,46 @@
+"""
+Test gom batch nhận dạng ký tự giữa các request
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.recognition import CharacterRecognizer, MicroBatchClassifier
+from src.utils import Config
+import numpy as np
+
+
+def test_micro_batch_matches_direct():
+    """Kết quả gom batch giống nhận dạng trực tiếp, từ nhiều thread"""
+    print("Testing micro-batching...")
+    recognizer = CharacterRecognizer(model_path=str(Config.MODEL_DIR))
+    batcher = MicroBatchClassifier(recognizer, max_wait_ms=5, max_batch_size=64)
+
+    rng = np.random.default_rng(0)
+    requests = [
+        [(rng.random((30, 20)) > 0.5).astype(np.uint8) * 255 for _ in range(1 + i % 9)]
+        for i in range(40)
+    ]
+    expected = [recognizer.recognize_characters(char_imgs) for char_imgs in requests]
+
+    results = [None] * len(requests)
+
+    def worker(index):
+        results[index] = batcher.recognize_characters(requests[index])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+
+    assert results == expected
+    assert batcher.samples == sum(len(r) for r in requests)
+    assert batcher.batches < len(requests)
+
+    print("✓ Micro-batching test passed")
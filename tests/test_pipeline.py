@@ -0,0 +1,163 @@
+"""
+Test stage graph của pipeline nhận dạng
+"""
+
+import sys
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.preprocessing import ImagePreprocessor
+from src.detection import PlateDetector
+from src.recognition import CharacterSegmenter, CharacterRecognizer
+from src.pipeline import StageGraph, RecognitionPipeline
+from src.utils import Config
+import cv2
+import numpy as np
+
+
+def test_stage_graph_lazy_and_memoized():
+    """Chỉ tính các stage được yêu cầu, mỗi stage một lần mỗi khung hình"""
+    print("Testing stage graph...")
+    calls = []
+    scale = {'factor': 2}
+
+    graph = StageGraph()
+    graph.add_source('x')
+    graph.add_stage('double', lambda frame, x: calls.append('double') or x * scale['factor'],
+                    ('x',), lambda: (scale['factor'],))
+    graph.add_stage('plus', lambda frame, y: calls.append('plus') or y + 1, ('double',))
+    graph.add_stage('other', lambda frame, x: calls.append('other') or -x, ('x',))
+
+    frame = graph.frame(x=3)
+    assert frame['plus'] == 7
+    assert frame['plus'] == 7
+    assert calls == ['double', 'plus']
+    assert 'other' not in frame
+
+    # Gán sẵn kết quả: các stage phía trên không được tính
+    calls.clear()
+    frame = graph.frame(x=3)
+    frame.preset('double', 10)
+    assert frame['plus'] == 11
+    assert calls == ['plus']
+
+    # Chữ ký đổi theo tham số của stage và của các stage phía trên
+    signature = graph.signature('plus')
+    assert graph.signature('other') == graph.signature('other')
+    scale['factor'] = 3
+    assert graph.signature('plus') != signature
+
+    print("✓ Stage graph test passed")
+
+
+def test_pipeline_matches_components():
+    """Kết quả các stage giống cách gọi trực tiếp preprocess / detect_plates"""
+    print("Testing recognition pipeline...")
+    img = np.full((1080, 1920, 3), 60, dtype=np.uint8)
+    cv2.rectangle(img, (800, 500), (1220, 720), (240, 240, 240), -1)
+    cv2.putText(img, "51A", (840, 590), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (0, 0, 0), 8)
+    cv2.putText(img, "12345", (830, 690), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (0, 0, 0), 8)
+
+    preprocessor = ImagePreprocessor()
+    detector = PlateDetector()
+    segmenter = CharacterSegmenter()
+    recognizer = CharacterRecognizer(model_path=str(Config.MODEL_DIR))
+    pipeline = RecognitionPipeline(preprocessor, detector, segmenter, recognizer)
+
+    img_grayscale, img_thresh = preprocessor.preprocess(img)
+    plates, contours = detector.detect_plates(img, img_grayscale, img_thresh)
+
+    frame = pipeline.frame(img)
+    assert np.array_equal(frame['threshold'], img_thresh)
+    plates_graph, contours_graph = frame['plates']
+    assert len(plates_graph) == len(plates) > 0
+    assert all(np.array_equal(a, b) for a, b in zip(contours_graph, contours))
+
+    expected = [recognizer.recognize_plate_with_confidence(
+        *segmenter.classify_lines(segmenter.segment_characters(roi_thresh)[0],
+                                  roi_thresh.shape[0])
+    ) for _, roi_thresh in plates]
+    assert RecognitionPipeline.readings(frame) == [r for r in expected if r[0]]
+
+    # Khung hình từ biển số có sẵn không chạy các bước phát hiện
+    frame = pipeline.plates_frame(plates)
+    assert RecognitionPipeline.readings(frame) == [r for r in expected if r[0]]
+    assert 'threshold' not in frame
+
+    # Đổi tham số nhận dạng không làm đổi chữ ký của các bước phát hiện
+    plates_signature = pipeline.signature('plates')
+    recognition_signature = pipeline.signature('recognition')
+    recognizer.K_NEIGHBORS = 1
+    assert pipeline.signature('plates') == plates_signature
+    assert pipeline.signature('recognition') != recognition_signature
+
+    print("✓ Recognition pipeline test passed")
+
+
+def test_stage_cache_reruns_only_downstream():
+    """Đổi tham số phân đoạn chỉ chạy lại phân đoạn và nhận dạng"""
+    print("Testing stage cache...")
+    img = np.full((540, 960, 3), 60, dtype=np.uint8)
+    cv2.rectangle(img, (300, 200), (520, 320), (240, 240, 240), -1)
+
+    segmenter = CharacterSegmenter()
+    recognizer = CharacterRecognizer(model_path=str(Config.MODEL_DIR))
+    pipeline = RecognitionPipeline(ImagePreprocessor(), PlateDetector(), segmenter, recognizer)
+
+    cache = {}
+    first = pipeline.frame(img, cache=cache)
+    first['recognition']
+    assert first.cache_hits == set()
+
+    segmenter.MIN_CHAR_AREA_RATIO = 0.02
+    second = pipeline.frame(img, cache=cache)
+    second['recognition']
+    assert second.cache_hits == {'plates'}
+    assert 'threshold' not in second
+
+    # Cấu hình cũ lấy thẳng kết quả cuối từ cache
+    segmenter.MIN_CHAR_AREA_RATIO = 0.01
+    third = pipeline.frame(img, cache=cache)
+    assert third['recognition'] == first['recognition']
+    assert third.cache_hits == {'recognition'}
+
+    print("✓ Stage cache test passed")
+
+
+class FailFirstBatch:
+    """Classifier lỗi ở lần gọi đầu tiên (cả khung hình), sau đó bình thường"""
+
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self.calls = []
+
+    def classify_with_confidence(self, samples):
+        self.calls.append(len(samples))
+        if len(self.calls) == 1:
+            raise RuntimeError("batch failed")
+        return self.recognizer.classify_with_confidence(samples)
+
+
+def test_recognition_falls_back_per_plate():
+    """Nhận dạng cả khung hình lỗi thì nhận dạng lại từng biển số"""
+    print("Testing per-plate recognition fallback...")
+    img = np.full((1080, 1920, 3), 60, dtype=np.uint8)
+    cv2.rectangle(img, (800, 500), (1220, 720), (240, 240, 240), -1)
+    cv2.putText(img, "51A", (840, 590), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (0, 0, 0), 8)
+    cv2.putText(img, "12345", (830, 690), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (0, 0, 0), 8)
+
+    recognizer = CharacterRecognizer(model_path=str(Config.MODEL_DIR))
+    pipeline = RecognitionPipeline(ImagePreprocessor(), PlateDetector(),
+                                   CharacterSegmenter(), recognizer)
+    plates = pipeline.frame(img)['plates'][0]
+    expected = RecognitionPipeline.readings(pipeline.plates_frame(plates * 2))
+    assert len(expected) > 0
+
+    classifier = FailFirstBatch(recognizer)
+    pipeline = RecognitionPipeline(ImagePreprocessor(), PlateDetector(),
+                                   CharacterSegmenter(), classifier)
+    assert RecognitionPipeline.readings(pipeline.plates_frame(plates * 2)) == expected
+    assert len(classifier.calls) > 2
+    print("✓ Per-plate recognition fallback test passed")
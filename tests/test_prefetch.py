@@ -0,0 +1,55 @@
+"""
+Test đọc trước ảnh khi xử lý hàng loạt
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils import ImagePrefetcher
+import numpy as np
+
+
+def test_prefetch_keeps_order_and_depth():
+    """Ảnh được trả về đúng thứ tự và số ảnh đọc trước không vượt quá depth"""
+    print("Testing prefetcher...")
+    lock = threading.Lock()
+    state = {'in_flight': 0, 'max_in_flight': 0}
+
+    def load_fn(path):
+        with lock:
+            state['in_flight'] += 1
+            state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+        time.sleep(0.005 * (path % 3))
+        with lock:
+            state['in_flight'] -= 1
+        if path == 5:
+            return None, 0.0
+        return np.full((4, 4), path, dtype=np.uint8), 0.001
+
+    frames = list(ImagePrefetcher(range(20), load_fn, depth=3, workers=3))
+
+    assert [path for path, _, _ in frames] == list(range(20))
+    assert frames[5][1] is None
+    assert all(img[0, 0] == path for path, img, _ in frames if img is not None)
+    assert state['max_in_flight'] <= 3
+
+    print("✓ Prefetcher test passed")
+
+
+def test_prefetch_byte_budget():
+    """Giới hạn bộ nhớ chỉ cho phép đọc trước số ảnh vừa đủ"""
+    submitted = []
+
+    def load_fn(path):
+        submitted.append(path)
+        return np.zeros(1000, dtype=np.uint8), 0.0
+
+    prefetcher = ImagePrefetcher(range(10), load_fn, depth=8, max_bytes=2500, workers=1)
+    for path, _, _ in prefetcher:
+        # Sau ảnh đầu tiên, mỗi lần chỉ có tối đa 2 ảnh đang chờ
+        assert len(submitted) - path <= 3
@@ -0,0 +1,41 @@
+"""
+Test phát hiện biển số coarse-to-fine
+"""
+
+import sys
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.preprocessing import ImagePreprocessor
+from src.detection import PlateDetector, CoarseToFineDetector
+import cv2
+import numpy as np
+
+
+def test_coarse_to_fine_matches_single_scale():
+    """Kết quả coarse-to-fine tương đương cách xử lý một mức"""
+    print("Testing coarse-to-fine detection...")
+    img = np.full((1080, 1920, 3), 60, dtype=np.uint8)
+    cv2.rectangle(img, (800, 500), (1200, 700), (240, 240, 240), -1)
+
+    preprocessor = ImagePreprocessor()
+    detector = PlateDetector()
+    img_grayscale, img_thresh = preprocessor.preprocess(img)
+    plates, contours = detector.detect_plates(img, img_grayscale, img_thresh)
+
+    pyramid = CoarseToFineDetector(preprocessor, detector)
+    plates_c2f, contours_c2f = pyramid.detect_plates(img)
+
+    assert len(plates_c2f) == len(plates) > 0
+    assert cv2.boundingRect(contours_c2f[0]) == cv2.boundingRect(contours[0])
+
+    print("✓ Coarse-to-fine test passed")
+
+
+def test_merge_windows():
+    """Các cửa sổ chồng lên nhau được gộp lại"""
+    windows = [(0, 0, 10, 10), (5, 5, 10, 10), (100, 100, 5, 5)]
+    merged = CoarseToFineDetector.merge_windows(windows)
+    assert sorted(merged) == [(0, 0, 15, 15), (100, 100, 5, 5)]
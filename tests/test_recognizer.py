@@ -0,0 +1,176 @@
+"""
+Test LicensePlateRecognizer (main.py)
+"""
+
+import sys
+from pathlib import Path
+
+# Thêm thư mục gốc vào path để import main
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from main import LicensePlateRecognizer, TIMEOUT, OVERSIZE
+from src.preprocessing import RegionOfInterest
+from src.utils import Config
+import cv2
+import numpy as np
+
+
+def _make_multi_plate_frame():
+    """Ảnh test với nhiều biển số giả"""
+    img = np.full((1080, 1920, 3), 60, dtype=np.uint8)
+    for k, (x, y) in enumerate([(100, 100), (800, 100), (100, 600), (800, 600)]):
+        cv2.rectangle(img, (x, y), (x + 420, y + 220), (240, 240, 240), -1)
+        cv2.putText(img, "51A", (x + 40, y + 90), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (0, 0, 0), 8)
+        cv2.putText(img, f"{k * 12345:05d}", (x + 30, y + 190),
+                    cv2.FONT_HERSHEY_SIMPLEX, 2.5, (0, 0, 0), 8)
+    return img
+
+
+def test_plate_workers_keep_order():
+    """Xử lý đồng thời các biển số cho kết quả và thứ tự giống tuần tự"""
+    print("Testing per-plate parallelism...")
+    img = _make_multi_plate_frame()
+
+    sequential = LicensePlateRecognizer(plate_workers=0)
+    parallel = LicensePlateRecognizer(plate_workers=4)
+
+    plates, _ = sequential.detect(sequential.detector.resize_image(img))
+    assert len(plates) > 1
+    assert parallel.recognize_plates(plates) == sequential.recognize_plates(plates)
+    assert parallel.recognize_image(img) == sequential.recognize_image(img)
+
+    print("✓ Per-plate parallelism test passed")
+
+
+class _TrustFastPass(LicensePlateRecognizer):
+    """Lượt đầy đủ không bao giờ có nhiều ứng viên hơn: luôn dùng kết quả nhanh nếu tin cậy"""
+
+    @staticmethod
+    def count_candidates(frame):
+        return 0
+
+
+def test_cascade_escalation():
+    """Cascade chạy cấu hình đầy đủ khi không thấy biển số, KNN không chắc chắn hoặc bỏ sót biển số"""
+    print("Testing cascade...")
+    img = _make_multi_plate_frame()
+    full = LicensePlateRecognizer()
+    expected = full.recognize_image(img)
+    assert len(expected) > 1
+
+    # Mặc định và kể cả khi mọi ký tự được coi là tin cậy: giống hệt cấu hình
+    # đầy đủ vì lượt đầy đủ có nhiều ứng viên hơn số biển số đọc nhanh được
+    for cascade_min_agreement in (None, 0.0):
+        cascade = LicensePlateRecognizer(cascade=True, cascade_min_agreement=cascade_min_agreement)
+        assert cascade.recognize_image(img) == expected
+        assert cascade.cascade_stats['missed_plates'] == 1
+
+    # Không bỏ sót biển số và kết quả tin cậy: không chạy lại
+    lenient = _TrustFastPass(cascade=True, cascade_min_agreement=0.0)
+    assert len(lenient.recognize_image(img)) > 0
+    assert lenient.cascade_stats['escalated'] == 0
+
+    # Không bao giờ đủ tin cậy: luôn chạy lại, kết quả giống cấu hình đầy đủ
+    strict = _TrustFastPass(cascade=True, cascade_min_agreement=1.1)
+    assert strict.recognize_image(img) == expected
+    assert strict.cascade_stats['low_confidence'] == 1
+
+    # Không có biển số
+    blank = np.full((1080, 1920, 3), 60, dtype=np.uint8)
+    assert strict.recognize_image(blank) == []
+    assert strict.cascade_stats['no_plate'] == 1
+    assert strict.escalation_rate == 1.0
+
+    print("✓ Cascade test passed")
+
+
+def test_recognition_workers_match_in_process(tmp_path):
+    """Nhận dạng trên tiến trình worker (shared memory) cho kết quả giống trong tiến trình"""
+    print("Testing recognition workers...")
+    img = _make_multi_plate_frame()
+    paths = []
+    for i in range(3):
+        path = str(tmp_path / f"frame_{i}.png")
+        cv2.imwrite(path, np.roll(img, 40 * i, axis=1))
+        paths.append(path)
+    paths.append(str(tmp_path / "missing.png"))
+
+    recognizer = LicensePlateRecognizer()
+    expected = recognizer.recognize_batch(paths, prefetch_depth=0)
+    results = list(recognizer.iter_recognize_workers(paths, 2, prefetch_depth=2))
+
+    assert results == expected
+    assert any(plate_texts for _, plate_texts in results)
+
+    print("✓ Recognition workers test passed")
+
+
+def test_budgets_record_timeout_and_oversize(tmp_path):
+    """Ảnh vượt giới hạn thời gian / kích thước được ghi TIMEOUT / OVERSIZE, batch chạy tiếp"""
+    print("Testing per-image budgets...")
+    img = _make_multi_plate_frame()
+    small = str(tmp_path / "small.png")
+    large = str(tmp_path / "large.png")
+    cv2.imwrite(small, img)
+    cv2.imwrite(large, cv2.resize(img, None, fx=2, fy=2))
+
+    recognizer = LicensePlateRecognizer(max_pixels=img.shape[0] * img.shape[1])
+    expected = recognizer.recognize_batch([small], prefetch_depth=0)[0][1]
+    assert expected
+
+    for prefetch_depth in (0, 2):
+        results = recognizer.recognize_batch([large, small], prefetch_depth=prefetch_depth)
+        assert results == [(large, OVERSIZE), (small, expected)]
+
+    recognizer.time_budget = 1e-9
+    assert recognizer.recognize_batch([small], prefetch_depth=0) == [(small, TIMEOUT)]
+    assert recognizer.budget_stats == {'timeout': 1, 'oversize': 2}
+
+    # 0 tắt giới hạn kể cả khi Config có giới hạn (None mới dùng Config)
+    original = Config.MAX_IMAGE_PIXELS
+    Config.MAX_IMAGE_PIXELS = img.shape[0] * img.shape[1]
+    try:
+        assert LicensePlateRecognizer().max_pixels == Config.MAX_IMAGE_PIXELS
+        recognizer = LicensePlateRecognizer(max_pixels=0)
+        assert recognizer.recognize_batch([large], prefetch_depth=0)[0][1] != OVERSIZE
+    finally:
+        Config.MAX_IMAGE_PIXELS = original
+
+    print("✓ Budget test passed")
+
+
+def test_duplicate_frames_reuse_result():
+    """Khung hình gần như trùng khung hình vừa xử lý của camera dùng lại kết quả"""
+    print("Testing duplicate frame suppression...")
+    img = _make_multi_plate_frame()
+    rng = np.random.default_rng(0)
+    noisy = np.clip(img.astype(np.int16) + rng.normal(0, 6, img.shape), 0, 255).astype(np.uint8)
+
+    recognizer = LicensePlateRecognizer(frame_dedup=True, dedup_config={'cam02': None})
+    expected = recognizer.recognize_image(img, camera_id='cam01')
+    assert expected
+
+    # Pipeline không chạy lại cho khung hình trùng
+    pipeline, recognizer.pipeline = recognizer.pipeline, None
+    assert recognizer.recognize_image(noisy, camera_id='cam01') == expected
+
+    # Xe khác dừng đúng chỗ một xe cũ, phần còn lại của khung hình giữ nguyên
+    changed = img.copy()
+    cv2.rectangle(changed, (820, 700), (1210, 810), (240, 240, 240), -1)
+    cv2.putText(changed, "98761", (830, 790), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (0, 0, 0), 8)
+    recognizer.pipeline = pipeline
+    assert recognizer.recognize_image(changed, camera_id='cam01') != expected
+
+    stats = recognizer.deduplicator.stats()
+    assert stats['cam01']['frames'] == 3 and stats['cam01']['skipped'] == 1
+    assert recognizer.worker_options['frame_dedup'] is False
+
+    # Có ROI: hash trên vùng quan tâm, theo tọa độ của khung hình gốc
+    roi = RegionOfInterest(rectangles=[[800, 600, 420, 220]])
+    recognizer = LicensePlateRecognizer(frame_dedup=True, roi_config={'cam01': roi})
+    big = cv2.resize(img, (3840, 2160))
+    height, width = recognizer.dedup_region(big, 'cam01').shape[:2]
+    assert abs(height - 440) <= 1 and abs(width - 840) <= 1
+    assert recognizer.dedup_region(big, 'cam02') is big
+
+    print("✓ Duplicate frame test passed")
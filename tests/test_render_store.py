@@ -0,0 +1,120 @@
+"""
+Test RenderStore (ảnh hiển thị của web UI, mã hóa khi được tải)
+"""
+
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils import RenderStore
+import cv2
+import numpy as np
+
+
+def test_render_store_encodes_lazily():
+    """Ảnh chỉ được mã hóa JPEG khi được tải lần đầu, lần sau dùng lại bytes"""
+    print("Testing lazy render encoding...")
+    store = RenderStore(max_bytes=10 * 1024 * 1024)
+    request_id = store.new_id()
+    img = np.zeros((60, 80, 3), dtype=np.uint8)
+    cv2.rectangle(img, (10, 10), (50, 40), (0, 255, 0), 2)
+
+    store.put(request_id, 'threshold', img)
+    store.put(request_id, 'canny', img)
+    assert store.stats()['encoded'] == 0
+
+    data = store.get(request_id, 'threshold')
+    assert data[:2] == b'\xff\xd8'
+    assert cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR).shape == img.shape
+    assert store.get(request_id, 'threshold') is data
+
+    stats = store.stats()
+    assert stats['encoded'] == 1
+    assert stats['memory_bytes'] == len(data) + img.nbytes
+
+    # Khóa không tồn tại, tên không hợp lệ (dùng làm tên file)
+    assert store.get(request_id, 'missing') is None
+    assert not store.is_valid_key(request_id, '../etc')
+    try:
+        store.put(request_id, '../etc', img)
+        assert False, "invalid render name accepted"
+    except ValueError:
+        pass
+
+    print("✓ Lazy render encoding test passed")
+
+
+def test_render_store_evicts_to_disk():
+    """Vượt giới hạn bộ nhớ thì ảnh cũ nhất xuống đĩa; vượt giới hạn đĩa thì bị bỏ"""
+    print("Testing render store eviction...")
+    img = np.full((100, 100, 3), 128, dtype=np.uint8)
+
+    # Chỉ bộ nhớ: ảnh cũ bị bỏ
+    store = RenderStore(max_bytes=2 * img.nbytes)
+    ids = [store.new_id() for _ in range(3)]
+    for request_id in ids:
+        store.put(request_id, 'original', img)
+    assert store.get(ids[0], 'original') is None
+    assert store.get(ids[2], 'original') is not None
+    assert store.stats()['evicted'] == 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RenderStore(max_bytes=2 * img.nbytes, disk_dir=tmp,
+                            max_disk_bytes=3 * img.nbytes)
+        ids = [store.new_id() for _ in range(6)]
+        for request_id in ids:
+            store.put(request_id, 'original', img)
+
+        stats = store.stats()
+        assert stats['memory_items'] == 2
+        assert stats['disk_bytes'] <= 3 * img.nbytes
+        # Ảnh cũ nhất bị bỏ khỏi đĩa, ảnh trên đĩa được mã hóa khi được tải
+        assert store.get(ids[0], 'original') is None
+        data = store.get(ids[3], 'original')
+        assert data is not None and data[:2] == b'\xff\xd8'
+        assert store.get(ids[3], 'original') == data
+
+        store.close()
+        assert not Path(store.disk_dir).exists()
+
+    print("✓ Render store eviction test passed")
+
+
+def test_render_store_concurrent_spills():
+    """Ghi xuống đĩa ngoài lock: nhiều thread put/get đồng thời, số bytes trên đĩa vẫn đúng"""
+    print("Testing concurrent render spills...")
+    img = np.full((50, 50, 3), 200, dtype=np.uint8)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RenderStore(max_bytes=4 * img.nbytes, disk_dir=tmp,
+                            max_disk_bytes=20 * img.nbytes)
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(40):
+                    request_id = store.new_id()
+                    store.put(request_id, 'original', img)
+                    data = store.get(request_id, 'original')
+                    assert data is None or data[:2] == b'\xff\xd8'
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+
+        stats = store.stats()
+        files = list(Path(store.disk_dir).iterdir())
+        assert stats['disk_items'] == len(files)
+        assert stats['disk_bytes'] == sum(f.stat().st_size for f in files)
+        assert stats['disk_bytes'] <= 20 * img.nbytes
+        store.close()
+
+    print("✓ Concurrent render spill test passed")
@@ -0,0 +1,102 @@
+"""
+Test chia shard và gộp kết quả
+"""
+
+import sys
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils import (
+    parse_shard, filter_shard, merge_results, save_results, image_source_root, iter_image_files,
+    result_name
+)
+from src.utils.sharding import shard_of
+import pytest
+
+
+def test_parse_shard():
+    assert parse_shard("0/4") == (0, 4)
+    for spec in ["4/4", "-1/2", "1", "a/b", "0/0"]:
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+def test_shards_partition_inputs():
+    """Mỗi ảnh thuộc đúng một shard, ổn định giữa các lần chạy"""
+    paths = [f"archive/2026-10-{day:02d}/cam{cam}/img_{i}.jpg"
+             for day in range(1, 4) for cam in range(3) for i in range(20)]
+
+    shards = [list(filter_shard(paths, index, 4)) for index in range(4)]
+    assert sorted(p for shard in shards for p in shard) == sorted(paths)
+    assert all(len(shard) > 0 for shard in shards)
+    assert [shard_of(p, 4) for p in paths] == [shard_of(p, 4) for p in paths]
+
+
+@pytest.mark.parametrize("format", ["txt", "json"])
+def test_merge_is_independent_of_shard_count(tmp_path, format):
+    """File gộp giống hệt từng byte với 1 shard hay nhiều shard"""
+    results = [(f"dir/img_{i:03d}.jpg", f"51A-{i:05d}" if i % 7 else "NO_PLATE")
+               for i in range(50)]
+
+    outputs = []
+    for count in (1, 3, 5):
+        shard_files = []
+        for index in range(count):
+            shard_results = [r for r in results if shard_of(r[0], count) == index]
+            shard_file = tmp_path / f"shard_{count}_{index}.{format}"
+            save_results(shard_results, str(shard_file), format=format)
+            shard_files.append(str(shard_file))
+
+        merged = tmp_path / f"merged_{count}.{format}"
+        assert merge_results(shard_files, str(merged), format=format) == len(results)
+        outputs.append(merged.read_bytes())
+
+    assert outputs[0] == outputs[1] == outputs[2]
+
+
+def test_merge_keeps_nested_paths(tmp_path):
+    """Ảnh trùng tên trong các thư mục con khác nhau là các dòng riêng sau khi gộp"""
+    for sub in ("a", "b"):
+        (tmp_path / "archive" / sub).mkdir(parents=True)
+        (tmp_path / "archive" / sub / "img1.jpg").write_bytes(b"")
+    source = str(tmp_path / "archive")
+    root = image_source_root(source)
+    paths = list(iter_image_files(source, recursive=True, ordered=True))
+    assert len(paths) == 2
+
+    shard_files = []
+    for index, image_path in enumerate(reversed(paths)):
+        shard_file = tmp_path / f"shard_{index}.txt"
+        save_results([(image_path, f"plate-{index}")], str(shard_file), root=root)
+        shard_files.append(str(shard_file))
+
+    merged = tmp_path / "merged.txt"
+    assert merge_results(shard_files, str(merged)) == 2
+    assert merged.read_text(encoding="utf-8") == "a/img1.jpg\tplate-1\nb/img1.jpg\tplate-0\n"
+
+    # Glob: gốc là phần trước ký tự đại diện; file ảnh đơn: chỉ tên file
+    assert image_source_root(str(tmp_path / "archive" / "**" / "*.jpg")) == source
+    assert image_source_root(paths[0]) is None
+
+
+def test_shards_independent_of_mount_point(tmp_path):
+    """Hai máy mount cùng archive ở hai đường dẫn khác nhau chia shard giống nhau"""
+    for sub in ("a", "b", "c"):
+        (tmp_path / "mnt" / "archive" / sub).mkdir(parents=True)
+        for i in range(10):
+            (tmp_path / "mnt" / "archive" / sub / f"img_{i}.jpg").write_bytes(b"")
+    (tmp_path / "data").symlink_to(tmp_path / "mnt" / "archive")
+
+    shards = []
+    for source in (str(tmp_path / "mnt" / "archive"), str(tmp_path / "data") + "/"):
+        root = image_source_root(source)
+        shards.append([
+            sorted(result_name(p, root) for p in filter_shard(
+                iter_image_files(source, recursive=True, ordered=True), index, 3, root=root
+            ))
+            for index in range(3)
+        ])
+    assert shards[0] == shards[1]
+    assert sum(len(shard) for shard in shards[0]) == 30
@@ -0,0 +1,105 @@
+"""
+Test watch mode: phát hiện file mới và checkpoint
+"""
+
+import sys
+from pathlib import Path
+
+# Thêm src vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils import FolderWatcher, ProcessedCheckpoint
+from src.utils.watcher import INotify
+import pytest
+
+
+def test_watcher_waits_for_stable_files(tmp_path):
+    """File chỉ được trả về khi kích thước không đổi giữa hai lần quét"""
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    watcher = FolderWatcher(str(spool), use_inotify=False)
+
+    image = spool / "frame_001.jpg"
+    image.write_bytes(b'partial')
+    (spool / "readme.txt").write_bytes(b'ignored')
+
+    assert watcher.poll() == []
+
+    # Camera ghi tiếp: kích thước thay đổi nên vẫn chưa sẵn sàng
+    image.write_bytes(b'partial-and-more')
+    assert watcher.poll() == []
+
+    assert watcher.poll() == [str(image)]
+    assert watcher.poll() == []
+
+
+def test_checkpoint_skips_processed_files(tmp_path):
+    """Khởi động lại với checkpoint không xử lý lại file cũ"""
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    (spool / "a.jpg").write_bytes(b'a')
+    (spool / "b.jpg").write_bytes(b'b')
+    checkpoint_path = str(tmp_path / "results.txt.checkpoint")
+
+    checkpoint = ProcessedCheckpoint(checkpoint_path)
+    checkpoint.add(str(spool / "a.jpg"))
+    checkpoint.close()
+
+    checkpoint = ProcessedCheckpoint(checkpoint_path)
+    watcher = FolderWatcher(str(spool), use_inotify=False, processed=checkpoint)
+    watcher.poll()
+    assert watcher.poll() == [str(spool / "b.jpg")]
+    checkpoint.close()
+
+
+def test_watcher_forgets_deleted_files(tmp_path):
+    """File đã xử lý rồi bị xóa khỏi spool không còn được nhớ"""
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    checkpoint = ProcessedCheckpoint(str(tmp_path / "results.txt.checkpoint"))
+    watcher = FolderWatcher(str(spool), use_inotify=False, processed=checkpoint)
+
+    paths = []
+    for i in range(4):
+        image = spool / f"frame_{i}.jpg"
+        image.write_bytes(b'frame')
+        paths.append(str(image))
+    watcher.poll()
+    assert watcher.poll() == paths
+
+    # Hai file đã ghi checkpoint, hai file chưa; sau đó xóa cả bốn
+    checkpoint.add(paths[0])
+    checkpoint.add(paths[1])
+    for path in paths:
+        Path(path).unlink()
+    watcher.poll()
+    assert len(checkpoint) == 0
+    assert not watcher._emitted
+
+    # File checkpoint được ghi lại khi phần lớn dòng đã cũ
+    checkpoint.close()
+    assert (tmp_path / "results.txt.checkpoint").read_text(encoding='utf-8') == ''
+
+
+@pytest.mark.skipif(INotify is None, reason="inotify_simple not installed")
+def test_watcher_inotify_recursive(tmp_path):
+    """inotify theo dõi cả thư mục con, kể cả thư mục con tạo sau khi bắt đầu"""
+    spool = tmp_path / "spool"
+    (spool / "cam1").mkdir(parents=True)
+    watcher = FolderWatcher(str(spool), poll_interval=0.1, recursive=True)
+    assert watcher.uses_inotify
+    assert watcher.poll() == []
+
+    image = spool / "cam1" / "a.jpg"
+    image.write_bytes(b'frame')
+    watcher.wait()
+    assert watcher.poll() == [str(image)]
+
+    (spool / "cam2").mkdir()
+    watcher.wait()
+    watcher.poll()
+    image = spool / "cam2" / "b.jpg"
+    image.write_bytes(b'frame')
+    watcher.wait()
+    assert watcher.poll() == [str(image)]
+    watcher.close()
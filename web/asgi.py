@@ -0,0 +1,251 @@
+"""
+Web UI for Vietnamese License Plate Recognition System
+ASGI application (Starlette), cùng API với app.py
+
+Upload được nhận bất đồng bộ trên event loop (không chiếm thread trong lúc
+client gửi chậm); giải mã và nhận dạng chạy trên thread pool, hoặc trên các
+tiến trình worker khi Config.WEB_WORKERS > 0.
+
+Chạy:
+    uvicorn asgi:app --app-dir web --host 0.0.0.0 --port 5000
+"""
+
+import sys
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route, Mount
+from starlette.staticfiles import StaticFiles
+from starlette.templating import Jinja2Templates
+
+# Thêm src và web vào path
+BASE_DIR = Path(__file__).resolve().parent.parent
+WEB_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(WEB_DIR))
+
+from src.utils import (
+    Config, ImageTooLarge, Deadline, DeadlineExceeded, AsyncAdmissionController,
+    AdmissionRejected
+)
+from recognition_service import (
+    create_web_pipeline, create_frame_pool, create_render_store, decode_upload,
+    render_recognition, recognition_response, submit_frame, store_renders,
+    render_headers, render_not_modified
+)
+
+templates = Jinja2Templates(directory=str(WEB_DIR / 'templates'))
+
+
+def static_url(name, filename):
+    """url_for('static', filename=...) như trong template của Flask"""
+    return f'/static/{filename}'
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Khởi tạo pipeline (hoặc tiến trình worker) khi server khởi động"""
+    print("Initializing License Plate Recognition System...")
+    Config.ensure_directories()
+
+    state = app.state
+    if Config.WEB_WORKERS > 0:
+        # Nhận dạng trên các tiến trình worker, khung hình qua shared memory
+        state.frame_pool = create_frame_pool()
+        state.pipeline = None
+    else:
+        state.frame_pool = None
+        state.pipeline = create_web_pipeline()
+
+    # Giải mã và nhận dạng (tốn CPU) không chạy trên event loop
+    state.executor = ThreadPoolExecutor(
+        max_workers=Config.WEB_MAX_IN_FLIGHT, thread_name_prefix='recognize'
+    )
+    state.admission = AsyncAdmissionController(
+        max_in_flight=Config.WEB_MAX_IN_FLIGHT,
+        max_queue=Config.WEB_MAX_QUEUE,
+        queue_timeout=Config.WEB_QUEUE_TIMEOUT
+    )
+    # Ảnh hiển thị trả về dạng URL, mã hóa khi được tải (Config.WEB_RENDER_STORE)
+    state.render_store = create_render_store()
+    print("System initialized successfully!")
+    try:
+        yield
+    finally:
+        state.executor.shutdown(wait=True)
+        if state.frame_pool is not None:
+            state.frame_pool.close()
+        if state.render_store is not None:
+            state.render_store.close()
+
+
+class UploadTooLarge(Exception):
+    """Body của request vượt Config.WEB_MAX_UPLOAD_BYTES"""
+
+
+def limit_body(request, max_bytes):
+    """
+    Request đọc cùng body nhưng dừng ngay khi đã nhận quá max_bytes
+
+    Upload chunked không có content-length nên giới hạn phải được kiểm tra
+    trong lúc nhận, trước khi form parser ghi hết body ra file tạm.
+
+    Args:
+        request: Request gốc
+        max_bytes: Số bytes body tối đa
+
+    Returns:
+        request: Request mới; đọc body raise UploadTooLarge khi vượt giới hạn
+    """
+    received = 0
+
+    async def receive():
+        nonlocal received
+        message = await request.receive()
+        if message['type'] == 'http.request':
+            received += len(message.get('body', b''))
+            if received > max_bytes:
+                raise UploadTooLarge()
+        return message
+
+    return Request(request.scope, receive)
+
+
+async def index(request):
+    """Trang chủ"""
+    return templates.TemplateResponse(request, 'index.html', {'url_for': static_url})
+
+
+async def recognize(request):
+    """API nhận dạng biển số"""
+    # Thời hạn tính từ lúc nhận request (gồm cả thời gian chờ trong hàng đợi)
+    deadline = Deadline(Config.WEB_REQUEST_TIMEOUT)
+    state = request.app.state
+    loop = asyncio.get_running_loop()
+    try:
+        content_length = request.headers.get('content-length')
+        if content_length is not None and int(content_length) > Config.WEB_MAX_UPLOAD_BYTES:
+            return JSONResponse({'error': 'File quá lớn'}, status_code=413)
+
+        # Nhận upload trên event loop (file lớn được ghi tạm ra đĩa), dừng ngay
+        # khi vượt giới hạn kể cả khi không có content-length
+        async with limit_body(request, Config.WEB_MAX_UPLOAD_BYTES).form(max_files=1) as form:
+            file = form.get('file')
+            if file is None or isinstance(file, str):
+                return JSONResponse({'error': 'Không có file được upload'}, status_code=400)
+            if not file.filename:
+                return JSONResponse({'error': 'Chưa chọn file'}, status_code=400)
+            file_bytes = await file.read()
+
+        # Giải mã và nhận dạng chỉ khi được nhận vào (quá tải thì từ chối trước khi tốn CPU)
+        async with state.admission.admit(deadline):
+            img, decode_time = await loop.run_in_executor(
+                state.executor, decode_upload, file_bytes
+            )
+            if img is None:
+                return JSONResponse(
+                    {'error': 'Không thể đọc ảnh. Vui lòng chọn file ảnh hợp lệ.'},
+                    status_code=400
+                )
+
+            deadline.check('recognize')
+            render_store = state.render_store
+            # Có render store: ảnh hiển thị chưa mã hóa, mã hóa khi được tải
+            encoding = None if render_store is not None else 'base64'
+            if state.frame_pool is not None:
+                # Ghi khung hình vào shared memory trên thread pool, chờ worker trên event loop
+                future = await loop.run_in_executor(
+                    state.executor, submit_frame, state.frame_pool, img, deadline, encoding
+                )
+                try:
+                    payload = await asyncio.wait_for(
+                        asyncio.wrap_future(future), timeout=deadline.timeout()
+                    )
+                except asyncio.TimeoutError:
+                    raise DeadlineExceeded('recognize')
+            else:
+                payload = await loop.run_in_executor(
+                    state.executor, render_recognition, state.pipeline, img, deadline, encoding
+                )
+
+        if render_store is not None:
+            payload = store_renders(render_store, payload)
+        return JSONResponse(recognition_response(payload, decode_time))
+
+    except UploadTooLarge:
+        return JSONResponse({'error': 'File quá lớn'}, status_code=413)
+    except ImageTooLarge as e:
+        return JSONResponse({'error': f'Ảnh quá lớn ({e.width}x{e.height} pixel).'},
+                            status_code=413)
+    except AdmissionRejected as e:
+        return JSONResponse({'error': 'Hệ thống đang quá tải, vui lòng thử lại sau.'},
+                            status_code=503, headers={'Retry-After': str(e.retry_after)})
+    except DeadlineExceeded as e:
+        return JSONResponse({'error': f'Quá thời gian xử lý ({e.stage})'}, status_code=503,
+                            headers={'Retry-After': str(state.admission.retry_after())})
+    except Exception as e:
+        return JSONResponse({'error': f'Lỗi xử lý: {str(e)}'}, status_code=500)
+
+
+async def render_image(request):
+    """Ảnh hiển thị của một request (JPEG, mã hóa lần đầu khi được tải)"""
+    render_store = request.app.state.render_store
+    request_id = request.path_params['request_id']
+    name = request.path_params['name']
+    if render_store is None or not render_store.is_valid_key(request_id, name):
+        return JSONResponse({'error': 'Không tìm thấy ảnh'}, status_code=404)
+
+    headers = render_headers(request_id, name)
+    if render_not_modified(request.headers.get('if-none-match'), request_id, name):
+        return Response(status_code=304, headers=headers)
+
+    # Mã hóa JPEG không chạy trên event loop
+    data = await asyncio.get_running_loop().run_in_executor(
+        request.app.state.executor, render_store.get, request_id, name
+    )
+    if data is None:
+        return JSONResponse({'error': 'Không tìm thấy ảnh'}, status_code=404)
+    return Response(data, media_type='image/jpeg', headers=headers)
+
+
+async def health(request):
+    """Health check endpoint"""
+    return JSONResponse({'status': 'ok', 'message': 'System is running'})
+
+
+async def metrics(request):
+    """Thống kê giới hạn tải: đang xử lý, đang chờ, bị từ chối, quá hạn, thời gian chờ"""
+    state = request.app.state
+    metrics = {'admission': state.admission.stats()}
+    if state.render_store is not None:
+        metrics['render_store'] = state.render_store.stats()
+    return JSONResponse(metrics)
+
+
+app = Starlette(
+    routes=[
+        Route('/', index),
+        Route('/api/recognize', recognize, methods=['POST']),
+        Route('/api/renders/{request_id}/{name}.jpg', render_image),
+        Route('/health', health),
+        Route('/metrics', metrics),
+        Mount('/static', app=StaticFiles(directory=str(WEB_DIR / 'static')), name='static'),
+    ],
+    lifespan=lifespan
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("\n" + "="*60)
+    print("Web UI (ASGI) - Vietnamese License Plate Recognition System")
+    print("="*60)
+    print("Open your browser and visit: http://127.0.0.1:5000")
+    print("="*60 + "\n")
+    uvicorn.run(app, host='0.0.0.0', port=5000)
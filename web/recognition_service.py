@@ -0,0 +1,462 @@
+"""
+Recognition service cho Web UI
+Nhận dạng một ảnh và chuẩn bị phần ảnh của response (base64, hoặc URL vào
+RenderStore khi Config.WEB_RENDER_STORE bật). Dùng chung bởi
+front end Flask (app.py) và ASGI (asgi.py); chạy trong tiến trình web, hoặc
+trong các tiến trình worker khi Config.WEB_WORKERS > 0 (khung hình được chuyển
+qua shared memory, chỉ response nhỏ quay về).
+"""
+
+import sys
+import time
+import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Thêm thư mục gốc vào path (cần cho tiến trình worker)
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from src.preprocessing import ImagePreprocessor
+from src.detection import PlateDetector
+from src.recognition import CharacterSegmenter, CharacterRecognizer, MicroBatchClassifier
+from src.pipeline import RecognitionPipeline
+from src.utils import Config, Deadline, DeadlineExceeded, decode_image, SharedFramePool, RenderStore
+
+
+def create_recognizer():
+    """CharacterRecognizer theo Config"""
+    return CharacterRecognizer(
+        model_path=str(Config.MODEL_DIR),
+        classifications_file=Config.CLASSIFICATIONS_FILE,
+        flattened_images_file=Config.FLATTENED_IMAGES_FILE,
+        k_neighbors=Config.K_NEIGHBORS,
+        cache_size=Config.GLYPH_CACHE_SIZE,
+        model_type=Config.MODEL_TYPE,
+        features=Config.FEATURES,
+        features_file=Config.FEATURES_FILE,
+        glyph_store=Config.GLYPH_STORE_DIR
+    )
+
+
+def create_pipeline(classifier, executor=None):
+    """
+    Cùng stage graph với CLI; trang web lấy thêm các bước trung gian để hiển thị
+
+    Args:
+        classifier: CharacterRecognizer hoặc MicroBatchClassifier
+        executor: Thread pool để phân đoạn đồng thời các biển số (tùy chọn)
+    """
+    return RecognitionPipeline(
+        ImagePreprocessor(), PlateDetector(), CharacterSegmenter(), classifier,
+        executor=executor
+    )
+
+
+def create_web_pipeline():
+    """
+    Pipeline nhận dạng trong tiến trình web theo Config: micro-batching KNN giữa
+    các request đồng thời và thread pool cho các biển số (nếu bật), tải lại model
+    khi file model thay đổi
+
+    Returns:
+        pipeline: RecognitionPipeline
+    """
+    recognizer = create_recognizer()
+
+    # Gom ký tự từ các request đồng thời vào một lần gọi KNN (tùy chọn)
+    if Config.MICRO_BATCH_ENABLED:
+        plate_classifier = MicroBatchClassifier(
+            recognizer,
+            max_wait_ms=Config.MICRO_BATCH_WAIT_MS,
+            max_batch_size=Config.MICRO_BATCH_MAX_SIZE
+        )
+    else:
+        plate_classifier = recognizer
+
+    # Thread pool dùng chung để xử lý đồng thời các biển số trong một ảnh
+    plate_executor = (
+        ThreadPoolExecutor(max_workers=Config.PLATE_WORKERS, thread_name_prefix='plate')
+        if Config.PLATE_WORKERS > 0 else None
+    )
+
+    pipeline = create_pipeline(plate_classifier, executor=plate_executor)
+    start_model_watcher(recognizer)
+    return pipeline
+
+
+def create_frame_pool():
+    """
+    Tiến trình nhận dạng cho web (Config.WEB_WORKERS), khung hình qua shared memory
+
+    Returns:
+        frame_pool: SharedFramePool với đủ ô cho mọi request đang xử lý
+    """
+    width, height = Config.TARGET_IMAGE_SIZE
+    # Đủ ô cho mọi request đang xử lý để submit() không phải chờ
+    return SharedFramePool(
+        Config.WEB_WORKERS, (height, width, 3), initializer=init_worker,
+        slots=max(2 * Config.WEB_WORKERS, Config.WEB_MAX_IN_FLIGHT)
+    )
+
+
+def start_model_watcher(recognizer):
+    """Thread nền: tải lại model KNN khi file model thay đổi (không cần restart)"""
+    if Config.MODEL_RELOAD_INTERVAL <= 0:
+        return
+
+    def watch_model_changes():
+        while True:
+            time.sleep(Config.MODEL_RELOAD_INTERVAL)
+            if recognizer.reload_if_changed():
+                print("Model changed on disk, reloaded")
+
+    threading.Thread(target=watch_model_changes, name='model-reload', daemon=True).start()
+
+
+def encode_image_to_base64(img):
+    """
+    Chuyển đổi ảnh OpenCV sang base64 string
+
+    Args:
+        img: Ảnh OpenCV (numpy array)
+
+    Returns:
+        img_base64: String base64
+    """
+    _, buffer = cv2.imencode('.jpg', img)
+    img_base64 = base64.b64encode(buffer).decode('utf-8')
+    return img_base64
+
+
+def to_display(img):
+    """Ảnh grayscale -> BGR để hiển thị (copy, không tham chiếu buffer của pipeline)"""
+    return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+
+def draw_characters(roi, characters):
+    """
+    Vẽ khung các ký tự đã phân đoạn lên ảnh biển số
+
+    Args:
+        roi: Ảnh biển số
+        characters: Danh sách ký tự [(x, y, w, h, img), ...]
+
+    Returns:
+        roi_display: Ảnh biển số có khung các ký tự
+    """
+    roi_display = roi.copy()
+    for x, y, w, h, _ in characters:
+        cv2.rectangle(roi_display, (x, y), (x + w, y + h), (0, 255, 0), 2)
+    return roi_display
+
+
+def decode_upload(file_bytes):
+    """
+    Giải mã ảnh upload (JPEG lớn được giải mã thẳng ở độ phân giải gần kích
+    thước làm việc, ảnh vượt Config.MAX_IMAGE_PIXELS được thu nhỏ hoặc từ chối)
+
+    Args:
+        file_bytes: Nội dung file upload
+
+    Returns:
+        img: Ảnh (BGR) hoặc None nếu không đọc được
+        decode_time: Thời gian giải mã (giây)
+
+    Raises:
+        ImageTooLarge: Ảnh vượt giới hạn pixel
+    """
+    nparr = np.frombuffer(file_bytes, np.uint8)
+    target_size = Config.TARGET_IMAGE_SIZE if Config.REDUCED_DECODE else None
+    return decode_image(nparr, target_size, allow_grayscale=False,
+                        max_pixels=Config.MAX_IMAGE_PIXELS)
+
+
+def recognition_response(payload, decode_time):
+    """
+    JSON response của /api/recognize
+
+    Args:
+        payload: Kết quả của render_recognition
+        decode_time: Thời gian giải mã (giây)
+
+    Returns:
+        response: Dict
+    """
+    results = payload['results']
+
+    # Format kết quả
+    if results:
+        result_text = " | ".join(results)
+    else:
+        result_text = "Không phát hiện được biển số"
+
+    return {
+        'success': True,
+        'results': results,
+        'result_text': result_text,
+        'detected_image': payload['detected_image'],
+        'plate_images': payload['plate_images'],
+        'processing_steps': payload['processing_steps'],
+        'image_urls': payload.get('image_urls', False),
+        'count': len(results),
+        'timing': {
+            'decode_ms': round(decode_time * 1000, 2),
+            'recognize_ms': payload['recognize_ms'],
+            'stages_ms': payload['stages_ms']
+        }
+    }
+
+
+def recognize_plate_from_array(pipeline, img_array, deadline=None):
+    """
+    Nhận dạng biển số từ mảng ảnh numpy với tất cả các bước trung gian
+
+    Args:
+        pipeline: RecognitionPipeline
+        img_array: Mảng ảnh numpy (BGR)
+        deadline: Deadline của request (tùy chọn), kiểm tra giữa các bước
+
+    Returns:
+        results: Danh sách kết quả
+        plate_images: Danh sách ảnh biển số
+        detected_image: Ảnh với vùng phát hiện
+        processing_steps: Dictionary chứa tất cả bước xử lý
+        stage_timings: Thời gian từng bước của pipeline (giây)
+    """
+    results = []
+    plate_images = []
+    processing_steps = {}
+
+    # Bước 0: Resize ảnh về kích thước chuẩn
+    img = pipeline.detector.resize_image(img_array)
+    processing_steps['original'] = img.copy()
+
+    frame = pipeline.frame(img, deadline=deadline)
+
+    # === PREPROCESSING ===
+    processing_steps['grayscale'] = to_display(frame['value'])
+    processing_steps['contrast'] = to_display(frame['contrast'])
+    processing_steps['blurred'] = to_display(frame['blur'])
+    processing_steps['threshold'] = to_display(frame['threshold'])
+
+    # === DETECTION ===
+    processing_steps['canny'] = to_display(frame['canny'])
+    processing_steps['dilated'] = to_display(frame['dilate'])
+
+    # Vẽ contour lên ảnh gốc
+    detected_image = img.copy()
+    for contour in frame['contours']:
+        cv2.drawContours(detected_image, [contour], -1, (0, 255, 0), 3)
+    processing_steps['contours'] = detected_image.copy()
+
+    # === RECOGNITION ===
+    plates, _ = frame['plates']
+    for (roi, _), segmented, reading in zip(plates, frame['segmentation'], frame['recognition']):
+        if reading is not None:
+            results.append(reading[0])
+            plate_images.append(draw_characters(roi, segmented[0]))
+
+    return results, plate_images, detected_image, processing_steps, frame.timings
+
+
+def render_recognition(pipeline, img, deadline=None, encoding='base64'):
+    """
+    Nhận dạng và chuẩn bị các ảnh hiển thị (phần nặng của một request)
+
+    Args:
+        pipeline: RecognitionPipeline
+        img: Ảnh (BGR)
+        deadline: Deadline của request (tùy chọn)
+        encoding: Dạng ảnh trong payload: 'base64' (chuỗi cho JSON) hoặc None (ảnh
+                  đã resize, chưa mã hóa; RenderStore mã hóa khi được tải)
+
+    Returns:
+        payload: Dict {'results', 'detected_image', 'plate_images',
+                 'processing_steps', 'recognize_ms', 'stages_ms'}
+
+    Raises:
+        DeadlineExceeded: Hết thời hạn trước khi xử lý xong
+    """
+    start = time.perf_counter()
+    results, plate_images, detected_image, processing_steps, stage_timings = \
+        recognize_plate_from_array(pipeline, img, deadline)
+    recognize_time = time.perf_counter() - start
+
+    if deadline is not None:
+        deadline.check('encode')
+
+    if encoding == 'base64':
+        encode = encode_image_to_base64
+    else:
+        encode = lambda image: image
+
+    # Resize về kích thước hiển thị rồi mã hóa
+    detected_img_resized = cv2.resize(detected_image, None, fx=0.5, fy=0.5)
+
+    plate_images_encoded = []
+    for plate_img in plate_images:
+        plate_resized = cv2.resize(plate_img, None, fx=0.75, fy=0.75)
+        plate_images_encoded.append(encode(plate_resized))
+
+    steps_encoded = {}
+    for step_name, step_img in processing_steps.items():
+        step_resized = cv2.resize(step_img, None, fx=0.3, fy=0.3)
+        steps_encoded[step_name] = encode(step_resized)
+
+    return {
+        'results': results,
+        'detected_image': encode(detected_img_resized),
+        'plate_images': plate_images_encoded,
+        'processing_steps': steps_encoded,
+        'recognize_ms': round(recognize_time * 1000, 2),
+        'stages_ms': {
+            stage: round(seconds * 1000, 2) for stage, seconds in stage_timings.items()
+        }
+    }
+
+
+def store_renders(render_store, payload):
+    """
+    Lưu các ảnh của payload vào RenderStore, thay ảnh bằng URL
+
+    Args:
+        render_store: RenderStore
+        payload: Kết quả của render_recognition với encoding None
+
+    Returns:
+        payload: Payload mới, ảnh là URL /api/renders/<request_id>/<name>.jpg
+    """
+    request_id = render_store.new_id()
+
+    def publish(name, image):
+        render_store.put(request_id, name, image)
+        return f'/api/renders/{request_id}/{name}.jpg'
+
+    payload = dict(payload)
+    payload['detected_image'] = publish('detected', payload['detected_image'])
+    payload['plate_images'] = [
+        publish(f'plate_{i}', plate_img) for i, plate_img in enumerate(payload['plate_images'])
+    ]
+    payload['processing_steps'] = {
+        step_name: publish(step_name, step_img)
+        for step_name, step_img in payload['processing_steps'].items()
+    }
+    payload['image_urls'] = True
+    return payload
+
+
+def render_headers(request_id, name):
+    """
+    Header của ảnh trong RenderStore: nội dung không đổi theo URL nên được cache lâu
+
+    Returns:
+        headers: Dict {'ETag', 'Cache-Control'}
+    """
+    return {
+        'ETag': RenderStore.etag(request_id, name),
+        'Cache-Control': f'public, max-age={Config.WEB_RENDER_MAX_AGE}, immutable'
+    }
+
+
+def render_not_modified(if_none_match, request_id, name):
+    """
+    Client đã có ảnh (If-None-Match khớp ETag); đúng cả khi ảnh đã bị đẩy khỏi store
+
+    Args:
+        if_none_match: Giá trị header If-None-Match (hoặc None)
+    """
+    if not if_none_match:
+        return False
+    etag = RenderStore.etag(request_id, name)
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+
+def create_render_store():
+    """RenderStore theo Config, hoặc None nếu ảnh được trả về dạng base64"""
+    if not Config.WEB_RENDER_STORE:
+        return None
+    return RenderStore(
+        max_bytes=Config.WEB_RENDER_STORE_MAX_BYTES,
+        disk_dir=Config.WEB_RENDER_STORE_DIR,
+        max_disk_bytes=Config.WEB_RENDER_STORE_MAX_DISK_BYTES
+    )
+
+
+# Pipeline của tiến trình worker (Config.WEB_WORKERS > 0)
+_worker_pipeline = None
+
+
+def init_worker():
+    """Tạo recognizer và pipeline trong tiến trình worker"""
+    global _worker_pipeline
+    recognizer = create_recognizer()
+    _worker_pipeline = create_pipeline(recognizer)
+    start_model_watcher(recognizer)
+
+
+def submit_frame(frame_pool, img, deadline, encoding='base64'):
+    """
+    Gửi khung hình cho tiến trình worker (resize thẳng vào shared memory)
+
+    Args:
+        frame_pool: SharedFramePool của create_frame_pool
+        img: Ảnh (BGR)
+        deadline: Deadline của request; worker nhận thời điểm hết hạn tuyệt đối nên
+                  thời gian chờ trong hàng đợi của pool cũng được tính
+        encoding: Dạng ảnh trong payload ('base64' hoặc None, xem render_recognition);
+                  ảnh chưa mã hóa đã được resize về kích thước hiển thị nên gửi
+                  về tiến trình web không tốn nhiều
+
+    Returns:
+        future: Future trả về payload như render_recognition
+    """
+    return frame_pool.submit(
+        recognize_frame, img, deadline.wall_time(), encoding, size=Config.TARGET_IMAGE_SIZE
+    )
+
+
+def wait_frame(future, deadline):
+    """
+    Chờ kết quả của submit_frame trong thời hạn của request
+
+    Args:
+        future: Future của submit_frame
+        deadline: Deadline của request
+
+    Returns:
+        payload: Như render_recognition
+
+    Raises:
+        DeadlineExceeded: Hết thời hạn khi khung hình còn chờ hoặc đang xử lý
+                          (worker tự dừng ở bước kế tiếp)
+    """
+    try:
+        return future.result(timeout=deadline.timeout())
+    except FutureTimeout:
+        future.cancel()
+        raise DeadlineExceeded('recognize')
+
+
+def recognize_frame(img, expires_at=None, encoding='base64'):
+    """
+    Xử lý một khung hình trong tiến trình worker (img là view vào shared memory)
+
+    Args:
+        img: Khung hình
+        expires_at: Thời điểm hết hạn của request (time.time(), None = không giới
+                    hạn); khung hình đã hết hạn khi tới lượt thì không xử lý
+        encoding: Dạng ảnh trong payload ('base64' hoặc None)
+
+    Raises:
+        DeadlineExceeded: Hết thời hạn trước khi xử lý xong
+    """
+    deadline = Deadline.at(expires_at)
+    deadline.check('recognize')
+    return render_recognition(_worker_pipeline, img, deadline, encoding)